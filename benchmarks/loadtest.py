@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+from bot.cache_manager import CacheManager
+from bot.completion_history import CompletionHistory
+from bot.completion_journal import CompletionJournal
+from bot.config import Config
+from bot.identity_index import IdentityIndex
+from bot.handlers import register_handlers
+from bot.locations import DEFAULT_LOCATION, Location, LocationRegistry
+from bot.members_manager import MembersManager
+from bot.message_editor import MessageEditCoalescer
+from bot.mirror import SpreadsheetMirror
+from bot.rate_limiter import SheetsRateLimiter
+from bot.storage import InMemoryBackend
+from bot.table_manager import TableManager
+from bot.update_processor import PerUserUpdateProcessor
+from .synthetic import build_spreadsheet
+
+BOT_TOKEN = '123456:LOADTEST'
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'Load Test Bot', 'username': 'loadtest_bot'}
+FIRST_USER_ID = 100000
+
+
+class FakeBotAPI:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.calls = Counter()
+        self._message_ids = 1000
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin-1').strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                method = request_line.decode('latin-1').split()[1].rsplit('/', 1)[-1]
+                
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                
+                payload = json.dumps({'ok': True, 'result': self._result(method, self._params(headers, body))}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1')
+                    + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _params(self, headers: Dict, body: bytes) -> Dict:
+        if not body:
+            return {}
+        if headers.get('content-type', '').startswith('application/json'):
+            return json.loads(body)
+        return {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+
+    def _result(self, method: str, params: Dict):
+        self.calls[method] += 1
+        
+        if method == 'getMe':
+            return BOT_USER
+        
+        if method in ('sendMessage', 'editMessageText'):
+            chat_id = int(params.get('chat_id', 0))
+            message_id = params.get('message_id')
+            if message_id is None:
+                self._message_ids += 1
+                message_id = self._message_ids
+            return {
+                'message_id': int(message_id),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': params.get('text', '')
+            }
+        
+        return True
+
+
+class UpdateFactory:
+    def __init__(self, employees: Dict[str, Dict], callback_users: List[str], rows: List[int], seed: int = 7):
+        self.users = [
+            (FIRST_USER_ID + index, info['username'])
+            for index, info in enumerate(employees.values())
+        ]
+        self.callback_users = [user for user in self.users if user[1] in callback_users] or self.users
+        self.rows = rows or [2]
+        self.rng = random.Random(seed)
+        self.next_update_id = 1
+
+    def build(self, kind: str) -> Dict:
+        update_id = self.next_update_id
+        self.next_update_id += 1
+        now = int(time.time())
+        
+        if kind == 'complete':
+            user_id, username = self.rng.choice(self.callback_users)
+            sender = {'id': user_id, 'is_bot': False, 'first_name': username, 'username': username}
+            return {
+                'update_id': update_id,
+                'callback_query': {
+                    'id': str(update_id),
+                    'from': sender,
+                    'chat_instance': str(user_id),
+                    'data': f"complete_{self.rng.choice(self.rows)}",
+                    'message': {
+                        'message_id': 1,
+                        'date': now,
+                        'chat': {'id': user_id, 'type': 'private'},
+                        'from': BOT_USER,
+                        'text': 'tasks'
+                    }
+                }
+            }
+        
+        user_id, username = self.rng.choice(self.users)
+        sender = {'id': user_id, 'is_bot': False, 'first_name': username, 'username': username}
+        command = f"/{kind}"
+        return {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': now,
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': sender,
+                'text': command,
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+            }
+        }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_load(args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as workdir:
+        return await _run_load(args, Path(workdir))
+
+
+async def _run_load(args, workdir: Path) -> Dict:
+    fake_api = FakeBotAPI(latency=args.api_latency)
+    await fake_api.start()
+    
+    now = datetime.now()
+    limiter = SheetsRateLimiter(args.sheets_quota) if args.sheets_quota > 0 else None
+    
+    backends = []
+    locations = []
+    for index in range(args.locations):
+        location_id = f"shop-{index:02d}" if args.locations > 1 else DEFAULT_LOCATION
+        backend = InMemoryBackend(
+            build_spreadsheet(args.users, args.equipment, now, username_prefix=f"{location_id.replace('-', '')}_user"),
+            latency=args.sheets_latency
+        )
+        backends.append(backend)
+        
+        identity = IdentityIndex()
+        location_dir = workdir / location_id
+        table_manager = TableManager('', location_id, identity, backend, limiter)
+        cache_manager = CacheManager(
+            table_manager,
+            CompletionJournal(str(location_dir / 'journal')),
+            SpreadsheetMirror(str(location_dir / 'mirror')),
+            CompletionHistory(str(location_dir / 'history'))
+        )
+        members_manager = MembersManager(str(location_dir / 'members'), identity=identity)
+        locations.append(Location(location_id, location_id, str(location_dir), table_manager, members_manager, cache_manager))
+    
+    startup_started = time.perf_counter()
+    await asyncio.gather(*(location.cache_manager.initialize() for location in locations))
+    startup_seconds = time.perf_counter() - startup_started
+    
+    employees = {}
+    on_shift = []
+    due_rows = set()
+    for location in locations:
+        location.members_manager.sync_with_table(location.table_manager.employees_cache)
+        for name, info in location.table_manager.employees_cache.items():
+            location.members_manager.add_member(info['username'], FIRST_USER_ID + len(employees), name)
+            employees[f"{location.id}/{name}"] = info
+        on_shift.extend(shift['username'] for shift in location.cache_manager.snapshot.shifts)
+        due_rows.update(task.row_index for task in location.cache_manager.get_tasks_for_date(now))
+    
+    factory = UpdateFactory(employees, on_shift, sorted(due_rows))
+    
+    builder = Application.builder().token(BOT_TOKEN).base_url(fake_api.base_url)
+    if args.concurrent_updates > 1:
+        builder = builder.concurrent_updates(PerUserUpdateProcessor(args.concurrent_updates))
+    application = builder.build()
+    
+    application.bot_data['locations'] = LocationRegistry(locations)
+    application.bot_data['config'] = Config(BOT_TOKEN, 'loadtest', '', 30, 'Europe/Moscow')
+    application.bot_data['message_editor'] = MessageEditCoalescer(application.bot, args.edit_window)
+    register_handlers(application)
+    
+    enqueued_at: Dict[int, float] = {}
+    started_at: Dict[int, float] = {}
+    handler_latencies: Dict[str, List[float]] = {}
+    end_to_end: List[float] = []
+    kinds: Dict[int, str] = {}
+    pending = set()
+    all_done = asyncio.Event()
+
+    async def mark_started(update: Update, context):
+        started_at[update.update_id] = time.perf_counter()
+
+    async def mark_finished(update: Update, context):
+        finished = time.perf_counter()
+        update_id = update.update_id
+        kind = kinds[update_id]
+        handler_latencies.setdefault(kind, []).append(finished - started_at[update_id])
+        end_to_end.append(finished - enqueued_at[update_id])
+        pending.discard(update_id)
+        if not pending:
+            all_done.set()
+    
+    application.add_handler(TypeHandler(Update, mark_started), group=-1)
+    application.add_handler(TypeHandler(Update, mark_finished), group=99)
+    
+    mix = _parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    
+    await application.initialize()
+    await application.start()
+    
+    try:
+        fake_api.calls.clear()
+        run_started = time.perf_counter()
+        
+        for _ in range(args.bursts):
+            all_done.clear()
+            for _ in range(args.burst_size):
+                kind = rng.choices(list(mix), weights=list(mix.values()))[0]
+                update = Update.de_json(factory.build(kind), application.bot)
+                kinds[update.update_id] = kind
+                enqueued_at[update.update_id] = time.perf_counter()
+                pending.add(update.update_id)
+                await application.update_queue.put(update)
+            
+            await asyncio.wait_for(all_done.wait(), timeout=args.timeout)
+            if args.pause:
+                await asyncio.sleep(args.pause)
+        
+        elapsed = time.perf_counter() - run_started - args.pause * args.bursts
+    finally:
+        await application.bot_data['message_editor'].shutdown()
+        await application.stop()
+        await application.shutdown()
+        await asyncio.gather(*(location.cache_manager.shutdown() for location in locations))
+        await fake_api.stop()
+    
+    total = sum(len(values) for values in handler_latencies.values())
+    all_latencies = [value for values in handler_latencies.values() for value in values]
+    
+    sheets_calls = Counter()
+    for backend in backends:
+        sheets_calls.update(backend.calls)
+    
+    return {
+        'locations': len(locations),
+        'startup_seconds': round(startup_seconds, 3),
+        'updates': total,
+        'updates_per_second': round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        'handler_latency_ms': _summary(all_latencies),
+        'handler_latency_by_kind_ms': {kind: _summary(values) for kind, values in sorted(handler_latencies.items())},
+        'end_to_end_latency_ms': _summary(end_to_end),
+        'api_calls': dict(sorted(fake_api.calls.items())),
+        'message_edits': application.bot_data['message_editor'].stats,
+        'sheets_calls': dict(sorted(sheets_calls.items())),
+        'sheets_quota': limiter.usage if limiter else None
+    }
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'count': 0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(values),
+        'p50': round(statistics.median(values) * 1000, 3),
+        'p99': round(_percentile(values, 0.99) * 1000, 3),
+        'max': round(max(values) * 1000, 3)
+    }
+
+
+def _parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        if kind.strip() not in ('tasks', 'history', 'complete'):
+            raise ValueError(f"Unknown update kind: {kind}")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic Telegram traffic against the bot handlers")
+    parser.add_argument('--users', type=int, default=300, help="Employees in each synthetic spreadsheet")
+    parser.add_argument('--locations', type=int, default=1, help="Coffee shops served by one bot, each with its own spreadsheet")
+    parser.add_argument('--equipment', type=int, default=100, help="Equipment rows in the synthetic spreadsheet")
+    parser.add_argument('--bursts', type=int, default=5, help="Number of update bursts")
+    parser.add_argument('--burst-size', type=int, default=500, help="Updates per burst")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to wait between bursts")
+    parser.add_argument('--mix', default='tasks=5,history=1,complete=4', help="Relative weights of update kinds")
+    parser.add_argument('--concurrent-updates', type=int, default=1, help="Update workers; updates from one user stay in order")
+    parser.add_argument('--api-latency', type=float, default=0.0, help="Seconds the fake Bot API waits per request")
+    parser.add_argument('--sheets-latency', type=float, default=0.0, help="Seconds the in-memory backend waits per call")
+    parser.add_argument('--sheets-quota', type=int, default=0, help="Sheets requests per minute for the rate limiter, 0 disables it")
+    parser.add_argument('--edit-window', type=float, default=0.5, help="Seconds message edits are coalesced for")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Seconds to wait for a burst to drain")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Write the report to a JSON file")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.WARNING)
+    
+    report = asyncio.run(run_load(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from bot.cache_manager import CacheManager
+from bot.completion_history import CompletionHistory
+from bot.completion_journal import CompletionJournal
+from bot.handlers import _build_tasks_message
+from bot.identity_index import IdentityIndex
+from bot.members_manager import MembersManager
+from bot.mirror import SpreadsheetMirror
+from bot.schedule_index import ScheduleIndex
+from bot.storage import InMemoryBackend
+from bot.table_manager import TableManager
+from .synthetic import build_spreadsheet
+
+SCALES = {
+    '1x': {'employees': 5, 'equipment': 50},
+    '10x': {'employees': 50, 'equipment': 500},
+    '100x': {'employees': 500, 'equipment': 5000}
+}
+
+DEFAULT_BASELINE = Path(__file__).with_name('baseline.json')
+
+
+class Case:
+    def __init__(self, name: str, run: Callable, reset: Optional[Callable] = None):
+        self.name = name
+        self.run = run
+        self.reset = reset
+
+
+def build_cases(scale: Dict, workdir: Path):
+    now = datetime.now().replace(hour=10, minute=30, second=0, microsecond=0)
+    backend = InMemoryBackend(build_spreadsheet(scale['employees'], scale['equipment'], now))
+    
+    identity = IdentityIndex()
+    table_manager = TableManager('', 'benchmark', identity, backend)
+    table_manager.connect()
+    
+    cache_manager = CacheManager(
+        table_manager,
+        CompletionJournal(str(workdir / 'journal')),
+        SpreadsheetMirror(str(workdir / 'mirror')),
+        CompletionHistory(str(workdir / 'history'))
+    )
+    asyncio.run(cache_manager.refresh_from_sheets(force=True))
+    
+    members_manager = MembersManager(str(workdir / 'members'), identity=IdentityIndex())
+    employees = dict(table_manager.employees_cache)
+    usernames = [info['username'] for info in employees.values()]
+    
+    tasks = cache_manager.snapshot.tasks.tasks
+    due_tasks = cache_manager.get_tasks_for_date(now)
+    completed = {task.row_index: now for task in due_tasks[::3]}
+    shift = {'start_time': '08:00', 'end_time': '15:00'}
+    
+    days = [now + timedelta(days=offset) for offset in range(30)]
+    cursor = {'user': 0, 'day': 0}
+
+    def next_user() -> str:
+        cursor['user'] = (cursor['user'] + 1) % len(usernames)
+        return usernames[cursor['user']]
+
+    def next_day() -> datetime:
+        cursor['day'] = (cursor['day'] + 1) % len(days)
+        return days[cursor['day']]
+
+    def reset_schedule():
+        table_manager.schedule = ScheduleIndex()
+        table_manager._reads.forget()
+
+    def reset_reads():
+        table_manager._reads.forget()
+
+    def warm_schedule():
+        for day in days:
+            table_manager.get_shifts_for_date(day)
+
+    def reset_members():
+        members_manager.members = {}
+    
+    return backend, [
+        Case('get_equipment_tasks', table_manager.get_equipment_tasks, reset_reads),
+        Case('get_shifts_for_date[cold]', lambda: table_manager.get_shifts_for_date(next_day()), reset_schedule),
+        Case('get_shifts_for_date[warm]', lambda: table_manager.get_shifts_for_date(next_day()), warm_schedule),
+        Case('get_user_next_shift', lambda: table_manager.get_user_next_shift(next_user(), now)),
+        Case('CacheManager.get_tasks_for_date[today]', lambda: cache_manager.get_tasks_for_date(now)),
+        Case('CacheManager.get_tasks_for_date[other]', lambda: cache_manager.get_tasks_for_date(next_day())),
+        Case('CacheManager._should_clean_today', lambda: [cache_manager._should_clean_today(task, now) for task in tasks]),
+        Case('_build_tasks_message', lambda: _build_tasks_message(due_tasks, completed, shift, now, True)),
+        Case('MembersManager.sync_with_table', lambda: members_manager.sync_with_table(employees), reset_members)
+    ]
+
+
+def measure(case: Case, backend: InMemoryBackend, min_time: float, max_repeats: int) -> Dict:
+    if case.reset:
+        case.reset()
+    calls_before = sum(backend.calls.values())
+    case.run()
+    backend_calls = sum(backend.calls.values()) - calls_before
+    
+    if case.reset:
+        case.reset()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    case.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained_blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'lineno'))
+    
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < 3 or time.perf_counter() - started < min_time):
+        if case.reset:
+            case.reset()
+        call_started = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - call_started)
+    
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 4),
+        'min_ms': round(min(timings) * 1000, 4),
+        'repeats': len(timings),
+        'backend_calls': backend_calls,
+        'retained_blocks': retained_blocks,
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+
+def run(scales: List[str], min_time: float, max_repeats: int) -> Dict:
+    results = {}
+    
+    for scale_name in scales:
+        scale = SCALES[scale_name]
+        with tempfile.TemporaryDirectory() as workdir:
+            backend, cases = build_cases(scale, Path(workdir))
+            results[scale_name] = {}
+            
+            for case in cases:
+                results[scale_name][case.name] = measure(case, backend, min_time, max_repeats)
+                result = results[scale_name][case.name]
+                print(
+                    f"{scale_name:>5} {case.name:<36} {result['median_ms']:>10.3f} ms "
+                    f"{result['backend_calls']:>4} calls {result['retained_blocks']:>8} blocks "
+                    f"{result['peak_kib']:>10.1f} KiB"
+                )
+    
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, noise_floor_ms: float) -> List[str]:
+    regressions = []
+    
+    for scale_name, cases in results.items():
+        for case_name, result in cases.items():
+            expected = baseline.get(scale_name, {}).get(case_name)
+            if not expected:
+                continue
+            
+            label = f"{scale_name} {case_name}"
+            
+            limit_ms = expected['median_ms'] * (1 + tolerance)
+            if result['median_ms'] > limit_ms and result['median_ms'] - expected['median_ms'] > noise_floor_ms:
+                regressions.append(f"{label}: {result['median_ms']:.3f} ms vs baseline {expected['median_ms']:.3f} ms")
+            
+            if result['backend_calls'] > expected['backend_calls']:
+                regressions.append(f"{label}: {result['backend_calls']} backend calls vs baseline {expected['backend_calls']}")
+            
+            if result['retained_blocks'] > max(expected['retained_blocks'] * (1 + tolerance), expected['retained_blocks'] + 50):
+                regressions.append(f"{label}: {result['retained_blocks']} retained blocks vs baseline {expected['retained_blocks']}")
+    
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data layer against synthetic spreadsheets")
+    parser.add_argument('--scales', default=','.join(SCALES), help="Comma-separated scales to run (1x, 10x, 100x)")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite the baseline with this run")
+    parser.add_argument('--output', help="Write this run's results to a JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed relative slowdown before failing")
+    parser.add_argument('--noise-floor-ms', type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    parser.add_argument('--min-time', type=float, default=0.3, help="Seconds to spend timing each case")
+    parser.add_argument('--max-repeats', type=int, default=200, help="Upper bound on timed runs per case")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.WARNING)
+    
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    results = run(scales, args.min_time, args.max_repeats)
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    
+    baseline_file = Path(args.baseline)
+    
+    if args.save_baseline:
+        baseline_file.write_text(json.dumps(results, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        print(f"Saved baseline to {baseline_file}")
+        return
+    
+    if not baseline_file.exists():
+        print(f"No baseline at {baseline_file}, run with --save-baseline to create one")
+        return
+    
+    regressions = compare(results, json.loads(baseline_file.read_text(encoding='utf-8')), args.tolerance, args.noise_floor_ms)
+    
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    
+    print("\nNo regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
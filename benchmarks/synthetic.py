@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from bot.table_manager import TableManager
+from bot.table_setup import TableSetup
+
+SHIFTS = ['08-15', '15-22', '10-18', '09-21', 'в', 'в', 'в']
+PERIODS = ['1 день', '3 дня', '7 дней', '14 дней', '30 дней', '-']
+POSITIONS = ['Бариста', 'Бариста', 'Бариста', 'Управляющий', 'Повар']
+
+
+def month_keys(start: datetime, count: int = 12) -> List[Tuple[int, int]]:
+    keys = []
+    year, month = start.year, start.month
+    for _ in range(count):
+        keys.append((year, month))
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return keys
+
+
+def build_spreadsheet(employees: int, equipment: int, start: datetime, months: int = 12,
+                      seed: int = 42, username_prefix: str = 'user') -> Dict[str, List[List[str]]]:
+    rng = random.Random(seed)
+    
+    staff = [
+        (f"Сотрудник {index:04d}", f"{username_prefix}_{index:04d}", rng.choice(POSITIONS))
+        for index in range(employees)
+    ]
+    
+    sheets = {
+        "Сотрудники": [list(TableSetup.EMPLOYEES_HEADERS)] + [list(person) for person in staff],
+        "График чистки": [list(TableSetup.CLEANING_HEADERS)] + _equipment_rows(rng, equipment, start),
+        TableManager.HISTORY_SHEET: [list(TableSetup.HISTORY_HEADERS)]
+    }
+    
+    for year, month in month_keys(start, months):
+        title = f"{TableManager.MONTH_NAMES[month]} {str(year)[2:]}"
+        sheets[title] = _month_rows(rng, staff, year, month, title)
+    
+    return sheets
+
+
+def _equipment_rows(rng: random.Random, count: int, today: datetime) -> List[List[str]]:
+    rows = []
+    
+    for index in range(count):
+        period = rng.choice(PERIODS)
+        
+        if rng.random() < 0.2:
+            rows.append([f"Оборудование {index:05d}", period, '-', '-', '-', '⏳'])
+            continue
+        
+        last_cleaned = today - timedelta(days=rng.randint(0, 40))
+        period_days = int(period.split()[0]) if period != '-' else None
+        next_cleaning = (last_cleaned + timedelta(days=period_days)).strftime("%d.%m.%Y") if period_days else '-'
+        status = '✅' if last_cleaned.date() == today.date() else '⏳'
+        
+        rows.append([
+            f"Оборудование {index:05d}",
+            period,
+            last_cleaned.strftime("%d.%m.%Y"),
+            next_cleaning,
+            rng.choice(['Сотрудник 0000', 'Сотрудник 0001', '-']),
+            status
+        ])
+    
+    return rows
+
+
+def _month_rows(rng: random.Random, staff: List[Tuple[str, str, str]], year: int, month: int,
+                title: str) -> List[List[str]]:
+    next_month = datetime(year + month // 12, month % 12 + 1, 1)
+    days_in_month = (next_month - timedelta(days=1)).day
+    rows = [[title.split()[0]]]
+    
+    for first_day, last_day in ((1, 15), (16, days_in_month)):
+        days = range(first_day, last_day + 1)
+        rows.append(['', ''] + [TableManager.WEEKDAYS[datetime(year, month, day).weekday()] for day in days])
+        rows.append(['ФИО', 'Должность'] + [str(day) for day in days])
+        
+        for name, _, position in staff:
+            rows.append([name, position] + [rng.choice(SHIFTS) for _ in days])
+    
+    return rows
@@ -0,0 +1,100 @@
+import asyncio
+from typing import List, Dict, Optional
+import logging
+import httpx
+from urllib.parse import quote
+from google.auth.transport.requests import Request
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsAPIError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+
+
+class AsyncSheetsClient:
+    SHEETS_URL = 'https://sheets.googleapis.com/v4/spreadsheets'
+    DRIVE_URL = 'https://www.googleapis.com/drive/v3/files'
+
+    def __init__(self, credentials, max_connections: int = 10, max_concurrency: int = 8, timeout: float = 30.0,
+                 limiter=None):
+        self.credentials = credentials
+        self.limiter = limiter
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=120
+            ),
+            timeout=timeout
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._token_lock = asyncio.Lock()
+
+    async def values_batch_get(self, spreadsheet_id: str, ranges: List[str], params: Optional[Dict] = None) -> Dict:
+        query = [('ranges', cell_range) for cell_range in ranges]
+        query.extend((params or {}).items())
+        return await self._request('GET', f"{self.SHEETS_URL}/{spreadsheet_id}/values:batchGet", params=query)
+
+    async def values_batch_update(self, spreadsheet_id: str, body: Dict) -> Dict:
+        return await self._request('POST', f"{self.SHEETS_URL}/{spreadsheet_id}/values:batchUpdate", json=body)
+
+    async def values_append(self, spreadsheet_id: str, cell_range: str, values: List[List],
+                            value_input_option: str = 'RAW') -> Dict:
+        return await self._request(
+            'POST',
+            f"{self.SHEETS_URL}/{spreadsheet_id}/values/{quote(cell_range, safe='')}:append",
+            params={'valueInputOption': value_input_option, 'insertDataOption': 'INSERT_ROWS'},
+            json={'values': values}
+        )
+
+    async def get_sheet_titles(self, spreadsheet_id: str) -> List[str]:
+        metadata = await self._request(
+            'GET',
+            f"{self.SHEETS_URL}/{spreadsheet_id}",
+            params={'fields': 'sheets.properties.title'}
+        )
+        return [sheet['properties']['title'] for sheet in metadata.get('sheets', [])]
+
+    async def get_last_update_time(self, spreadsheet_id: str) -> str:
+        metadata = await self._request(
+            'GET',
+            f"{self.DRIVE_URL}/{spreadsheet_id}",
+            params={'fields': 'modifiedTime', 'supportsAllDrives': 'true'}
+        )
+        return metadata['modifiedTime']
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def _request(self, method: str, url: str, **kwargs) -> Dict:
+        if self.limiter:
+            return await self.limiter.run_async(lambda: self._send(method, url, **kwargs))
+        return await self._send(method, url, **kwargs)
+
+    async def _send(self, method: str, url: str, **kwargs) -> Dict:
+        headers = await self._auth_headers()
+        
+        async with self._semaphore:
+            response = await self._http.request(method, url, headers=headers, **kwargs)
+        
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('error', {}).get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise SheetsAPIError(response.status_code, message)
+        
+        return response.json()
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        if not self.credentials.valid:
+            async with self._token_lock:
+                if not self.credentials.valid:
+                    await asyncio.to_thread(self.credentials.refresh, Request())
+                    logger.info("Refreshed Google API access token")
+        
+        return {'Authorization': f"Bearer {self.credentials.token}"}
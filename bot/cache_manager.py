@@ -1,151 +1,368 @@
 import asyncio
+import time
 from datetime import datetime, date
 from typing import List, Dict, Optional
 import logging
+import pytz
+from .task_index import TaskRecord, TaskIndex
+from .day_snapshot import DaySnapshot
+from .write_queue import CompletionWriteQueue
+from .completion_journal import CompletionJournal
+from .mirror import SpreadsheetMirror
+from .completion_history import CompletionHistory
+from .metrics import CACHE_LOOKUPS
 
 logger = logging.getLogger(__name__)
 
 
 class CacheManager:
-    def __init__(self, table_manager):
+    MAX_UNCHANGED_AGE_SECONDS = 3600
+    SHIFT_BOUNDARY_WINDOW_MINUTES = 60
+    WORKDAY_MARGIN_MINUTES = 90
+    
+    def __init__(self, table_manager, journal: Optional[CompletionJournal] = None,
+                 mirror: Optional[SpreadsheetMirror] = None, history: Optional[CompletionHistory] = None,
+                 timezone_str: str = 'UTC'):
         self.table_manager = table_manager
+        self.journal = journal if journal is not None else CompletionJournal()
+        self.mirror = mirror if mirror is not None else SpreadsheetMirror()
+        self.history = history if history is not None else CompletionHistory()
+        self.tz = pytz.timezone(timezone_str)
+        self.snapshot = DaySnapshot.empty()
+        self.next_snapshot: Optional[DaySnapshot] = None
+        self.version = 0
         self.cache = {
-            'date': None,
-            'tasks': [],
-            'shifts_today': [],
-            'completed_local': {},
-            'last_sheets_sync': None
+            'last_sheets_sync': None,
+            'modified_time': None,
+            'stale': False
         }
+        self._journal_replayed = False
+        self._history_imported = False
         self._sync_lock = asyncio.Lock()
+        self.write_queue = CompletionWriteQueue(table_manager, self.journal)
     
     async def initialize(self):
-        await self.refresh_from_sheets()
-    
-    async def refresh_from_sheets(self):
-        async with self._sync_lock:
-            try:
-                now = datetime.now()
-                today = now.date()
-                
-                logger.info(f"Refreshing cache from Google Sheets for {today}")
-                
-                tasks = await asyncio.to_thread(self.table_manager.get_equipment_tasks)
-                shifts = await asyncio.to_thread(self.table_manager.get_today_shifts, now)
-                
-                self.cache['date'] = today
-                self.cache['tasks'] = tasks
-                self.cache['shifts_today'] = shifts
-                self.cache['completed_local'] = {}
-                self.cache['last_sheets_sync'] = now
-                
-                logger.info(f"Cache refreshed: {len(tasks)} tasks, {len(shifts)} shifts")
-                
-            except Exception as e:
-                logger.error(f"Error refreshing cache: {e}")
-    
-    def invalidate_if_date_changed(self):
-        today = date.today()
-        if self.cache['date'] != today:
-            logger.info(f"Date changed from {self.cache['date']} to {today}, invalidating cache")
-            self.cache['date'] = today
-            self.cache['tasks'] = []
-            self.cache['shifts_today'] = []
-            self.cache['completed_local'] = {}
-            return True
-        return False
-    
-    def get_tasks_for_user(self, username: str, now: datetime) -> List[Dict]:
-        self.invalidate_if_date_changed()
+        self.write_queue.start()
         
-        if not self.cache['tasks']:
-            return []
+        if await self._load_mirror():
+            return
         
-        today = now
-        tasks_today = []
+        await self.refresh_from_sheets(force=True)
+    
+    async def _load_mirror(self) -> bool:
+        try:
+            mirrored = await asyncio.to_thread(self.mirror.load)
+        except Exception as e:
+            logger.error(f"Error loading spreadsheet mirror: {e}")
+            return False
         
-        for task in self.cache['tasks']:
-            if self._should_clean_today(task, today):
-                task_copy = task.copy()
-                
-                if username in self.cache['completed_local']:
-                    if task['row_index'] in self.cache['completed_local'][username]:
-                        task_copy['status'] = '✅'
-                        task_copy['completed_at'] = self.cache['completed_local'][username][task['row_index']]
-                
-                tasks_today.append(task_copy)
+        if not mirrored:
+            return False
         
-        return tasks_today
-    
-    def get_shift_for_user(self, username: str) -> Optional[Dict]:
-        self.invalidate_if_date_changed()
+        now = self.now()
+        today = now.date()
+        
+        self.table_manager.restore_snapshot(mirrored['employees'], mirrored['schedule'])
+        shifts = mirrored['schedule'].shifts_on(today) or []
         
-        for shift in self.cache['shifts_today']:
-            if shift['username'].lower() == username.lower():
-                return shift
+        self.snapshot = DaySnapshot(
+            today,
+            TaskIndex(mirrored['tasks']),
+            shifts,
+            self._merge_local_completions(today, time.monotonic())
+        )
+        self.version += 1
+        self.cache['last_sheets_sync'] = mirrored['synced_at']
+        self.cache['modified_time'] = mirrored['modified_time']
+        self.cache['stale'] = True
         
-        return None
+        logger.info(
+            f"Serving {len(mirrored['tasks'])} tasks and {len(shifts)} shifts from local mirror "
+            f"synced at {mirrored['synced_at']}, revalidating in background"
+        )
+        return True
     
-    def mark_completed_local(self, row_index: int, username: str, completed_at: datetime):
-        if username not in self.cache['completed_local']:
-            self.cache['completed_local'][username] = {}
+    @property
+    def is_stale(self) -> bool:
+        return self.cache['stale']
+    
+    def now(self) -> datetime:
+        return datetime.now(self.tz).replace(tzinfo=None)
+    
+    def cache_age_seconds(self) -> Optional[float]:
+        if not self.cache['last_sheets_sync']:
+            return None
+        return (self.now() - self.cache['last_sheets_sync']).total_seconds()
+    
+    def last_sync_timestamp(self) -> Optional[float]:
+        if not self.cache['last_sheets_sync']:
+            return None
+        return self.tz.localize(self.cache['last_sheets_sync']).timestamp()
+    
+    async def refresh_from_sheets(self, force: bool = False) -> bool:
+        async with self._sync_lock:
+            refreshed = await self._refresh(force)
         
-        self.cache['completed_local'][username][row_index] = completed_at
-        logger.info(f"Marked task {row_index} as completed locally by {username}")
+        if not self.cache['stale']:
+            if not self._journal_replayed:
+                self._journal_replayed = True
+                await self._replay_journal()
+            
+            if not self._history_imported:
+                self._history_imported = await self._import_history()
+            
+            await self._export_history()
+        
+        return refreshed
     
-    async def sync_to_sheets(self, row_index: int, completed_by: str, completed_at: datetime, period_str: str):
+    async def _refresh(self, force: bool) -> bool:
         try:
-            success = await asyncio.to_thread(
-                self.table_manager.mark_task_completed,
-                row_index,
-                completed_by,
-                completed_at,
-                period_str
+            now = self.now()
+            today = now.date()
+            
+            if not self.table_manager.is_connected:
+                await asyncio.to_thread(self.table_manager.connect)
+            
+            modified_time = await self.table_manager.get_last_update_time_async()
+            
+            if not force and self._is_unchanged(modified_time, now):
+                logger.info(f"Spreadsheet unchanged since {modified_time}, skipping refresh")
+                self.cache['stale'] = False
+                return False
+            
+            logger.info(f"Refreshing cache from Google Sheets for {today}")
+            
+            fetch_started = time.monotonic()
+            fetched = await self.table_manager.fetch_snapshot_async(now)
+            shifts = fetched['shifts_today']
+            
+            self.snapshot = DaySnapshot(
+                today,
+                TaskIndex(fetched['tasks']),
+                shifts,
+                self._merge_local_completions(today, fetch_started)
             )
             
-            if success:
-                logger.info(f"Successfully synced task {row_index} to Google Sheets")
-            else:
-                logger.error(f"Failed to sync task {row_index} to Google Sheets")
+            next_snapshot = self.next_snapshot
+            if next_snapshot is not None:
+                self.next_snapshot = self._build_day(next_snapshot.date) if next_snapshot.date > today else None
+            
+            self.version += 1
+            self.cache['last_sheets_sync'] = now
+            self.cache['modified_time'] = modified_time
+            self.cache['stale'] = False
             
-            return success
+            logger.info(f"Cache refreshed: {len(fetched['tasks'])} tasks, {len(shifts)} shifts")
             
         except Exception as e:
-            logger.error(f"Error syncing to sheets: {e}")
+            logger.error(f"Error refreshing cache: {e}")
+            self.cache['stale'] = True
+            if self.cache['last_sheets_sync']:
+                logger.warning(f"Serving stale data from {self.cache['last_sheets_sync']}")
             return False
+        
+        await self._save_mirror(fetched['tasks'], now, modified_time)
+        return True
     
-    def _should_clean_today(self, task: Dict, today: datetime) -> bool:
-        if task.get('status') == '✅':
-            last_cleaned_str = task.get('last_cleaned', '')
-            if last_cleaned_str and last_cleaned_str != '-':
-                try:
-                    last_cleaned = datetime.strptime(last_cleaned_str, "%d.%m.%Y")
-                    if last_cleaned.date() == today.date():
-                        return False
-                except ValueError:
-                    pass
+    async def prepare_next_day(self, day: date):
+        await self.refresh_from_sheets()
+        
+        async with self._sync_lock:
+            self.next_snapshot = self._build_day(day)
+            self.version += 1
+        
+        logger.info(
+            f"Prepared snapshot for {day}: {len(self.next_snapshot.shifts)} shifts, "
+            f"{len(self.next_snapshot.due)} tasks due"
+        )
+    
+    def roll_over(self, day: date) -> bool:
+        current = self.snapshot
+        if current.date is not None and current.date >= day:
+            return False
+        
+        snapshot = self.next_snapshot
+        if snapshot is None or snapshot.date != day:
+            logger.warning(f"No snapshot prepared for {day}, building one from cached data")
+            snapshot = self._build_day(day)
+        
+        self.snapshot = snapshot
+        self.next_snapshot = None
+        self.version += 1
+        logger.info(f"Rolled over from {current.date} to {day}: {len(snapshot.shifts)} shifts")
+        return True
+    
+    def _build_day(self, day: date) -> DaySnapshot:
+        return self.snapshot.for_day(day, self.table_manager.schedule.shifts_on(day))
+    
+    async def _save_mirror(self, tasks: List[TaskRecord], now: datetime, modified_time: Optional[str]):
+        try:
+            await asyncio.to_thread(
+                self.mirror.save,
+                self.table_manager.employees_cache,
+                tasks,
+                self.table_manager.schedule,
+                now,
+                modified_time
+            )
+        except Exception as e:
+            logger.error(f"Error saving spreadsheet mirror: {e}")
+    
+    def _merge_local_completions(self, today: date, fetch_started: float) -> Dict[str, Dict[int, datetime]]:
+        completed_local = {}
+        
+        for entry in self.journal.visible_since(fetch_started):
+            if entry['completed_at'].date() == today:
+                completed_local.setdefault(entry['username'], {})[entry['row_index']] = entry['completed_at']
+        
+        self.journal.forget_confirmed_before(fetch_started)
+        return completed_local
+    
+    async def _replay_journal(self):
+        entries = sorted(self.journal.pending.values(), key=lambda entry: entry['completed_at'])
+        if not entries:
+            return
         
-        next_cleaning_str = task.get('next_cleaning', '')
+        tasks_by_row = {task.row_index: task for task in self.snapshot.tasks.tasks}
+        confirmed = []
+        replayed = 0
         
-        if not next_cleaning_str or next_cleaning_str == '-':
-            last_cleaned_str = task.get('last_cleaned', '')
-            period_str = task.get('period', '')
+        for entry in entries:
+            task = tasks_by_row.get(entry['row_index'])
+            remote_ordinal = task.last_cleaned_ordinal if task else None
+            
+            if remote_ordinal is not None and remote_ordinal >= entry['completed_at'].toordinal():
+                confirmed.append(entry['id'])
+                continue
             
-            if not last_cleaned_str or last_cleaned_str == '-':
+            self.write_queue.enqueue(
+                entry['row_index'], entry['completed_by'], entry['completed_at'], entry['period'], entry['id']
+            )
+            replayed += 1
+        
+        await self.journal.confirm(confirmed)
+        logger.info(f"Journal replay: {len(confirmed)} completions already in Google Sheets, {replayed} requeued")
+    
+    async def _import_history(self) -> bool:
+        try:
+            if await asyncio.to_thread(self.history.is_imported):
                 return True
             
-            period_days = self.table_manager._parse_period_days(period_str)
-            if not period_days:
+            entries = await asyncio.to_thread(self.table_manager.get_completion_log)
+            if entries is None:
                 return False
             
-            try:
-                last_cleaned = datetime.strptime(last_cleaned_str, "%d.%m.%Y")
-                days_passed = (today - last_cleaned).days
-                return days_passed >= period_days
-            except ValueError:
-                return True
+            await asyncio.to_thread(self.history.import_entries, entries)
+            return True
+        except Exception as e:
+            logger.error(f"Error importing completion history: {e}")
+            return False
+    
+    async def _export_history(self):
+        try:
+            entries = await asyncio.to_thread(self.history.unexported)
+            if entries and await self.table_manager.append_completion_log_async(entries):
+                await asyncio.to_thread(self.history.mark_exported, [entry['id'] for entry in entries])
+        except Exception as e:
+            logger.error(f"Error exporting completion history: {e}")
+    
+    def _is_unchanged(self, modified_time: Optional[str], now: datetime) -> bool:
+        if not modified_time or modified_time != self.cache['modified_time']:
+            return False
+        
+        if self.snapshot.date != now.date() or not self.cache['last_sheets_sync']:
+            return False
+        
+        return (now - self.cache['last_sheets_sync']).total_seconds() < self.MAX_UNCHANGED_AGE_SECONDS
+    
+    def get_refresh_interval(self, now: datetime, fast: int, normal: int, slow: int) -> int:
+        minute_of_day = now.hour * 60 + now.minute
+        boundaries = []
+        
+        for shift in self.snapshot.shifts:
+            for time_str in (shift['start_time'], shift['end_time']):
+                try:
+                    parsed = datetime.strptime(time_str, "%H:%M")
+                    boundaries.append(parsed.hour * 60 + parsed.minute)
+                except (TypeError, ValueError):
+                    continue
+        
+        if not boundaries:
+            interval = slow
+        elif any(abs(boundary - minute_of_day) <= self.SHIFT_BOUNDARY_WINDOW_MINUTES for boundary in boundaries):
+            interval = fast
+        elif min(boundaries) - self.WORKDAY_MARGIN_MINUTES <= minute_of_day <= max(boundaries):
+            interval = normal
+        else:
+            interval = slow
+        
+        seconds_to_midnight = (24 * 60 - minute_of_day) * 60 - now.second
+        return max(fast, min(interval, seconds_to_midnight + 60))
+    
+    def _record_lookup(self, lookup: str, hit: bool):
+        CACHE_LOOKUPS.inc(lookup, 'hit' if hit else 'miss')
+    
+    def get_tasks_for_date(self, day: datetime) -> List[TaskRecord]:
+        snapshot = self.snapshot
+        self._record_lookup('tasks_for_date', snapshot.loaded)
+        
+        day_ordinal = day.toordinal()
+        for prepared in (snapshot, self.next_snapshot):
+            if prepared is not None and prepared.date is not None and prepared.date.toordinal() == day_ordinal:
+                return prepared.due
+        return snapshot.tasks.due_on(day_ordinal)
+    
+    def get_completed_for_user(self, username: str) -> Dict[int, datetime]:
+        return self.snapshot.completed.get(username, {})
+    
+    def get_shifts_for_date(self, day: date) -> List[Dict]:
+        for snapshot in (self.snapshot, self.next_snapshot):
+            if snapshot is not None and snapshot.date == day:
+                self._record_lookup('shifts_for_date', snapshot.loaded)
+                return snapshot.shifts
+        
+        shifts = self.table_manager.schedule.shifts_on(day)
+        self._record_lookup('shifts_for_date', shifts is not None)
+        return shifts or []
+    
+    def get_shift_for_user(self, username: str) -> Optional[Dict]:
+        snapshot = self.snapshot
+        self._record_lookup('shift_for_user', snapshot.loaded)
+        
+        employee = self.table_manager.identity.get(username=username)
+        if not employee:
+            return None
+        
+        return snapshot.shifts_by_name.get(employee.name)
+    
+    def mark_completed_local(self, row_index: int, username: str, completed_at: datetime):
+        self.snapshot = self.snapshot.with_completion(username, row_index, completed_at)
+        logger.info(f"Marked task {row_index} as completed locally by {username}")
+    
+    async def record_completion(self, row_index: int, username: str, completed_by: str,
+                                completed_at: datetime, period_str: str, task_name: str = ''):
+        journal_id = None
+        try:
+            journal_id = await self.journal.append(row_index, username, completed_by, completed_at, period_str)
+        except Exception as e:
+            logger.error(f"Error writing completion of row {row_index} to journal: {e}")
         
         try:
-            next_cleaning = datetime.strptime(next_cleaning_str, "%d.%m.%Y")
-            return next_cleaning.date() <= today.date()
-        except ValueError:
-            return False
\ No newline at end of file
+            await asyncio.to_thread(self.history.record, username, completed_by, row_index, task_name, completed_at)
+        except Exception as e:
+            logger.error(f"Error writing completion of row {row_index} to history: {e}")
+        
+        self.mark_completed_local(row_index, username, completed_at)
+        self.write_queue.enqueue(row_index, completed_by, completed_at, period_str, journal_id)
+    
+    @property
+    def pending_writes(self) -> int:
+        return self.write_queue.depth
+    
+    async def shutdown(self):
+        await self.write_queue.drain()
+        if self.table_manager.is_connected:
+            await self._export_history()
+    
+    def _should_clean_today(self, task: TaskRecord, today: datetime) -> bool:
+        return task.is_due(today.toordinal())
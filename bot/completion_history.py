@@ -0,0 +1,161 @@
+import sqlite3
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionHistory:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS completions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            completed_at TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            completed_by TEXT NOT NULL,
+            row_index INTEGER NOT NULL,
+            task_name TEXT NOT NULL,
+            exported INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS completions_by_user_day ON completions (username, day);
+        CREATE INDEX IF NOT EXISTS completions_by_day ON completions (day);
+        CREATE INDEX IF NOT EXISTS completions_unexported ON completions (id) WHERE exported = 0;
+        CREATE TABLE IF NOT EXISTS markers (
+            name TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL
+        );
+    """
+    SHEET_IMPORT_MARKER = 'sheet_history_imported'
+
+    def __init__(self, config_dir: str = 'configs'):
+        self.config_dir = Path(config_dir)
+        self.db_file = self.config_dir / 'history.sqlite3'
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def record(self, username: str, completed_by: str, row_index: int, task_name: str,
+               completed_at: datetime) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    'INSERT INTO completions (completed_at, day, username, completed_by, row_index, task_name) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (completed_at.isoformat(), completed_at.toordinal(), username.lower(),
+                     completed_by, row_index, task_name)
+                )
+                return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def is_imported(self) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute(
+                'SELECT 1 FROM markers WHERE name = ?', (self.SHEET_IMPORT_MARKER,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+
+    def page_for_user(self, username: str, since: date, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        conn = self._connect()
+        try:
+            params = (username.lower(), since.toordinal())
+            total = conn.execute(
+                'SELECT COUNT(*) FROM completions WHERE username = ? AND day >= ?', params
+            ).fetchone()[0]
+            rows = conn.execute(
+                'SELECT completed_at, completed_by, row_index, task_name FROM completions '
+                'WHERE username = ? AND day >= ? ORDER BY day DESC, completed_at DESC, id DESC LIMIT ? OFFSET ?',
+                params + (limit, offset)
+            ).fetchall()
+        finally:
+            conn.close()
+        
+        entries = [
+            {
+                'completed_at': datetime.fromisoformat(completed_at),
+                'completed_by': completed_by,
+                'row_index': row_index,
+                'name': task_name
+            }
+            for completed_at, completed_by, row_index, task_name in rows
+        ]
+        return entries, total
+
+    def unexported(self, limit: int = 500) -> List[Dict]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT id, completed_at, username, completed_by, row_index, task_name FROM completions '
+                'WHERE exported = 0 ORDER BY id LIMIT ?',
+                (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        
+        return [
+            {
+                'id': entry_id,
+                'completed_at': datetime.fromisoformat(completed_at),
+                'username': username,
+                'completed_by': completed_by,
+                'row_index': row_index,
+                'name': task_name
+            }
+            for entry_id, completed_at, username, completed_by, row_index, task_name in rows
+        ]
+
+    def mark_exported(self, ids: List[int]):
+        if not ids:
+            return
+        
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('UPDATE completions SET exported = 1 WHERE id = ?', [(entry_id,) for entry_id in ids])
+        finally:
+            conn.close()
+
+    def import_entries(self, entries: List[Dict]) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                known = {
+                    (username, row_index, completed_at[:16])
+                    for username, row_index, completed_at in conn.execute(
+                        'SELECT username, row_index, completed_at FROM completions'
+                    )
+                }
+                rows = [
+                    (entry['completed_at'].isoformat(), entry['completed_at'].toordinal(), entry['username'].lower(),
+                     entry['completed_by'], entry['row_index'], entry['name'])
+                    for entry in entries
+                    if (entry['username'].lower(), entry['row_index'], entry['completed_at'].isoformat()[:16]) not in known
+                ]
+                conn.executemany(
+                    'INSERT INTO completions (completed_at, day, username, completed_by, row_index, task_name, exported) '
+                    'VALUES (?, ?, ?, ?, ?, ?, 1)',
+                    rows
+                )
+                conn.execute(
+                    'INSERT OR REPLACE INTO markers (name, created_at) VALUES (?, ?)',
+                    (self.SHEET_IMPORT_MARKER, datetime.now().isoformat())
+                )
+        finally:
+            conn.close()
+        
+        logger.info(f"Imported {len(rows)} of {len(entries)} sheet completions into local history")
+        return len(rows)
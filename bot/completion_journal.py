@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionJournal:
+    COMPACT_AFTER_RECORDS = 1000
+
+    def __init__(self, config_dir: str = 'configs', commit_window: float = 0.01):
+        self.config_dir = Path(config_dir)
+        self.journal_file = self.config_dir / 'completions.journal'
+        self.commit_window = commit_window
+        self.pending: Dict[str, Dict] = {}
+        self._confirmed_at: Dict[str, tuple] = {}
+        self._buffer: List[str] = []
+        self._commit_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._records_since_compaction = 0
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._compact()
+
+    def _load(self):
+        if not self.journal_file.exists():
+            return
+        
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping torn journal record at line {line_number}")
+                        continue
+                    
+                    if record['op'] == 'done':
+                        self.pending[record['id']] = _decode_entry(record)
+                    elif record['op'] == 'ack':
+                        self.pending.pop(record['id'], None)
+            
+            if self.pending:
+                logger.info(f"Loaded {len(self.pending)} unconfirmed completions from journal")
+        except Exception as e:
+            logger.error(f"Error loading completion journal: {e}")
+
+    def _compact(self):
+        try:
+            tmp_file = self.journal_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for entry in self.pending.values():
+                    f.write(_encode_record('done', entry))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.journal_file)
+            self._records_since_compaction = 0
+        except Exception as e:
+            logger.error(f"Error compacting completion journal: {e}")
+
+    async def append(self, row_index: int, username: str, completed_by: str,
+                     completed_at: datetime, period: str) -> str:
+        entry = {
+            'id': uuid.uuid4().hex,
+            'row_index': row_index,
+            'username': username,
+            'completed_by': completed_by,
+            'completed_at': completed_at,
+            'period': period
+        }
+        self.pending[entry['id']] = entry
+        await self._commit(_encode_record('done', entry))
+        return entry['id']
+
+    async def confirm(self, entry_ids: Iterable[str]):
+        now = time.monotonic()
+        lines = []
+        
+        for entry_id in entry_ids:
+            entry = self.pending.pop(entry_id, None)
+            if entry is None:
+                continue
+            self._confirmed_at[entry_id] = (now, entry)
+            lines.append(_encode_record('ack', {'id': entry_id}))
+        
+        if lines:
+            await self._commit(*lines)
+        
+        if not self.pending and self._records_since_compaction >= self.COMPACT_AFTER_RECORDS:
+            async with self._write_lock:
+                await asyncio.to_thread(self._compact)
+
+    def visible_since(self, since: float) -> List[Dict]:
+        entries = list(self.pending.values())
+        entries.extend(entry for confirmed_at, entry in self._confirmed_at.values() if confirmed_at >= since)
+        return entries
+
+    def forget_confirmed_before(self, before: float):
+        self._confirmed_at = {
+            entry_id: value for entry_id, value in self._confirmed_at.items()
+            if value[0] >= before
+        }
+
+    async def _commit(self, *lines: str):
+        self._buffer.extend(lines)
+        
+        if self._commit_task is None:
+            self._commit_task = asyncio.create_task(self._flush())
+        
+        await asyncio.shield(self._commit_task)
+
+    async def _flush(self):
+        await asyncio.sleep(self.commit_window)
+        
+        lines, self._buffer = self._buffer, []
+        self._commit_task = None
+        
+        async with self._write_lock:
+            await asyncio.to_thread(self._write_lines, lines)
+        
+        self._records_since_compaction += len(lines)
+
+    def _write_lines(self, lines: List[str]):
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _encode_record(op: str, entry: Dict) -> str:
+    record = {'op': op}
+    for key, value in entry.items():
+        record[key] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _decode_entry(record: Dict) -> Dict:
+    entry = {key: value for key, value in record.items() if key != 'op'}
+    entry['completed_at'] = datetime.fromisoformat(entry['completed_at'])
+    return entry
@@ -12,6 +12,27 @@ class Config:
     timezone: str
     manager_chat_id: Optional[int] = None
     admin_user_id: Optional[int] = None
+    refresh_interval_fast: int = 60
+    refresh_interval_normal: int = 300
+    refresh_interval_slow: int = 1800
+    metrics_host: str = '127.0.0.1'
+    metrics_port: int = 9100
+    max_cache_age_seconds: int = 3600
+    storage_backend: str = 'gspread'
+    storage_file: str = 'configs/spreadsheet.json'
+    update_mode: str = 'polling'
+    update_workers: int = 8
+    webhook_url: str = ''
+    webhook_listen: str = '0.0.0.0'
+    webhook_port: int = 8443
+    webhook_path: str = 'telegram'
+    webhook_secret: str = ''
+    edit_coalesce_seconds: float = 0.5
+    sheets_requests_per_minute: int = 60
+    rollover_prepare_minutes: int = 10
+    locations_file: str = ''
+    refresh_stagger_seconds: int = 60
+    sheets_max_connections: int = 10
 
     @classmethod
     def from_env(cls) -> 'Config':
@@ -22,12 +43,43 @@ class Config:
             notification_offset_minutes=int(os.getenv('NOTIFICATION_OFFSET_MINUTES', '30')),
             timezone=os.getenv('TIMEZONE', 'Europe/Moscow'),
             manager_chat_id=int(os.getenv('MANAGER_CHAT_ID')) if os.getenv('MANAGER_CHAT_ID') else None,
-            admin_user_id=int(os.getenv('ADMIN_USER_ID')) if os.getenv('ADMIN_USER_ID') else None
+            admin_user_id=int(os.getenv('ADMIN_USER_ID')) if os.getenv('ADMIN_USER_ID') else None,
+            refresh_interval_fast=int(os.getenv('REFRESH_INTERVAL_FAST', '60')),
+            refresh_interval_normal=int(os.getenv('REFRESH_INTERVAL_NORMAL', '300')),
+            refresh_interval_slow=int(os.getenv('REFRESH_INTERVAL_SLOW', '1800')),
+            metrics_host=os.getenv('METRICS_HOST', '127.0.0.1'),
+            metrics_port=int(os.getenv('METRICS_PORT', '9100')),
+            max_cache_age_seconds=int(os.getenv('MAX_CACHE_AGE_SECONDS', '3600')),
+            storage_backend=os.getenv('STORAGE_BACKEND', 'gspread'),
+            storage_file=os.getenv('STORAGE_FILE', 'configs/spreadsheet.json'),
+            update_mode=os.getenv('UPDATE_MODE', 'polling'),
+            update_workers=int(os.getenv('UPDATE_WORKERS', '8')),
+            webhook_url=os.getenv('WEBHOOK_URL', ''),
+            webhook_listen=os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+            webhook_port=int(os.getenv('WEBHOOK_PORT', '8443')),
+            webhook_path=os.getenv('WEBHOOK_PATH', 'telegram'),
+            webhook_secret=os.getenv('WEBHOOK_SECRET', ''),
+            edit_coalesce_seconds=float(os.getenv('EDIT_COALESCE_SECONDS', '0.5')),
+            sheets_requests_per_minute=int(os.getenv('SHEETS_REQUESTS_PER_MINUTE', '60')),
+            rollover_prepare_minutes=int(os.getenv('ROLLOVER_PREPARE_MINUTES', '10')),
+            locations_file=os.getenv('LOCATIONS_FILE', ''),
+            refresh_stagger_seconds=int(os.getenv('REFRESH_STAGGER_SECONDS', '60')),
+            sheets_max_connections=int(os.getenv('SHEETS_MAX_CONNECTIONS', '10'))
         )
 
     def validate(self) -> bool:
         if not self.telegram_token:
             raise ValueError("TELEGRAM_BOT_TOKEN not set")
-        if not self.google_sheets_id:
+        if self.storage_backend not in ('gspread', 'memory'):
+            raise ValueError(f"Unknown STORAGE_BACKEND: {self.storage_backend}")
+        if self.storage_backend == 'gspread' and not self.google_sheets_id and not self.locations_file:
             raise ValueError("GOOGLE_SHEETS_ID not set")
+        if self.update_mode not in ('polling', 'webhook'):
+            raise ValueError(f"Unknown UPDATE_MODE: {self.update_mode}")
+        if self.update_mode == 'webhook' and not self.webhook_url:
+            raise ValueError("WEBHOOK_URL not set")
+        if self.update_workers < 1:
+            raise ValueError("UPDATE_WORKERS must be at least 1")
+        if not 0 <= self.refresh_stagger_seconds < self.rollover_prepare_minutes * 60:
+            raise ValueError("REFRESH_STAGGER_SECONDS must be shorter than ROLLOVER_PREPARE_MINUTES")
         return True
\ No newline at end of file
@@ -0,0 +1,41 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from .task_index import TaskIndex
+
+
+class DaySnapshot:
+    __slots__ = ('date', 'tasks', 'due', 'shifts', 'shifts_by_name', 'completed', 'loaded')
+
+    def __init__(self, day: Optional[date], tasks: TaskIndex, shifts: List[Dict],
+                 completed: Optional[Dict[str, Dict[int, datetime]]] = None, loaded: bool = True):
+        shifts_by_name = {}
+        for shift in shifts:
+            shifts_by_name.setdefault(shift['name'], shift)
+        
+        object.__setattr__(self, 'date', day)
+        object.__setattr__(self, 'tasks', tasks)
+        object.__setattr__(self, 'due', tasks.due_on(day.toordinal()) if day else [])
+        object.__setattr__(self, 'shifts', shifts)
+        object.__setattr__(self, 'shifts_by_name', shifts_by_name)
+        object.__setattr__(self, 'completed', completed if completed is not None else {})
+        object.__setattr__(self, 'loaded', loaded)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"DaySnapshot is immutable, cannot set {name}")
+
+    @classmethod
+    def empty(cls) -> 'DaySnapshot':
+        return cls(None, TaskIndex([]), [], loaded=False)
+
+    def for_day(self, day: date, shifts: Optional[List[Dict]]) -> 'DaySnapshot':
+        return DaySnapshot(day, self.tasks, shifts or [], loaded=self.loaded and shifts is not None)
+
+    def with_completion(self, username: str, row_index: int, completed_at: datetime) -> 'DaySnapshot':
+        completed = dict(self.completed)
+        completed[username] = {**completed.get(username, {}), row_index: completed_at}
+        
+        snapshot = object.__new__(DaySnapshot)
+        for name in self.__slots__:
+            object.__setattr__(snapshot, name, getattr(self, name))
+        object.__setattr__(snapshot, 'completed', completed)
+        return snapshot
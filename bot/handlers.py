@@ -1,40 +1,51 @@
+import asyncio
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes
-from datetime import datetime
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 import logging
-import asyncio
-from .table_manager import TableManager
-from .table_setup import TableSetup
 from .config import Config
-from .members_manager import MembersManager
-from .cache_manager import CacheManager
+from .task_index import TaskRecord
+from .identity_index import Employee
+from .metrics import observe_latency, HANDLER_SECONDS
+from .message_editor import MessageEditCoalescer
+from .locations import Location, LocationRegistry
 
 logger = logging.getLogger(__name__)
 
+HISTORY_DEFAULT_DAYS = 7
+HISTORY_MAX_DAYS = 365
+HISTORY_PAGE_SIZE = 10
+HISTORY_RANGE_OPTIONS = (7, 30, 90)
 
-async def check_employee(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
-    members_manager: MembersManager = context.bot_data['members_manager']
-    username = update.effective_user.username
+
+def route_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Tuple[Optional[Location], Optional[Employee]]:
+    locations: LocationRegistry = context.bot_data['locations']
+    user = update.effective_user
+    return locations.route(user.username, user.id)
+
+
+async def check_employee(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Tuple[Optional[Location], Optional[Employee]]:
+    location, employee = route_user(update, context)
+    if employee:
+        return location, employee
     
-    if not username:
+    if not update.effective_user.username:
         await update.message.reply_text(
             "❌ У тебя не установлен Telegram username. "
             "Пожалуйста, установи username в настройках Telegram."
         )
-        return False
+        return None, None
     
-    if not members_manager.is_member(username):
-        await update.message.reply_text(
-            "❌ Доступ запрещен. Этот бот доступен только для сотрудников."
-        )
-        return False
-    
-    return True
+    await update.message.reply_text(
+        "❌ Доступ запрещен. Этот бот доступен только для сотрудников."
+    )
+    return None, None
 
 
+@observe_latency(HANDLER_SECONDS)
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    members_manager: MembersManager = context.bot_data['members_manager']
-    table_manager: TableManager = context.bot_data['table_manager']
+    locations: LocationRegistry = context.bot_data['locations']
     
     username = update.effective_user.username
     user_id = update.effective_user.id
@@ -46,15 +57,18 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    employee = table_manager.get_employee_by_username(username)
+    employments = locations.employments(username)
     
-    if not employee:
+    if not employments:
         await update.message.reply_text(
             "❌ Доступ запрещен. Этот бот доступен только для сотрудников."
         )
         return
     
-    members_manager.add_member(username, user_id, employee['name'])
+    for location, employee in employments:
+        location.members_manager.add_member(employee.username, user_id, employee.name)
+        if location.pipeline:
+            location.pipeline.planner.mark_dirty()
     
     welcome_text = """
 ☕️ Добро пожаловать в Wool Coffee Bot!
@@ -63,7 +77,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 📋 Доступные команды:
 /tasks - Показать задачи на смену
-/history - История выполненных задач (7 дней)
+/history - История выполненных задач (по умолчанию 7 дней)
 /help - Справка по командам
 
 В начале каждой смены я буду присылать список задач.
@@ -72,8 +86,10 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(welcome_text)
 
 
+@observe_latency(HANDLER_SECONDS)
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not await check_employee(update, context):
+    _, employee = await check_employee(update, context)
+    if not employee:
         return
     
     help_text = """
@@ -81,7 +97,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 /start - Приветствие и инструкция
 /tasks - Показать задачи на смену
-/history - История за последние 7 дней
+/history [дни] - История выполненных задач, например /history 30
 /help - Эта справка
 
 🔔 Как работает бот:
@@ -97,14 +113,16 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(help_text)
 
 
+@observe_latency(HANDLER_SECONDS)
 async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not await check_employee(update, context):
+    location, employee = await check_employee(update, context)
+    if not employee:
         return
     
-    cache_manager: CacheManager = context.bot_data['cache_manager']
-    table_manager: TableManager = context.bot_data['table_manager']
-    username = update.effective_user.username
-    now = datetime.now()
+    cache_manager = location.cache_manager
+    table_manager = location.table_manager
+    username = employee.username
+    now = cache_manager.now()
     
     current_shift = cache_manager.get_shift_for_user(username)
     
@@ -113,7 +131,7 @@ async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         shift_date = now
         is_current = True
     else:
-        next_shift = table_manager.get_user_next_shift(username, now)
+        next_shift = await table_manager.get_user_next_shift_async(username, now)
         if not next_shift:
             await update.message.reply_text(
                 "📅 У тебя нет предстоящих смен в ближайшие 30 дней."
@@ -124,9 +142,11 @@ async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_current = False
     
     if is_current:
-        tasks = cache_manager.get_tasks_for_user(username, shift_date)
+        tasks = cache_manager.get_tasks_for_date(shift_date)
+        completed = cache_manager.get_completed_for_user(username)
     else:
-        tasks = table_manager.get_tasks_for_today(shift_date)
+        tasks = cache_manager.get_tasks_for_date(shift_date)
+        completed = {}
     
     if not tasks:
         await update.message.reply_text(
@@ -134,7 +154,13 @@ async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    message_text, keyboard = _build_tasks_message(tasks, shift, shift_date, is_current)
+    message_text, keyboard = _build_tasks_message(tasks, completed, shift, shift_date, is_current)
+    
+    if cache_manager.is_stale and cache_manager.cache['last_sheets_sync']:
+        message_text += (
+            f"\n\n⚠️ Нет связи с Google Таблицей, данные на "
+            f"{cache_manager.cache['last_sheets_sync'].strftime('%d.%m %H:%M')}"
+        )
     
     await update.message.reply_text(
         message_text,
@@ -143,93 +169,168 @@ async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@observe_latency(HANDLER_SECONDS)
 async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not await check_employee(update, context):
+    location, employee = await check_employee(update, context)
+    if not employee:
         return
     
-    table_manager: TableManager = context.bot_data['table_manager']
-    username = update.effective_user.username
+    days = HISTORY_DEFAULT_DAYS
+    if context.args:
+        try:
+            days = int(context.args[0])
+        except ValueError:
+            await update.message.reply_text("❌ Укажи количество дней числом, например: /history 30")
+            return
+    days = max(1, min(days, HISTORY_MAX_DAYS))
     
-    history = table_manager.get_history(days=7)
+    text, keyboard = await _render_history(location, employee.username, days, 0)
     
-    if not history:
-        await update.message.reply_text("📜 История за последние 7 дней пуста.")
-        return
+    await update.message.reply_text(
+        text,
+        reply_markup=InlineKeyboardMarkup(keyboard) if keyboard else None,
+        parse_mode='HTML'
+    )
+
+
+@observe_latency(HANDLER_SECONDS)
+async def history_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
     
-    user_history = [h for h in history if username.lower() in h.get('completed_by', '').lower()]
+    location, employee = route_user(update, context)
     
-    if not user_history:
-        await update.message.reply_text("📜 Ты не выполнял задач за последние 7 дней.")
+    if not employee:
+        await query.edit_message_text("❌ Доступ запрещен.")
         return
     
-    text = "📜 <b>История выполненных задач (7 дней):</b>\n\n"
-    for item in user_history:
-        status_icon = item.get('status', '✅')
-        text += f"{status_icon} <b>{item['name']}</b>\n"
-        text += f"   📅 {item['date']}\n"
+    _, days, page = query.data.split('_')
+    days = max(1, min(int(days), HISTORY_MAX_DAYS))
+    text, keyboard = await _render_history(location, employee.username, days, int(page))
+    
+    await query.edit_message_text(
+        text,
+        reply_markup=InlineKeyboardMarkup(keyboard) if keyboard else None,
+        parse_mode='HTML'
+    )
+
+
+async def _render_history(location: Location, username: str, days: int, page: int):
+    cache_manager = location.cache_manager
+    since = cache_manager.now().date() - timedelta(days=days - 1)
+    
+    entries, total = await asyncio.to_thread(
+        cache_manager.history.page_for_user, username, since, page * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE
+    )
+    
+    if not total:
+        return f"📜 Ты не выполнял задач за последние {days} дн.", _history_range_buttons(days)
+    
+    return _build_history_message(entries, total, days, page)
+
+
+def _build_history_message(entries: list, total: int, days: int, page: int):
+    page_count = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    
+    text = f"📜 <b>История выполненных задач ({days} дн.):</b>\n\n"
+    for item in entries:
+        text += f"✅ <b>{item['name'] or 'Строка ' + str(item['row_index'])}</b>\n"
+        text += f"   📅 {item['completed_at'].strftime('%d.%m.%Y %H:%M')}\n"
         text += f"   👤 {item['completed_by']}\n\n"
+    text += f"Страница {page + 1} из {page_count} · всего {total}"
     
-    await update.message.reply_text(text, parse_mode='HTML')
+    keyboard = []
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("◀️ Назад", callback_data=f"history_{days}_{page - 1}"))
+    if page + 1 < page_count:
+        navigation.append(InlineKeyboardButton("Вперед ▶️", callback_data=f"history_{days}_{page + 1}"))
+    if navigation:
+        keyboard.append(navigation)
+    keyboard.extend(_history_range_buttons(days))
+    
+    return text, keyboard
+
 
+def _history_range_buttons(days: int) -> list:
+    buttons = [
+        InlineKeyboardButton(f"{option} дн.", callback_data=f"history_{option}_0")
+        for option in HISTORY_RANGE_OPTIONS
+        if option != days
+    ]
+    return [buttons] if buttons else []
 
+
+@observe_latency(HANDLER_SECONDS)
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    await query.answer()
     
-    cache_manager: CacheManager = context.bot_data['cache_manager']
-    members_manager: MembersManager = context.bot_data['members_manager']
-    username = update.effective_user.username
+    message_editor: MessageEditCoalescer = context.bot_data['message_editor']
+    
+    location, employee = route_user(update, context)
     
-    if not members_manager.is_member(username):
+    if not employee:
+        await query.answer()
         await query.edit_message_text("❌ Доступ запрещен.")
         return
     
+    cache_manager = location.cache_manager
+    username = employee.username
+    
     callback_data = query.data
     
     if not callback_data.startswith('complete_'):
+        await query.answer()
         return
     
     row_index = int(callback_data.split('_')[1])
     
-    now = datetime.now()
+    now = cache_manager.now()
     shift = cache_manager.get_shift_for_user(username)
     
     if not shift:
+        await query.answer()
         await query.edit_message_text("❌ У тебя нет активной смены.")
         return
     
-    tasks = cache_manager.get_tasks_for_user(username, now)
-    task = next((t for t in tasks if t['row_index'] == row_index), None)
+    tasks = cache_manager.get_tasks_for_date(now)
+    task = next((t for t in tasks if t.row_index == row_index), None)
     
     if not task:
+        await query.answer()
         await query.edit_message_text("❌ Задача не найдена.")
         return
     
-    completed_at = datetime.now()
+    if _is_task_completed(task, cache_manager.get_completed_for_user(username), now.toordinal()):
+        await query.answer(f"Уже выполнено: {task.name}")
+        return
     
-    cache_manager.mark_completed_local(row_index, username, completed_at)
+    await query.answer(f"✅ {task.name}")
     
-    updated_tasks = cache_manager.get_tasks_for_user(username, now)
-    message_text, keyboard = _build_tasks_message(updated_tasks, shift, now, True)
+    completed_at = cache_manager.now()
     
-    await query.edit_message_text(
-        message_text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode='HTML'
+    await cache_manager.record_completion(
+        row_index,
+        username,
+        shift['name'],
+        completed_at,
+        task.period,
+        task.name
     )
     
-    asyncio.create_task(
-        cache_manager.sync_to_sheets(
-            row_index,
-            shift['name'],
-            completed_at,
-            task['period']
-        )
-    )
+    def render():
+        render_now = cache_manager.now()
+        updated_tasks = cache_manager.get_tasks_for_date(render_now)
+        completed = cache_manager.get_completed_for_user(username)
+        message_text, keyboard = _build_tasks_message(updated_tasks, completed, shift, render_now, True)
+        return message_text, InlineKeyboardMarkup(keyboard)
+    
+    message_editor.request(query.message.chat_id, query.message.message_id, render)
 
 
-def _build_tasks_message(tasks: list, shift: dict, shift_date: datetime, is_current: bool):
-    completed_tasks = [t for t in tasks if t['status'] == '✅']
+def _build_tasks_message(tasks: list, completed: dict, shift: dict, shift_date: datetime, is_current: bool):
+    day_ordinal = shift_date.toordinal()
+    completed_tasks = [t for t in tasks if _is_task_completed(t, completed, day_ordinal)]
     total_tasks = len(tasks)
     completed_count = len(completed_tasks)
     
@@ -245,22 +346,21 @@ def _build_tasks_message(tasks: list, shift: dict, shift_date: datetime, is_curr
     keyboard = []
     
     for task in tasks:
-        is_completed = task['status'] == '✅'
-        is_overdue = _is_task_overdue(task, shift_date)
+        is_completed = _is_task_completed(task, completed, day_ordinal)
+        days_overdue = task.days_overdue(day_ordinal)
         
         if is_completed:
             completed_time = "сегодня"
-            text += f"✅ <b>{task['name']}</b> (выполнено {completed_time})\n"
+            text += f"✅ <b>{task.name}</b> (выполнено {completed_time})\n"
         else:
-            if is_overdue:
-                days = _get_days_overdue(task, shift_date)
-                text += f"⚠️ <b>{task['name']}</b> <i>(просрочена на {days} дн.!)</i>\n"
+            if days_overdue > 0:
+                text += f"⚠️ <b>{task.name}</b> <i>(просрочена на {days_overdue} дн.!)</i>\n"
             else:
-                text += f"⏳ <b>{task['name']}</b>\n"
+                text += f"⏳ <b>{task.name}</b>\n"
             
             button = InlineKeyboardButton(
-                text=f"✅ {task['name']}",
-                callback_data=f"complete_{task['row_index']}"
+                text=f"✅ {task.name}",
+                callback_data=f"complete_{task.row_index}"
             )
             keyboard.append([button])
     
@@ -269,33 +369,11 @@ def _build_tasks_message(tasks: list, shift: dict, shift_date: datetime, is_curr
     return text, keyboard
 
 
-def _is_task_overdue(task: dict, today: datetime) -> bool:
-    next_cleaning_str = task.get('next_cleaning', '')
-    
-    if not next_cleaning_str or next_cleaning_str == '-':
-        return False
-    
-    try:
-        next_cleaning = datetime.strptime(next_cleaning_str, "%d.%m.%Y")
-        days_overdue = (today - next_cleaning).days
-        return days_overdue > 0
-    except ValueError:
-        return False
-
-
-def _get_days_overdue(task: dict, today: datetime) -> int:
-    next_cleaning_str = task.get('next_cleaning', '')
-    
-    if not next_cleaning_str or next_cleaning_str == '-':
-        return 0
-    
-    try:
-        next_cleaning = datetime.strptime(next_cleaning_str, "%d.%m.%Y")
-        return max(0, (today - next_cleaning).days)
-    except ValueError:
-        return 0
+def _is_task_completed(task: TaskRecord, completed: dict, day_ordinal: int) -> bool:
+    return task.row_index in completed or task.last_cleaned_ordinal == day_ordinal
 
 
+@observe_latency(HANDLER_SECONDS)
 async def setup_table_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     config: Config = context.bot_data['config']
     
@@ -313,33 +391,38 @@ async def setup_table_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return
     
+    targets = await _admin_targets(update, context)
+    if not targets:
+        return
+    
     await update.message.reply_text("⏳ Начинаю проверку и настройку таблицы...")
     
-    try:
-        table_manager: TableManager = context.bot_data['table_manager']
-        members_manager: MembersManager = context.bot_data['members_manager']
-        cache_manager: CacheManager = context.bot_data['cache_manager']
-        
-        table_setup = TableSetup(table_manager.spreadsheet)
-        report = table_setup.setup()
-        
-        table_manager.reload_employees()
-        table_manager._initialize_next_cleaning_dates()
-        
-        synced = members_manager.sync_with_table(table_manager.employees_cache)
-        
-        await cache_manager.refresh_from_sheets()
-        
-        await update.message.reply_text(
-            f"{report}\n\n🔄 Данные перезагружены.\n"
-            f"📝 Синхронизировано сотрудников: {len(table_manager.employees_cache)}"
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in setup_table_command: {e}")
-        await update.message.reply_text(f"❌ Ошибка при настройке таблицы: {str(e)}")
+    for location in targets:
+        try:
+            table_manager = location.table_manager
+            
+            report = await asyncio.to_thread(table_manager.setup_table)
+            
+            await asyncio.to_thread(table_manager.reload_employees)
+            await asyncio.to_thread(table_manager._initialize_next_cleaning_dates)
+            
+            synced = location.members_manager.sync_with_table(table_manager.employees_cache)
+            
+            await location.pipeline.refresh(force=True)
+            
+            await update.message.reply_text(
+                f"{_location_title(context, location)}{report}\n\n🔄 Данные перезагружены.\n"
+                f"📝 Синхронизировано сотрудников: {len(table_manager.employees_cache)}"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in setup_table_command for {location.id}: {e}")
+            await update.message.reply_text(
+                f"{_location_title(context, location)}❌ Ошибка при настройке таблицы: {str(e)}"
+            )
 
 
+@observe_latency(HANDLER_SECONDS)
 async def member_update_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     config: Config = context.bot_data['config']
     
@@ -357,34 +440,74 @@ async def member_update_command(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return
     
+    targets = await _admin_targets(update, context)
+    if not targets:
+        return
+    
     await update.message.reply_text("⏳ Обновляю данные сотрудников...")
     
-    try:
-        table_manager: TableManager = context.bot_data['table_manager']
-        members_manager: MembersManager = context.bot_data['members_manager']
-        cache_manager: CacheManager = context.bot_data['cache_manager']
-        
-        old_count = len(table_manager.employees_cache)
-        
-        table_manager.reload_employees()
-        
-        new_count = len(table_manager.employees_cache)
-        
-        synced = members_manager.sync_with_table(table_manager.employees_cache)
-        
-        await cache_manager.refresh_from_sheets()
-        
-        registered_count = sum(1 for m in members_manager.get_all_members().values() if m['user_id'] is not None)
-        
+    for location in targets:
+        try:
+            table_manager = location.table_manager
+            members_manager = location.members_manager
+            
+            old_count = len(table_manager.employees_cache)
+            
+            await asyncio.to_thread(table_manager.reload_employees)
+            
+            new_count = len(table_manager.employees_cache)
+            
+            synced = members_manager.sync_with_table(table_manager.employees_cache)
+            
+            await location.pipeline.refresh(force=True)
+            
+            registered_count = sum(1 for m in members_manager.get_all_members().values() if m['user_id'] is not None)
+            
+            await update.message.reply_text(
+                f"{_location_title(context, location)}✅ Данные успешно обновлены!\n\n"
+                f"📊 Статистика:\n"
+                f"• Сотрудников в таблице: {new_count}\n"
+                f"• Изменение: {new_count - old_count:+d}\n"
+                f"• Зарегистрировано в боте: {registered_count}\n"
+                f"• Не зарегистрировано: {new_count - registered_count}"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in member_update_command for {location.id}: {e}")
+            await update.message.reply_text(
+                f"{_location_title(context, location)}❌ Ошибка при обновлении данных: {str(e)}"
+            )
+
+
+async def _admin_targets(update: Update, context: ContextTypes.DEFAULT_TYPE) -> List[Location]:
+    locations: LocationRegistry = context.bot_data['locations']
+    
+    if not context.args:
+        return list(locations)
+    
+    location = locations.get(context.args[0])
+    if not location:
         await update.message.reply_text(
-            f"✅ Данные успешно обновлены!\n\n"
-            f"📊 Статистика:\n"
-            f"• Сотрудников в таблице: {new_count}\n"
-            f"• Изменение: {new_count - old_count:+d}\n"
-            f"• Зарегистрировано в боте: {registered_count}\n"
-            f"• Не зарегистрировано: {new_count - registered_count}"
+            f"❌ Неизвестная кофейня: {context.args[0]}\n"
+            f"Доступные: {', '.join(location.id for location in locations)}"
         )
-        
-    except Exception as e:
-        logger.error(f"Error in member_update_command: {e}")
-        await update.message.reply_text(f"❌ Ошибка при обновлении данных: {str(e)}")
\ No newline at end of file
+        return []
+    
+    return [location]
+
+
+def _location_title(context: ContextTypes.DEFAULT_TYPE, location: Location) -> str:
+    if len(context.bot_data['locations']) == 1:
+        return ""
+    return f"📍 {location.name}\n"
+
+
+def register_handlers(application: Application):
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("tasks", tasks_command))
+    application.add_handler(CommandHandler("history", history_command))
+    application.add_handler(CommandHandler("setup_table", setup_table_command))
+    application.add_handler(CommandHandler("member_update", member_update_command))
+    application.add_handler(CallbackQueryHandler(history_callback, pattern=r'^history_\d+_\d+$'))
+    application.add_handler(CallbackQueryHandler(button_callback))
@@ -0,0 +1,80 @@
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Employee:
+    __slots__ = ('name', 'username', 'position', 'user_id')
+
+    def __init__(self, name: str, username: str, position: str, user_id: Optional[int] = None):
+        self.name = name
+        self.username = username
+        self.position = position
+        self.user_id = user_id
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'username': self.username,
+            'position': self.position
+        }
+
+
+class IdentityIndex:
+    def __init__(self):
+        self.by_username: Dict[str, Employee] = {}
+        self.by_user_id: Dict[int, Employee] = {}
+        self.by_name: Dict[str, Employee] = {}
+        self._user_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+    def update_employees(self, employees: Dict[str, Dict]):
+        by_username = {}
+        by_user_id = {}
+        by_name = {}
+        
+        for name, info in employees.items():
+            key = info['username'].casefold()
+            employee = Employee(name, info['username'], info['position'], self._user_ids.get(key))
+            by_name[name] = employee
+            by_username.setdefault(key, employee)
+            if employee.user_id is not None:
+                by_user_id[employee.user_id] = employee
+        
+        self.by_username, self.by_user_id, self.by_name = by_username, by_user_id, by_name
+
+    def bind_user_id(self, username: str, user_id: Optional[int]):
+        key = username.casefold()
+        
+        if user_id is None:
+            self._user_ids.pop(key, None)
+        else:
+            self._user_ids[key] = user_id
+        
+        employee = self.by_username.get(key)
+        if not employee:
+            return
+        
+        if employee.user_id is not None and self.by_user_id.get(employee.user_id) is employee:
+            del self.by_user_id[employee.user_id]
+        
+        employee.user_id = user_id
+        if user_id is not None:
+            self.by_user_id[user_id] = employee
+
+    def get(self, username: Optional[str] = None, user_id: Optional[int] = None) -> Optional[Employee]:
+        if user_id is not None:
+            employee = self.by_user_id.get(user_id)
+            if employee:
+                return employee
+        
+        if username:
+            return self.by_username.get(username.casefold())
+        
+        return None
+
+    def get_by_name(self, name: str) -> Optional[Employee]:
+        return self.by_name.get(name)
@@ -0,0 +1,161 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+from .config import Config
+from .identity_index import IdentityIndex, Employee
+from .table_manager import TableManager
+from .members_manager import MembersManager
+from .cache_manager import CacheManager
+from .completion_journal import CompletionJournal
+from .completion_history import CompletionHistory
+from .mirror import SpreadsheetMirror
+from .storage import InMemoryBackend
+from .sheets_connection import SheetsConnection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCATION = 'default'
+LOCATION_ID_PATTERN = re.compile(r'^[a-z0-9_-]+$')
+
+
+class Location:
+    def __init__(self, location_id: str, name: str, config_dir: str, table_manager: TableManager,
+                 members_manager: MembersManager, cache_manager: CacheManager):
+        self.id = location_id
+        self.name = name
+        self.config_dir = config_dir
+        self.table_manager = table_manager
+        self.members_manager = members_manager
+        self.cache_manager = cache_manager
+        self.pipeline = None
+        self.stagger_offset = 0.0
+
+    @property
+    def identity(self) -> IdentityIndex:
+        return self.table_manager.identity
+
+
+class LocationRegistry:
+    def __init__(self, locations: List[Location], stagger_window: float = 0.0):
+        self.locations: Dict[str, Location] = {location.id: location for location in locations}
+        self.stagger_window = stagger_window if len(locations) > 1 else 0.0
+        self._by_user_id: Dict[int, str] = {}
+        
+        for index, location in enumerate(locations):
+            location.stagger_offset = self.stagger_window * index / len(locations)
+
+    def __iter__(self) -> Iterator[Location]:
+        return iter(self.locations.values())
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def get(self, location_id: str) -> Optional[Location]:
+        return self.locations.get(location_id)
+
+    def route(self, username: Optional[str], user_id: Optional[int]) -> Tuple[Optional[Location], Optional[Employee]]:
+        location = self.locations.get(self._by_user_id.get(user_id))
+        if location:
+            employee = location.identity.get(username=username, user_id=user_id)
+            if employee:
+                return location, employee
+            del self._by_user_id[user_id]
+        
+        matches = self.employments(username, user_id)
+        
+        if not matches:
+            return None, None
+        
+        if len(matches) > 1:
+            on_shift = [
+                (location, employee) for location, employee in matches
+                if location.cache_manager.get_shift_for_user(employee.username)
+            ]
+            return (on_shift or matches)[0]
+        
+        if user_id is not None:
+            self._by_user_id[user_id] = matches[0][0].id
+        return matches[0]
+
+    def employments(self, username: Optional[str], user_id: Optional[int] = None) -> List[Tuple[Location, Employee]]:
+        matches = []
+        for location in self.locations.values():
+            employee = location.identity.get(username=username, user_id=user_id)
+            if employee:
+                matches.append((location, employee))
+        return matches
+
+
+def load_location_specs(config: Config) -> List[Dict]:
+    if not config.locations_file:
+        return [{
+            'id': DEFAULT_LOCATION,
+            'name': DEFAULT_LOCATION,
+            'spreadsheet_id': config.google_sheets_id,
+            'storage_file': config.storage_file
+        }]
+    
+    with open(config.locations_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{config.locations_file} must contain a non-empty list of locations")
+    
+    specs = []
+    seen = set()
+    
+    for entry in entries:
+        location_id = str(entry.get('id', '')).strip()
+        
+        if not LOCATION_ID_PATTERN.match(location_id):
+            raise ValueError(f"Invalid location id {location_id!r}, use lowercase letters, digits, '-' and '_'")
+        if location_id in seen:
+            raise ValueError(f"Duplicate location id {location_id!r}")
+        if config.storage_backend == 'gspread' and not entry.get('spreadsheet_id'):
+            raise ValueError(f"Location {location_id!r} has no spreadsheet_id")
+        
+        seen.add(location_id)
+        specs.append({
+            'id': location_id,
+            'name': entry.get('name') or location_id,
+            'spreadsheet_id': entry.get('spreadsheet_id', ''),
+            'storage_file': entry.get('storage_file') or str(_location_dir(location_id) / 'spreadsheet.json')
+        })
+    
+    return specs
+
+
+def build_location(spec: Dict, config: Config, limiter=None, connection: Optional[SheetsConnection] = None) -> Location:
+    config_dir = str(_location_dir(spec['id']))
+    identity = IdentityIndex()
+    
+    backend = None
+    if config.storage_backend == 'memory':
+        backend = InMemoryBackend(path=spec['storage_file'])
+    
+    table_manager = TableManager(
+        config.google_credentials_file,
+        spec['spreadsheet_id'],
+        identity,
+        backend,
+        limiter,
+        connection
+    )
+    members_manager = MembersManager(config_dir, identity=identity)
+    cache_manager = CacheManager(
+        table_manager,
+        CompletionJournal(config_dir),
+        SpreadsheetMirror(config_dir),
+        CompletionHistory(config_dir),
+        config.timezone
+    )
+    
+    return Location(spec['id'], spec['name'], config_dir, table_manager, members_manager, cache_manager)
+
+
+def _location_dir(location_id: str) -> Path:
+    if location_id == DEFAULT_LOCATION:
+        return Path('configs')
+    return Path('configs') / 'locations' / location_id
@@ -1,19 +1,25 @@
+import asyncio
 import logging
 import sys
 import os
 from pathlib import Path
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler
+from typing import Dict, Optional
+from telegram.ext import Application
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 import pytz
 from dotenv import load_dotenv
 
 from .config import Config
-from .table_manager import TableManager
-from .members_manager import MembersManager
-from .cache_manager import CacheManager
-from .handlers import start_command, help_command, tasks_command, history_command, button_callback, setup_table_command, member_update_command
-from .scheduler import check_and_send_notifications, refresh_cache_job
+from .locations import LocationRegistry, load_location_specs, build_location
+from .notifier import NotificationDispatcher
+from .message_editor import MessageEditCoalescer
+from .notification_ledger import NotificationLedger
+from .metrics import REGISTRY, MetricsServer
+from .rate_limiter import SheetsRateLimiter
+from .sheets_connection import SheetsConnection
+from .handlers import register_handlers
+from .update_processor import PerUserUpdateProcessor
+from .scheduler import NotificationPlanner, RefreshPipeline, schedule_next_refresh, schedule_day_rollover
 
 Path('./logs').mkdir(parents=True, exist_ok=True)
 
@@ -33,44 +39,173 @@ async def post_init(application: Application):
     logger.info("Bot initialized successfully")
     
     config: Config = application.bot_data['config']
-    table_manager: TableManager = application.bot_data['table_manager']
-    members_manager: MembersManager = application.bot_data['members_manager']
-    cache_manager: CacheManager = application.bot_data['cache_manager']
+    locations: LocationRegistry = application.bot_data['locations']
     
-    members_manager.sync_with_table(table_manager.employees_cache)
-    
-    await cache_manager.initialize()
+    dispatcher = NotificationDispatcher(application.bot)
+    application.bot_data['notification_dispatcher'] = dispatcher
+    application.bot_data['message_editor'] = MessageEditCoalescer(application.bot, config.edit_coalesce_seconds)
     
     scheduler = AsyncIOScheduler(timezone=config.timezone)
+    scheduler.start()
+    
+    for location in locations:
+        planner = NotificationPlanner(
+            scheduler,
+            dispatcher,
+            location.cache_manager,
+            location.members_manager,
+            NotificationLedger(location.config_dir),
+            config.timezone,
+            config.notification_offset_minutes,
+            job_prefix=f"{NotificationPlanner.JOB_PREFIX}{location.id}:"
+        )
+        location.pipeline = RefreshPipeline(
+            location.cache_manager,
+            planner,
+            location.id,
+            location.stagger_offset,
+            locations.stagger_window
+        )
+    
+    await asyncio.gather(*(location.pipeline.initialize() for location in locations))
     
-    scheduler.add_job(
-        check_and_send_notifications,
-        trigger=CronTrigger(minute='*/5', timezone=config.timezone),
-        args=[application.bot, cache_manager, members_manager, config.timezone, config.notification_offset_minutes],
-        id='check_notifications',
-        name='Check and send notifications',
-        replace_existing=True
+    for location in locations:
+        cache_manager = location.cache_manager
+        table_manager = location.table_manager
+        
+        if table_manager.employees_cache:
+            location.members_manager.sync_with_table(table_manager.employees_cache)
+        
+        if cache_manager.is_stale:
+            logger.warning(f"Location {location.id} is running in stale mode until Google Sheets is reachable")
+            schedule_next_refresh(cache_manager, scheduler, config, location.pipeline, interval=0)
+        else:
+            schedule_next_refresh(cache_manager, scheduler, config, location.pipeline)
+        
+        schedule_day_rollover(cache_manager, scheduler, config, location.pipeline)
+    
+    logger.info(
+        f"Scheduler started for {len(locations)} locations. Notifying {config.notification_offset_minutes} minutes "
+        f"before each shift, refreshing cache when the spreadsheet changes"
     )
     
-    scheduler.add_job(
-        refresh_cache_job,
-        trigger=CronTrigger(minute='*/5', timezone=config.timezone),
-        args=[cache_manager],
-        id='refresh_cache',
-        name='Refresh cache from Google Sheets',
-        replace_existing=True
+    application.bot_data['scheduler'] = scheduler
+    
+    if config.metrics_port:
+        metrics_server = _create_metrics_server(config, locations, application.bot_data.get('sheets_limiter'))
+        try:
+            await metrics_server.start()
+            application.bot_data['metrics_server'] = metrics_server
+        except OSError as e:
+            logger.error(f"Failed to start metrics endpoint: {e}")
+
+
+def _cache_ages(locations: LocationRegistry) -> Dict[str, Optional[float]]:
+    return {location.id: location.cache_manager.cache_age_seconds() for location in locations}
+
+
+def _oldest_cache_age(locations: LocationRegistry) -> Optional[float]:
+    ages = [age for age in _cache_ages(locations).values() if age is not None]
+    return max(ages) if ages else None
+
+
+def _oldest_sync_timestamp(locations: LocationRegistry) -> Optional[float]:
+    timestamps = [location.cache_manager.last_sync_timestamp() for location in locations]
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return min(timestamps) if timestamps else None
+
+
+def _create_metrics_server(config: Config, locations: LocationRegistry,
+                           limiter: Optional[SheetsRateLimiter]) -> MetricsServer:
+    REGISTRY.gauge(
+        'locations',
+        'Coffee shops served by this process',
+        lambda: len(locations)
+    )
+    REGISTRY.gauge(
+        'cache_age_seconds',
+        'Seconds since the least recently synced cache was synced with Google Sheets',
+        lambda: _oldest_cache_age(locations)
+    )
+    REGISTRY.gauge(
+        'cache_last_sync_timestamp_seconds',
+        'Unix time of the oldest last successful sync with Google Sheets',
+        lambda: _oldest_sync_timestamp(locations)
+    )
+    REGISTRY.gauge(
+        'cache_snapshot_version',
+        'Sum of the cache snapshot versions of all locations, bumped whenever a new snapshot is published',
+        lambda: sum(location.cache_manager.version for location in locations)
+    )
+    REGISTRY.gauge(
+        'cache_stale',
+        'Locations serving data the bot could not revalidate',
+        lambda: sum(1 for location in locations if location.cache_manager.is_stale)
+    )
+    REGISTRY.gauge(
+        'write_queue_depth',
+        'Completions waiting to be written to Google Sheets',
+        lambda: sum(location.cache_manager.pending_writes for location in locations)
+    )
+    REGISTRY.gauge(
+        'journal_pending_completions',
+        'Journaled completions not yet confirmed in Google Sheets',
+        lambda: sum(len(location.cache_manager.journal.pending) for location in locations)
     )
     
-    scheduler.start()
-    logger.info(f"Scheduler started. Checking every 5 minutes for shifts and refreshing cache")
+    if limiter:
+        REGISTRY.gauge(
+            'sheets_quota_tokens_available',
+            'Google Sheets requests the rate limiter can admit right now',
+            lambda: limiter.available
+        )
     
-    application.bot_data['scheduler'] = scheduler
+    def readiness_check():
+        ages = _cache_ages(locations)
+        never_synced = [location_id for location_id, age in ages.items() if age is None]
+        if never_synced:
+            return False, f"cache never synced for {', '.join(never_synced)}"
+        
+        location_id, age = max(ages.items(), key=lambda item: item[1])
+        if age > config.max_cache_age_seconds:
+            return False, f"cache of {location_id} is {age:.0f}s old, limit {config.max_cache_age_seconds}s"
+        return True, f"ok, oldest cache is {age:.0f}s old"
+    
+    return MetricsServer(REGISTRY, readiness_check, config.metrics_host, config.metrics_port)
+
+
+async def post_stop(application: Application):
+    message_editor: MessageEditCoalescer = application.bot_data.get('message_editor')
+    if message_editor:
+        await message_editor.shutdown()
 
 
 async def post_shutdown(application: Application):
+    metrics_server = application.bot_data.get('metrics_server')
+    if metrics_server:
+        await metrics_server.stop()
+    
     scheduler = application.bot_data.get('scheduler')
     if scheduler:
         scheduler.shutdown()
+    
+    locations: LocationRegistry = application.bot_data.get('locations')
+    if locations:
+        pending = sum(location.cache_manager.pending_writes for location in locations)
+        logger.info(f"Draining {pending} pending writes to Google Sheets")
+        await asyncio.gather(*(location.cache_manager.shutdown() for location in locations))
+        for location in locations:
+            await location.table_manager.close()
+    
+    connection: SheetsConnection = application.bot_data.get('sheets_connection')
+    if connection:
+        await connection.close()
+    
+    limiter: SheetsRateLimiter = application.bot_data.get('sheets_limiter')
+    if limiter:
+        for line in limiter.report():
+            logger.info(f"Sheets quota use: {line}")
+    
     logger.info("Bot shutdown completed")
 
 
@@ -85,46 +220,60 @@ def main():
         logger.error(f"Configuration error: {e}")
         sys.exit(1)
     
-    table_manager = TableManager(
-        config.google_credentials_file,
-        config.google_sheets_id
-    )
-    
     try:
-        table_manager.connect()
-    except Exception as e:
-        logger.error(f"Failed to connect to Google Sheets: {e}")
+        specs = load_location_specs(config)
+    except (OSError, ValueError) as e:
+        logger.error(f"Configuration error: {e}")
         sys.exit(1)
     
-    members_manager = MembersManager()
+    limiter = None
+    if config.sheets_requests_per_minute > 0:
+        limiter = SheetsRateLimiter(config.sheets_requests_per_minute)
     
-    cache_manager = CacheManager(table_manager)
+    connection = SheetsConnection(config.google_credentials_file, limiter, max_connections=config.sheets_max_connections)
     
-    application = Application.builder().token(config.telegram_token).build()
+    locations = LocationRegistry(
+        [build_location(spec, config, limiter, connection) for spec in specs],
+        config.refresh_stagger_seconds
+    )
+    logger.info(f"Serving {len(locations)} locations: {', '.join(location.id for location in locations)}")
     
-    application.bot_data['table_manager'] = table_manager
-    application.bot_data['members_manager'] = members_manager
-    application.bot_data['cache_manager'] = cache_manager
+    application = (
+        Application.builder()
+        .token(config.telegram_token)
+        .concurrent_updates(PerUserUpdateProcessor(config.update_workers))
+        .build()
+    )
+    
+    application.bot_data['locations'] = locations
+    application.bot_data['sheets_connection'] = connection
+    application.bot_data['sheets_limiter'] = limiter
     application.bot_data['config'] = config
     
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("tasks", tasks_command))
-    application.add_handler(CommandHandler("history", history_command))
-    application.add_handler(CommandHandler("setup_table", setup_table_command))
-    application.add_handler(CommandHandler("member_update", member_update_command))
-    application.add_handler(CallbackQueryHandler(button_callback))
+    register_handlers(application)
     
     application.post_init = post_init
+    application.post_stop = post_stop
     application.post_shutdown = post_shutdown
     
-    logger.info("Starting bot...")
+    logger.info(f"Starting bot in {config.update_mode} mode...")
     
     try:
-        application.run_polling(
-            allowed_updates=['message', 'callback_query'],
-            drop_pending_updates=True
-        )
+        if config.update_mode == 'webhook':
+            application.run_webhook(
+                listen=config.webhook_listen,
+                port=config.webhook_port,
+                url_path=config.webhook_path,
+                webhook_url=f"{config.webhook_url.rstrip('/')}/{config.webhook_path}",
+                secret_token=config.webhook_secret or None,
+                allowed_updates=['message', 'callback_query'],
+                drop_pending_updates=True
+            )
+        else:
+            application.run_polling(
+                allowed_updates=['message', 'callback_query'],
+                drop_pending_updates=True
+            )
     except KeyboardInterrupt:
         logger.info("Received interrupt signal")
     finally:
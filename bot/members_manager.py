@@ -3,17 +3,20 @@ import os
 from pathlib import Path
 from typing import Optional, Dict
 import logging
+from .identity_index import IdentityIndex
 
 logger = logging.getLogger(__name__)
 
 
 class MembersManager:
-    def __init__(self, config_dir: str = 'configs'):
+    def __init__(self, config_dir: str = 'configs', identity: Optional[IdentityIndex] = None):
         self.config_dir = Path(config_dir)
         self.members_file = self.config_dir / 'members.json'
         self.members: Dict[str, int] = {}
+        self.identity = identity if identity is not None else IdentityIndex()
         self._ensure_config_dir()
         self._load_members()
+        self._reindex()
     
     def _ensure_config_dir(self):
         self.config_dir.mkdir(parents=True, exist_ok=True)
@@ -31,6 +34,10 @@ class MembersManager:
             self.members = {}
             self._save_members()
     
+    def _reindex(self):
+        for member in self.members.values():
+            self.identity.bind_user_id(member['username'], member['user_id'])
+    
     def _save_members(self):
         try:
             with open(self.members_file, 'w', encoding='utf-8') as f:
@@ -52,6 +59,7 @@ class MembersManager:
                 'username': username,
                 'name': name
             }
+            self.identity.bind_user_id(username, user_id)
             self._save_members()
             logger.info(f"Added/updated member: {username} (ID: {user_id})")
             return True
@@ -69,9 +77,6 @@ class MembersManager:
             return False
         return username.lower() in self.members
     
-    def is_member_by_id(self, user_id: int) -> bool:
-        return any(m['user_id'] == user_id for m in self.members.values())
-    
     def get_member_info(self, username: str) -> Optional[Dict]:
         key = username.lower()
         return self.members.get(key)
@@ -91,15 +96,16 @@ class MembersManager:
                 }
                 added_count += 1
         
-        keys_to_remove = []
-        for key in self.members.keys():
-            username = self.members[key]['username']
-            if not any(emp['username'].lower() == username.lower() for emp in table_employees.values()):
-                keys_to_remove.append(key)
+        table_usernames = {info['username'].lower() for info in table_employees.values()}
+        keys_to_remove = [
+            key for key, member in self.members.items()
+            if member['username'].lower() not in table_usernames
+        ]
         
         for key in keys_to_remove:
             del self.members[key]
         
+        self._reindex()
         self._save_members()
         logger.info(f"Synced with table: +{added_count} new, -{len(keys_to_remove)} removed")
         return added_count
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import logging
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import RetryAfter, BadRequest, TelegramError
+from .notifier import _retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[int, int]
+Renderer = Callable[[], Tuple[str, Optional[InlineKeyboardMarkup]]]
+
+
+class MessageEditCoalescer:
+    def __init__(self, bot: Bot, window: float = 0.5, max_retries: int = 2, max_tracked: int = 1000):
+        self.bot = bot
+        self.window = window
+        self.max_retries = max_retries
+        self.max_tracked = max_tracked
+        self._renderers: Dict[MessageKey, Renderer] = {}
+        self._tasks: Dict[MessageKey, asyncio.Task] = {}
+        self._sent_digests: OrderedDict = OrderedDict()
+        self.stats = {
+            'requested': 0,
+            'sent': 0,
+            'unchanged': 0,
+            'failed': 0
+        }
+
+    def request(self, chat_id: int, message_id: int, render: Renderer):
+        key = (chat_id, message_id)
+        self.stats['requested'] += 1
+        self._renderers[key] = render
+        
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def shutdown(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    async def _run(self, key: MessageKey):
+        try:
+            while key in self._renderers:
+                await asyncio.sleep(self.window)
+                render = self._renderers.pop(key)
+                await self._edit(key, render)
+        finally:
+            self._tasks.pop(key, None)
+
+    async def _edit(self, key: MessageKey, render: Renderer):
+        chat_id, message_id = key
+        
+        try:
+            text, markup = render()
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Error rendering message {message_id} in chat {chat_id}: {e}")
+            return
+        
+        digest = _digest(text, markup)
+        if self._sent_digests.get(key) == digest:
+            self.stats['unchanged'] += 1
+            return
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.bot.edit_message_text(
+                    text,
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    reply_markup=markup,
+                    parse_mode='HTML'
+                )
+                self.stats['sent'] += 1
+                self._remember(key, digest)
+                return
+            
+            except RetryAfter as e:
+                delay = _retry_after_seconds(e)
+                logger.warning(f"Flood limit hit editing message {message_id} in chat {chat_id}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            
+            except BadRequest as e:
+                if 'not modified' in str(e).lower():
+                    self.stats['unchanged'] += 1
+                    self._remember(key, digest)
+                    return
+                self.stats['failed'] += 1
+                logger.error(f"Failed to edit message {message_id} in chat {chat_id}: {e}")
+                return
+            
+            except TelegramError as e:
+                self.stats['failed'] += 1
+                logger.error(f"Failed to edit message {message_id} in chat {chat_id}: {e}")
+                return
+        
+        self.stats['failed'] += 1
+        logger.error(f"Failed to edit message {message_id} in chat {chat_id}: retries exhausted")
+
+    def _remember(self, key: MessageKey, digest: str):
+        self._sent_digests[key] = digest
+        self._sent_digests.move_to_end(key)
+        while len(self._sent_digests) > self.max_tracked:
+            self._sent_digests.popitem(last=False)
+
+
+def _digest(text: str, markup: Optional[InlineKeyboardMarkup]) -> str:
+    payload = text + '\x00' + (markup.to_json() if markup else '')
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
@@ -0,0 +1,252 @@
+import asyncio
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, callback: Callable[[], Optional[float]]):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.error(f"Error collecting metric {self.name}: {e}")
+            value = None
+        if value is not None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names, label_values, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], Optional[float]]) -> Gauge:
+        return self._register(Gauge(name, help_text, callback))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+SHEETS_CALL_SECONDS = REGISTRY.histogram(
+    'sheets_call_duration_seconds',
+    'Duration of TableManager calls to Google Sheets',
+    ['method']
+)
+HANDLER_SECONDS = REGISTRY.histogram(
+    'telegram_handler_duration_seconds',
+    'Duration of Telegram command and callback handlers',
+    ['handler']
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total',
+    'CacheManager lookups by result',
+    ['lookup', 'result']
+)
+NOTIFICATION_LAG_SECONDS = REGISTRY.histogram(
+    'notification_send_lag_seconds',
+    'Delay between the planned notification time (shift start minus offset) and delivery',
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+)
+NOTIFICATION_SEND_SECONDS = REGISTRY.histogram(
+    'notification_send_duration_seconds',
+    'Time to deliver a notification, including rate limiting and retries'
+)
+NOTIFICATION_SEND_FAILURES = REGISTRY.counter(
+    'notification_send_failures_total',
+    'Notifications that could not be delivered, by error',
+    ['error']
+)
+NOTIFICATION_SEND_RETRIES = REGISTRY.counter(
+    'notification_send_retries_total',
+    'Notification send attempts that were retried, by reason',
+    ['reason']
+)
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    'pipeline_stage_duration_seconds',
+    'Duration of refresh pipeline stages',
+    ['stage']
+)
+PIPELINE_NOTIFY_SKIPPED = REGISTRY.counter(
+    'pipeline_notify_skipped_total',
+    'Notification passes skipped because the cache snapshot did not change'
+)
+
+
+def observe_latency(histogram: Histogram):
+    def decorator(func):
+        label = func.__name__
+        
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, label)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, label)
+        return wrapper
+    
+    return decorator
+
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, readiness_check: Callable[[], Tuple[bool, str]],
+                 host: str = '127.0.0.1', port: int = 9100):
+        self.registry = registry
+        self.readiness_check = readiness_check
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass
+            
+            parts = request_line.decode('latin-1').split()
+            path = parts[1].split('?', 1)[0] if len(parts) > 1 else ''
+            
+            if path == '/metrics':
+                status, body = '200 OK', self.registry.render()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/healthz':
+                ready, detail = self.readiness_check()
+                status = '200 OK' if ready else '503 Service Unavailable'
+                body = detail + '\n'
+                content_type = 'text/plain; charset=utf-8'
+            else:
+                status, body, content_type = '404 Not Found', 'not found\n', 'text/plain; charset=utf-8'
+            
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Error serving metrics request: {e}")
+        finally:
+            writer.close()
@@ -0,0 +1,160 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+from .schedule_index import ScheduleIndex
+from .task_index import TaskRecord
+
+logger = logging.getLogger(__name__)
+
+
+class SpreadsheetMirror:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS employees (
+            name TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            position TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            row_index INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            period TEXT NOT NULL,
+            period_days INTEGER,
+            last_cleaned TEXT NOT NULL,
+            next_cleaning TEXT NOT NULL,
+            completed_by TEXT NOT NULL,
+            status TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS schedule_months (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            PRIMARY KEY (year, month)
+        );
+        CREATE TABLE IF NOT EXISTS shifts (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            position_in_day INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            username TEXT NOT NULL,
+            position TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            shift_raw TEXT NOT NULL,
+            PRIMARY KEY (year, month, day, position_in_day)
+        );
+    """
+
+    def __init__(self, config_dir: str = 'configs'):
+        self.config_dir = Path(config_dir)
+        self.db_file = self.config_dir / 'mirror.sqlite3'
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def save(self, employees: Dict[str, Dict], tasks: List[TaskRecord], schedule: ScheduleIndex,
+             synced_at: datetime, modified_time: Optional[str]):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM employees')
+                conn.executemany(
+                    'INSERT INTO employees VALUES (?, ?, ?)',
+                    [(name, info['username'], info['position']) for name, info in employees.items()]
+                )
+                
+                conn.execute('DELETE FROM tasks')
+                conn.executemany(
+                    'INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (task.row_index, task.name, task.period, task.period_days,
+                         task.last_cleaned, task.next_cleaning, task.completed_by, task.status)
+                        for task in tasks
+                    ]
+                )
+                
+                conn.execute('DELETE FROM schedule_months')
+                conn.execute('DELETE FROM shifts')
+                for (year, month), shifts_by_day in schedule.months.items():
+                    conn.execute('INSERT INTO schedule_months VALUES (?, ?)', (year, month))
+                    conn.executemany(
+                        'INSERT INTO shifts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        [
+                            (year, month, day, index, shift['name'], shift['username'], shift['position'],
+                             shift['start_time'], shift['end_time'], shift['shift_raw'])
+                            for day, shifts in shifts_by_day.items()
+                            for index, shift in enumerate(shifts)
+                        ]
+                    )
+                
+                conn.executemany(
+                    'INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                    [('synced_at', synced_at.isoformat()), ('modified_time', modified_time)]
+                )
+        finally:
+            conn.close()
+        
+        logger.info(f"Saved spreadsheet mirror: {len(employees)} employees, {len(tasks)} tasks, {len(schedule.months)} months")
+
+    def load(self) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            meta = dict(conn.execute('SELECT key, value FROM meta'))
+            if 'synced_at' not in meta:
+                return None
+            
+            employees = {
+                name: {'username': username, 'position': position}
+                for name, username, position in conn.execute('SELECT name, username, position FROM employees')
+            }
+            
+            tasks = [
+                TaskRecord(*row) for row in conn.execute(
+                    'SELECT row_index, name, period, period_days, last_cleaned, next_cleaning, completed_by, status '
+                    'FROM tasks ORDER BY row_index'
+                )
+            ]
+            
+            months = {(year, month): {} for year, month in conn.execute('SELECT year, month FROM schedule_months')}
+            rows = conn.execute(
+                'SELECT year, month, day, name, username, position, start_time, end_time, shift_raw '
+                'FROM shifts ORDER BY year, month, day, position_in_day'
+            )
+            for year, month, day, name, username, position, start_time, end_time, shift_raw in rows:
+                months[(year, month)].setdefault(day, []).append({
+                    'name': name,
+                    'username': username,
+                    'position': position,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'shift_raw': shift_raw,
+                    'date': datetime(year, month, day)
+                })
+        finally:
+            conn.close()
+        
+        schedule = ScheduleIndex()
+        for (year, month), shifts_by_day in months.items():
+            schedule.set_month(year, month, shifts_by_day)
+        
+        return {
+            'employees': employees,
+            'tasks': tasks,
+            'schedule': schedule,
+            'synced_at': datetime.fromisoformat(meta['synced_at']),
+            'modified_time': meta.get('modified_time')
+        }
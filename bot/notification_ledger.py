@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationLedger:
+    def __init__(self, config_dir: str = 'configs', retention_days: int = 7, commit_window: float = 0.01):
+        self.config_dir = Path(config_dir)
+        self.ledger_file = self.config_dir / 'notifications_sent.json'
+        self.retention_days = retention_days
+        self.commit_window = commit_window
+        self.entries: Dict[str, Dict] = {}
+        self._save_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not self.ledger_file.exists():
+            return
+        try:
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+            logger.info(f"Loaded {len(self.entries)} notification ledger entries")
+            
+            interrupted = [key for key, entry in self.entries.items() if entry['status'] == 'sending']
+            if interrupted:
+                logger.warning(f"Notifications interrupted mid-send, not resending: {', '.join(interrupted)}")
+        except Exception as e:
+            logger.error(f"Error loading notification ledger: {e}")
+            self.entries = {}
+
+    async def _save(self):
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._flush())
+        
+        await asyncio.shield(self._save_task)
+
+    async def _flush(self):
+        await asyncio.sleep(self.commit_window)
+        
+        entries = dict(self.entries)
+        self._save_task = None
+        
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, entries)
+
+    def _write(self, entries: Dict[str, Dict]):
+        try:
+            tmp_file = self.ledger_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.ledger_file)
+        except Exception as e:
+            logger.error(f"Error saving notification ledger: {e}")
+
+    def _key(self, shift_date: date, username: str) -> str:
+        return f"{shift_date.isoformat()}|{username.lower()}"
+
+    def was_sent(self, shift_date: date, username: str) -> bool:
+        return self._key(shift_date, username) in self.entries
+
+    async def claim(self, shift_date: date, username: str) -> bool:
+        key = self._key(shift_date, username)
+        if key in self.entries:
+            return False
+        self.entries[key] = {'status': 'sending', 'at': datetime.now().isoformat()}
+        await self._save()
+        return True
+
+    async def mark_sent(self, shift_date: date, username: str):
+        self.entries[self._key(shift_date, username)] = {'status': 'sent', 'at': datetime.now().isoformat()}
+        self._prune(shift_date)
+        await self._save()
+
+    async def mark_failed(self, shift_date: date, username: str):
+        self.entries[self._key(shift_date, username)] = {'status': 'failed', 'at': datetime.now().isoformat()}
+        self._prune(shift_date)
+        await self._save()
+
+    async def release(self, shift_date: date, username: str):
+        self.entries.pop(self._key(shift_date, username), None)
+        await self._save()
+
+    def _prune(self, today: date):
+        cutoff = (today - timedelta(days=self.retention_days)).isoformat()
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if key.split('|', 1)[0] >= cutoff
+        }
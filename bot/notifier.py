@@ -0,0 +1,104 @@
+import asyncio
+import random
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+import logging
+from telegram import Bot
+from telegram.error import RetryAfter, NetworkError, BadRequest, Forbidden, TelegramError
+from .metrics import NOTIFICATION_SEND_SECONDS, NOTIFICATION_SEND_FAILURES, NOTIFICATION_SEND_RETRIES
+
+logger = logging.getLogger(__name__)
+
+SENT = 'sent'
+RETRYABLE = 'retryable'
+PERMANENT = 'permanent'
+
+
+class NotificationDispatcher:
+    def __init__(self, bot: Bot, global_rate: float = 25.0, per_chat_interval: float = 1.0,
+                 max_concurrency: int = 16, max_retries: int = 3, base_backoff: float = 1.0):
+        self.bot = bot
+        self.global_interval = 1.0 / global_rate
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_global_slot = 0.0
+        self._paused_until = 0.0
+        self._next_chat_slot: Dict[int, float] = {}
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> str:
+        started = time.monotonic()
+        
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._wait_for_slot(chat_id)
+                
+                try:
+                    await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                    self._record_success(time.monotonic() - started)
+                    return SENT
+                
+                except RetryAfter as e:
+                    delay = _retry_after_seconds(e)
+                    NOTIFICATION_SEND_RETRIES.inc('rate_limited')
+                    self._pause_until(time.monotonic() + delay)
+                    logger.warning(f"Flood limit hit sending to {chat_id}, retrying in {delay:.1f}s")
+                
+                except (BadRequest, Forbidden) as e:
+                    self._record_failure(chat_id, e)
+                    return PERMANENT
+                
+                except NetworkError as e:
+                    delay = self.base_backoff * 2 ** attempt
+                    delay += random.uniform(0, delay)
+                    NOTIFICATION_SEND_RETRIES.inc('network')
+                    logger.warning(f"Network error sending to {chat_id}: {e}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                
+                except TelegramError as e:
+                    self._record_failure(chat_id, e)
+                    return RETRYABLE
+            
+            self._record_failure(chat_id, None)
+            return RETRYABLE
+
+    async def _wait_for_slot(self, chat_id: int):
+        while True:
+            now = time.monotonic()
+            
+            if self._paused_until > now:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            
+            global_slot = max(now, self._next_global_slot)
+            chat_slot = max(now, self._next_chat_slot.get(chat_id, 0.0))
+            slot = max(global_slot, chat_slot)
+            
+            self._next_global_slot = max(self._next_global_slot, slot) + self.global_interval
+            self._next_chat_slot[chat_id] = slot + self.per_chat_interval
+            
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            
+            if self._paused_until <= time.monotonic():
+                return
+
+    def _pause_until(self, resume_at: float):
+        self._paused_until = max(self._paused_until, resume_at)
+        self._next_global_slot = max(self._next_global_slot, resume_at)
+
+    def _record_success(self, latency: float):
+        NOTIFICATION_SEND_SECONDS.observe(latency)
+
+    def _record_failure(self, chat_id: int, error: Optional[Exception]):
+        NOTIFICATION_SEND_FAILURES.inc(type(error).__name__ if error else 'RetriesExhausted')
+        logger.error(f"Failed to send notification to {chat_id}: {error or 'retries exhausted'}")
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
@@ -0,0 +1,268 @@
+import asyncio
+import contextvars
+import functools
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+from .storage import StorageBackend, WorksheetBackend, StorageQuotaError
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+INTERACTIVE = 0
+WRITE = 1
+REFRESH = 2
+ADMIN = 3
+
+PRIORITY_NAMES = {
+    INTERACTIVE: 'interactive',
+    WRITE: 'write',
+    REFRESH: 'refresh',
+    ADMIN: 'admin'
+}
+
+RESERVED_FRACTION = {
+    INTERACTIVE: 0.0,
+    WRITE: 0.1,
+    REFRESH: 0.3,
+    ADMIN: 0.5
+}
+
+SHEETS_QUOTA_TOKENS = REGISTRY.counter(
+    'sheets_quota_tokens_total',
+    'Google Sheets requests admitted by the rate limiter',
+    ['site', 'priority']
+)
+SHEETS_QUOTA_WAIT_SECONDS = REGISTRY.histogram(
+    'sheets_quota_wait_seconds',
+    'Time Google Sheets requests waited for a rate limiter token',
+    ['priority'],
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+SHEETS_QUOTA_EXCEEDED = REGISTRY.counter(
+    'sheets_quota_exceeded_total',
+    'Google Sheets requests rejected with 429',
+    ['site']
+)
+
+_call_site: contextvars.ContextVar[Optional[Tuple[int, str]]] = contextvars.ContextVar('sheets_call_site', default=None)
+
+
+def sheets_call(priority: int):
+    def decorator(func):
+        site = func.__name__
+        
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _call_site.get() is not None:
+                    return await func(*args, **kwargs)
+                token = _call_site.set((priority, site))
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _call_site.reset(token)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _call_site.get() is not None:
+                return func(*args, **kwargs)
+            token = _call_site.set((priority, site))
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _call_site.reset(token)
+        return wrapper
+    
+    return decorator
+
+
+def current_call_site() -> Tuple[int, str]:
+    return _call_site.get() or (REFRESH, 'unattributed')
+
+
+def _is_quota_error(error: Exception) -> bool:
+    return isinstance(error, StorageQuotaError) or getattr(error, 'code', None) == 429
+
+
+class SheetsRateLimiter:
+    def __init__(self, requests_per_minute: int = 60, burst: Optional[int] = None, max_retries: int = 5,
+                 base_backoff: float = 1.0, max_backoff: float = 64.0):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or max(1, requests_per_minute // 4))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._level = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.usage: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._level
+
+    def run(self, func: Callable, *args, **kwargs):
+        priority, site = current_call_site()
+        
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            delay = self._reserve(priority)
+            while delay > 0:
+                time.sleep(delay)
+                delay = self._reserve(priority)
+            self._admitted(priority, site, time.monotonic() - started)
+            
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not _is_quota_error(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(self._throttled(site, attempt, e))
+
+    async def run_async(self, func: Callable[[], Awaitable]):
+        priority, site = current_call_site()
+        
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            delay = self._reserve(priority)
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self._reserve(priority)
+            self._admitted(priority, site, time.monotonic() - started)
+            
+            try:
+                return await func()
+            except Exception as e:
+                if not _is_quota_error(e) or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._throttled(site, attempt, e))
+
+    def report(self) -> List[str]:
+        lines = []
+        for site, stats in sorted(self.usage.items(), key=lambda item: -item[1]['tokens']):
+            lines.append(
+                f"{site}: {stats['tokens']:.0f} requests, waited {stats['waited']:.1f}s, "
+                f"{stats['throttled']:.0f} rejected with 429"
+            )
+        return lines
+
+    def _reserve(self, priority: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            
+            if self._paused_until > now:
+                return self._paused_until - now
+            
+            needed = min(self.capacity, 1.0 + RESERVED_FRACTION[priority] * self.capacity)
+            if self._level < needed:
+                return (needed - self._level) / self.rate
+            
+            self._level -= 1.0
+            return 0.0
+
+    def _admitted(self, priority: int, site: str, waited: float):
+        with self._lock:
+            stats = self._stats(site)
+            stats['tokens'] += 1
+            stats['waited'] += waited
+        
+        SHEETS_QUOTA_TOKENS.inc(site, PRIORITY_NAMES[priority])
+        SHEETS_QUOTA_WAIT_SECONDS.observe(waited, PRIORITY_NAMES[priority])
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _stats(self, site: str) -> Dict[str, float]:
+        stats = self.usage.get(site)
+        if stats is None:
+            stats = self.usage[site] = {'tokens': 0, 'waited': 0.0, 'throttled': 0}
+        return stats
+
+    def _throttled(self, site: str, attempt: int, error: Exception) -> float:
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        delay += random.uniform(0, delay / 2)
+        
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + delay)
+            self._level = min(self._level, 0.0)
+            self._stats(site)['throttled'] += 1
+        
+        SHEETS_QUOTA_EXCEEDED.inc(site)
+        logger.warning(f"Google Sheets quota exceeded in {site} ({error}), backing off {delay:.1f}s")
+        return delay
+
+
+class RateLimitedWorksheet(WorksheetBackend):
+    def __init__(self, worksheet: WorksheetBackend, limiter: SheetsRateLimiter):
+        self._worksheet = worksheet
+        self._limiter = limiter
+
+    @property
+    def title(self) -> str:
+        return self._worksheet.title
+
+    @property
+    def row_count(self) -> int:
+        return self._worksheet.row_count
+
+    def get_all_values(self) -> List[List[str]]:
+        return self._limiter.run(self._worksheet.get_all_values)
+
+    def get_all_records(self) -> List[Dict]:
+        return self._limiter.run(self._worksheet.get_all_records)
+
+    def row_values(self, row: int) -> List[str]:
+        return self._limiter.run(self._worksheet.row_values, row)
+
+    def update(self, range_name: str, values: List[List]):
+        return self._limiter.run(self._worksheet.update, range_name, values)
+
+    def update_cell(self, row: int, col: int, value):
+        return self._limiter.run(self._worksheet.update_cell, row, col, value)
+
+    def batch_update(self, data: List[Dict], value_input_option: str = 'RAW'):
+        return self._limiter.run(self._worksheet.batch_update, data, value_input_option)
+
+    def format(self, range_name: str, cell_format: Dict):
+        return self._limiter.run(self._worksheet.format, range_name, cell_format)
+
+    def merge_cells(self, range_name: str):
+        return self._limiter.run(self._worksheet.merge_cells, range_name)
+
+
+class RateLimitedBackend(StorageBackend):
+    def __init__(self, backend: StorageBackend, limiter: SheetsRateLimiter):
+        self._backend = backend
+        self._limiter = limiter
+
+    def worksheet(self, title: str) -> WorksheetBackend:
+        return RateLimitedWorksheet(self._limiter.run(self._backend.worksheet, title), self._limiter)
+
+    def worksheets(self) -> List[WorksheetBackend]:
+        return [RateLimitedWorksheet(ws, self._limiter) for ws in self._limiter.run(self._backend.worksheets)]
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> WorksheetBackend:
+        return RateLimitedWorksheet(self._limiter.run(self._backend.add_worksheet, title, rows, cols), self._limiter)
+
+    def values_batch_get(self, ranges: List[str]) -> Dict:
+        return self._limiter.run(self._backend.values_batch_get, ranges)
+
+    def values_batch_update(self, body: Dict) -> Dict:
+        return self._limiter.run(self._backend.values_batch_update, body)
+
+    def values_append(self, cell_range: str, values: List[List], value_input_option: str = 'RAW') -> Dict:
+        return self._limiter.run(self._backend.values_append, cell_range, values, value_input_option)
+
+    def get_lastUpdateTime(self) -> str:
+        return self._limiter.run(self._backend.get_lastUpdateTime)
@@ -0,0 +1,83 @@
+from bisect import bisect_right
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleIndex:
+    def __init__(self):
+        self.months: Dict[Tuple[int, int], Dict[int, List[Dict]]] = {}
+        self._user_keys: Dict[str, List[Tuple[int, int]]] = {}
+        self._user_shifts: Dict[str, List[Dict]] = {}
+
+    def has_month(self, year: int, month: int) -> bool:
+        return (year, month) in self.months
+
+    def set_month(self, year: int, month: int, shifts_by_day: Dict[int, List[Dict]]):
+        self.months[(year, month)] = shifts_by_day
+        self._rebuild_user_index()
+
+    def shifts_on(self, day: date) -> Optional[List[Dict]]:
+        month_shifts = self.months.get((day.year, day.month))
+        if month_shifts is None:
+            return None
+        return month_shifts.get(day.day, [])
+
+    def next_shift(self, name: str, now: datetime, max_days_ahead: int = 30) -> Optional[Dict]:
+        keys = self._user_keys.get(name)
+        
+        if not keys:
+            return None
+        
+        today_ordinal = now.date().toordinal()
+        position = bisect_right(keys, (today_ordinal, now.hour * 60 + now.minute))
+        
+        if position == len(keys):
+            return None
+        
+        if keys[position][0] > today_ordinal + max_days_ahead:
+            return None
+        
+        return self._user_shifts[name][position]
+
+    def _rebuild_user_index(self):
+        entries: Dict[str, List[Tuple[int, int, Dict]]] = {}
+        
+        for (year, month), shifts_by_day in self.months.items():
+            for day, shifts in shifts_by_day.items():
+                ordinal = date(year, month, day).toordinal()
+                for shift in shifts:
+                    start_minutes = _time_to_minutes(shift['start_time'])
+                    if start_minutes is None:
+                        continue
+                    entries.setdefault(shift['name'], []).append(
+                        (ordinal, start_minutes, shift)
+                    )
+        
+        self._user_keys = {}
+        self._user_shifts = {}
+        
+        for key, user_entries in entries.items():
+            user_entries.sort(key=lambda e: (e[0], e[1]))
+            self._user_keys[key] = [(e[0], e[1]) for e in user_entries]
+            self._user_shifts[key] = [e[2] for e in user_entries]
+
+
+def months_in_range(start: datetime, days: int) -> List[Tuple[int, int]]:
+    months = []
+    for offset in range(days + 1):
+        day = start + timedelta(days=offset)
+        key = (day.year, day.month)
+        if key not in months:
+            months.append(key)
+    return months
+
+
+def _time_to_minutes(time_str: Optional[str]) -> Optional[int]:
+    try:
+        parsed = datetime.strptime(time_str, "%H:%M")
+        return parsed.hour * 60 + parsed.minute
+    except (TypeError, ValueError):
+        return None
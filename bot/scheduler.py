@@ -1,112 +1,339 @@
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
-from datetime import datetime, timedelta
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from datetime import datetime, date, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
 import logging
+import time
 import pytz
-from .table_manager import TableManager
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
+from .config import Config
 from .members_manager import MembersManager
 from .cache_manager import CacheManager
+from .notifier import NotificationDispatcher, SENT, PERMANENT
+from .notification_ledger import NotificationLedger
+from .metrics import NOTIFICATION_LAG_SECONDS, PIPELINE_STAGE_SECONDS, PIPELINE_NOTIFY_SKIPPED
 
 logger = logging.getLogger(__name__)
 
 
-async def refresh_cache_job(cache_manager: CacheManager):
+async def refresh_cache_job(cache_manager: CacheManager, scheduler: AsyncIOScheduler, config: Config, pipeline: 'RefreshPipeline'):
     try:
         logger.info("Running scheduled cache refresh")
-        await cache_manager.refresh_from_sheets()
-        logger.info("Cache refresh completed")
+        await pipeline.refresh()
     except Exception as e:
         logger.error(f"Error in refresh_cache_job: {e}")
+    finally:
+        schedule_next_refresh(cache_manager, scheduler, config, pipeline)
 
 
-async def check_and_send_notifications(bot: Bot, cache_manager: CacheManager, members_manager: MembersManager, timezone_str: str, offset_minutes: int):
+def schedule_next_refresh(cache_manager: CacheManager, scheduler: AsyncIOScheduler, config: Config, pipeline: 'RefreshPipeline',
+                          interval: Optional[int] = None):
+    tz = pytz.timezone(config.timezone)
+    now = datetime.now(tz)
+    
+    if interval is None:
+        interval = cache_manager.get_refresh_interval(
+            now,
+            config.refresh_interval_fast,
+            config.refresh_interval_normal,
+            config.refresh_interval_slow
+        )
+        if cache_manager.is_stale:
+            interval = config.refresh_interval_fast
+    
+    run_date = pipeline.staggered(now + timedelta(seconds=interval))
+    
+    scheduler.add_job(
+        refresh_cache_job,
+        trigger=DateTrigger(run_date=run_date, timezone=tz),
+        args=[cache_manager, scheduler, config, pipeline],
+        id=f'refresh_cache_{pipeline.name}',
+        name=f'Refresh {pipeline.name} cache from Google Sheets',
+        misfire_grace_time=None,
+        coalesce=True,
+        replace_existing=True
+    )
+    
+    logger.info(f"Next {pipeline.name} cache refresh in {(run_date - now).total_seconds():.0f} seconds")
+
+
+async def prepare_next_day_job(pipeline: 'RefreshPipeline', day: date):
     try:
-        tz = pytz.timezone(timezone_str)
-        now = datetime.now(tz)
-        target_time = now + timedelta(minutes=offset_minutes)
-        
-        logger.info(f"Checking for shifts starting at {target_time.strftime('%H:%M')}")
-        
-        cache_manager.invalidate_if_date_changed()
-        
-        shifts = cache_manager.cache.get('shifts_today', [])
-        
-        if not shifts:
-            logger.info("No shifts found for today")
-            return
-        
-        tasks = cache_manager.cache.get('tasks', [])
-        tasks_today = [t for t in tasks if cache_manager._should_clean_today(t, now)]
-        
-        if not tasks_today:
-            logger.info("No tasks found for today")
-        
-        for shift in shifts:
-            if _should_notify(shift, now, target_time, offset_minutes):
-                await _send_employee_tasks(bot, shift, tasks_today, now, members_manager)
-        
+        await pipeline.prepare_next_day(day)
     except Exception as e:
-        logger.error(f"Error in check_and_send_notifications: {e}")
+        logger.error(f"Error preparing snapshot for {day}: {e}")
 
 
-def _should_notify(shift: dict, now: datetime, target_time: datetime, offset_minutes: int) -> bool:
+async def day_rollover_job(cache_manager: CacheManager, scheduler: AsyncIOScheduler, config: Config, pipeline: 'RefreshPipeline', day: date):
     try:
-        start_time_str = shift['start_time']
-        
-        if not start_time_str:
-            return False
-        
-        shift_start = datetime.strptime(start_time_str, "%H:%M").time()
-        
-        shift_datetime = now.replace(
-            hour=shift_start.hour,
-            minute=shift_start.minute,
-            second=0,
-            microsecond=0
-        )
+        await pipeline.roll_over(day)
+    except Exception as e:
+        logger.error(f"Error rolling over to {day}: {e}")
+    finally:
+        schedule_day_rollover(cache_manager, scheduler, config, pipeline)
+
+
+def schedule_day_rollover(cache_manager: CacheManager, scheduler: AsyncIOScheduler, config: Config, pipeline: 'RefreshPipeline'):
+    tz = pytz.timezone(config.timezone)
+    now = datetime.now(tz)
+    next_day = now.date() + timedelta(days=1)
+    midnight = tz.localize(datetime.combine(next_day, datetime.min.time()))
+    prepare_at = max(pipeline.staggered(midnight - timedelta(minutes=config.rollover_prepare_minutes)), now)
+    
+    scheduler.add_job(
+        prepare_next_day_job,
+        trigger=DateTrigger(run_date=prepare_at, timezone=tz),
+        args=[pipeline, next_day],
+        id=f'prepare_next_day_{pipeline.name}',
+        name=f'Prepare {pipeline.name} snapshot for {next_day}',
+        misfire_grace_time=config.rollover_prepare_minutes * 60,
+        replace_existing=True
+    )
+    scheduler.add_job(
+        day_rollover_job,
+        trigger=DateTrigger(run_date=midnight, timezone=tz),
+        args=[cache_manager, scheduler, config, pipeline, next_day],
+        id=f'day_rollover_{pipeline.name}',
+        name=f'Switch {pipeline.name} to snapshot for {next_day}',
+        misfire_grace_time=None,
+        replace_existing=True
+    )
+    
+    logger.info(f"Snapshot of {pipeline.name} for {next_day} will be prepared at {prepare_at.strftime('%H:%M:%S')} and switched in at midnight")
+
+
+class NotificationPlanner:
+    JOB_PREFIX = 'notify_'
+    
+    def __init__(self, scheduler: AsyncIOScheduler, dispatcher: NotificationDispatcher, cache_manager: CacheManager,
+                 members_manager: MembersManager, ledger: NotificationLedger, timezone_str: str, offset_minutes: int,
+                 horizon_days: int = 1, job_prefix: str = JOB_PREFIX):
+        self.scheduler = scheduler
+        self.dispatcher = dispatcher
+        self.cache_manager = cache_manager
+        self.members_manager = members_manager
+        self.ledger = ledger
+        self.tz = pytz.timezone(timezone_str)
+        self.offset_minutes = offset_minutes
+        self.horizon_days = horizon_days
+        self.job_prefix = job_prefix
+        self.planned_version: Optional[int] = None
+    
+    def reschedule(self, version: Optional[int] = None):
+        try:
+            now = datetime.now(self.tz)
+            planned = self._plan(now)
+            
+            existing = {
+                job.id: job for job in self.scheduler.get_jobs()
+                if job.id.startswith(self.job_prefix)
+            }
+            
+            added = changed = removed = 0
+            
+            for job_id, job in existing.items():
+                if job_id not in planned:
+                    job.remove()
+                    removed += 1
+            
+            for job_id, (run_date, kwargs) in planned.items():
+                job = existing.get(job_id)
+                
+                if job and job.kwargs == kwargs:
+                    continue
+                
+                self.scheduler.add_job(
+                    send_shift_notification,
+                    trigger=DateTrigger(run_date=run_date, timezone=self.tz),
+                    args=[self],
+                    kwargs=kwargs,
+                    id=job_id,
+                    name=f"Notify {kwargs['username']} about {kwargs['start_time']} shift",
+                    misfire_grace_time=self.offset_minutes * 60,
+                    replace_existing=True
+                )
+                
+                if job:
+                    changed += 1
+                else:
+                    added += 1
+            
+            if added or changed or removed:
+                logger.info(f"Notification jobs: +{added} new, ~{changed} rescheduled, -{removed} removed")
+            
+            self.planned_version = version
         
-        time_diff = (shift_datetime - now).total_seconds() / 60
+        except Exception as e:
+            logger.error(f"Error scheduling notifications: {e}")
+    
+    def mark_dirty(self):
+        self.planned_version = None
+    
+    def _plan(self, now: datetime) -> Dict[str, tuple]:
+        planned = {}
         
-        if offset_minutes - 5 <= time_diff <= offset_minutes + 5:
-            logger.info(f"Should notify {shift['name']} - shift starts at {start_time_str}")
-            return True
+        for days_ahead in range(self.horizon_days + 1):
+            shift_date = (now + timedelta(days=days_ahead)).date()
+            
+            for shift in self.cache_manager.get_shifts_for_date(shift_date):
+                shift_start = _localize_shift_start(self.tz, shift_date, shift['start_time'])
+                
+                if not shift_start or shift_start <= now:
+                    continue
+                
+                if self.ledger.was_sent(shift_date, shift['username']):
+                    continue
+                
+                if not self.members_manager.get_user_id(shift['username']):
+                    continue
+                
+                run_date = max(shift_start - timedelta(minutes=self.offset_minutes), now)
+                job_id = f"{self.job_prefix}{shift_date.isoformat()}_{shift['username'].lower()}"
+                
+                planned[job_id] = (run_date, {
+                    'shift_date': shift_date,
+                    'username': shift['username'],
+                    'start_time': shift['start_time']
+                })
         
-        return False
+        return planned
+
+
+class RefreshPipeline:
+    def __init__(self, cache_manager: CacheManager, planner: NotificationPlanner, name: str = 'default',
+                 stagger_offset: float = 0.0, stagger_window: float = 0.0):
+        self.cache_manager = cache_manager
+        self.planner = planner
+        self.name = name
+        self.stagger_offset = stagger_offset
+        self.stagger_window = stagger_window
+        self.last_timings: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+    
+    def staggered(self, run_date: datetime) -> datetime:
+        if not self.stagger_window:
+            return run_date
+        delay = (self.stagger_offset - run_date.timestamp()) % self.stagger_window
+        return run_date + timedelta(seconds=delay)
+    
+    async def refresh(self, force: bool = False):
+        await self._run('refresh', lambda: self.cache_manager.refresh_from_sheets(force))
+    
+    async def prepare_next_day(self, day: date):
+        await self._run('prepare', lambda: self.cache_manager.prepare_next_day(day))
+    
+    async def roll_over(self, day: date):
+        async def produce():
+            self.cache_manager.roll_over(day)
         
-    except Exception as e:
-        logger.error(f"Error checking notification time: {e}")
-        return False
+        await self._run('rollover', produce)
+    
+    async def initialize(self):
+        await self._run('initialize', self.cache_manager.initialize)
+    
+    async def _run(self, stage: str, produce: Callable[[], Awaitable]):
+        async with self._lock:
+            timings = {}
+            
+            started = time.perf_counter()
+            try:
+                await produce()
+            finally:
+                timings[stage] = time.perf_counter() - started
+                PIPELINE_STAGE_SECONDS.observe(timings[stage], stage)
+            
+            version = self.cache_manager.version
+            
+            if version == self.planner.planned_version:
+                PIPELINE_NOTIFY_SKIPPED.inc()
+                notify_note = f"notify skipped, snapshot v{version} unchanged"
+            else:
+                started = time.perf_counter()
+                self.planner.reschedule(version)
+                timings['notify'] = time.perf_counter() - started
+                PIPELINE_STAGE_SECONDS.observe(timings['notify'], 'notify')
+                notify_note = f"notify {timings['notify'] * 1000:.1f}ms against snapshot v{version}"
+            
+            self.last_timings = timings
+            logger.info(f"Pipeline {self.name} {stage}: {stage} {timings[stage] * 1000:.1f}ms, {notify_note}")
 
 
-async def _send_employee_tasks(bot: Bot, shift: dict, tasks: list, today: datetime, members_manager: MembersManager):
+async def send_shift_notification(planner: NotificationPlanner, shift_date: date, username: str, start_time: str):
     try:
-        username = shift['username']
-        employee_name = shift['name']
-        start_time = shift['start_time']
+        shifts = planner.cache_manager.get_shifts_for_date(shift_date)
+        shift = next((s for s in shifts if s['username'] == username and s['start_time'] == start_time), None)
         
-        user_id = members_manager.get_user_id(username)
+        if not shift:
+            logger.info(f"Shift of {username} at {start_time} on {shift_date} no longer scheduled, skipping notification")
+            return
         
-        if not user_id:
-            logger.warning(f"User @{username} ({employee_name}) hasn't started the bot yet")
+        message = _build_employee_message(
+            shift,
+            planner.cache_manager.get_tasks_for_date(shift_date),
+            datetime.combine(shift_date, datetime.min.time()),
+            planner.members_manager
+        )
+        
+        if not message:
             return
         
-        message_text = _build_notification_message(tasks, start_time, today)
-        keyboard = _build_tasks_keyboard(tasks)
+        if not await planner.ledger.claim(shift_date, username):
+            logger.info(f"Notification for {username} on {shift_date} already sent")
+            return
         
-        await bot.send_message(
-            chat_id=user_id,
-            text=message_text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='HTML'
-        )
+        result = await planner.dispatcher.send(**message)
         
-        logger.info(f"Notification sent to {employee_name} (@{username})")
+        if result == SENT:
+            await planner.ledger.mark_sent(shift_date, username)
+            shift_start = _localize_shift_start(planner.tz, shift_date, start_time)
+            if shift_start:
+                planned_at = shift_start - timedelta(minutes=planner.offset_minutes)
+                NOTIFICATION_LAG_SECONDS.observe((datetime.now(planner.tz) - planned_at).total_seconds())
+            logger.info(f"Notification sent to {shift['name']} (@{username})")
+        elif result == PERMANENT:
+            await planner.ledger.mark_failed(shift_date, username)
+            logger.warning(f"Notification to {username} for {shift_date} was rejected by Telegram, not retrying")
+        else:
+            await planner.ledger.release(shift_date, username)
+            planner.mark_dirty()
+            logger.warning(f"Notification to {username} for {shift_date} failed, will retry on the next planning pass")
         
     except Exception as e:
-        logger.error(f"Error sending notification to {shift['name']}: {e}")
+        logger.error(f"Error sending notification to {username}: {e}")
+
+
+def _localize_shift_start(tz, shift_date: date, start_time_str: str) -> Optional[datetime]:
+    try:
+        start_time = datetime.strptime(start_time_str, "%H:%M").time()
+        return tz.localize(datetime.combine(shift_date, start_time))
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_employee_message(shift: dict, tasks: list, today: datetime, members_manager: MembersManager) -> Optional[dict]:
+    username = shift['username']
+    employee_name = shift['name']
+    
+    user_id = members_manager.get_user_id(username)
+    
+    if not user_id:
+        logger.warning(f"User @{username} ({employee_name}) hasn't started the bot yet")
+        return None
+    
+    logger.info(f"Queueing notification for {employee_name} (@{username})")
+    
+    return {
+        'chat_id': user_id,
+        'text': _build_notification_message(tasks, shift['start_time'], today),
+        'reply_markup': InlineKeyboardMarkup(_build_tasks_keyboard(tasks)),
+        'parse_mode': 'HTML'
+    }
 
 
 def _build_notification_message(tasks: list, start_time: str, today: datetime) -> str:
     total_tasks = len(tasks)
+    day_ordinal = today.toordinal()
     
     text = f"☕️ <b>Привет!</b>\n\n"
     text += f"Твоя смена начинается в {start_time}\n"
@@ -116,13 +343,12 @@ def _build_notification_message(tasks: list, start_time: str, today: datetime) -
         text += "Ура! Сегодня ничего не требуется 🎉\n"
     else:
         for task in tasks:
-            is_overdue = _is_task_overdue(task, today)
+            days = task.days_overdue(day_ordinal)
             
-            if is_overdue:
-                days = (today - datetime.strptime(task['next_cleaning'], "%d.%m.%Y")).days
-                text += f"⚠️ <b>{task['name']}</b> <i>(просрочена на {days} дн.!)</i>\n"
+            if days > 0:
+                text += f"⚠️ <b>{task.name}</b> <i>(просрочена на {days} дн.!)</i>\n"
             else:
-                text += f"⏳ <b>{task['name']}</b>\n"
+                text += f"⏳ <b>{task.name}</b>\n"
     
         text += f"\n<b>Всего задач: {total_tasks}</b>"
     
@@ -136,22 +362,9 @@ def _build_tasks_keyboard(tasks: list) -> list:
     
     for task in tasks:
         button = InlineKeyboardButton(
-            text=f"✅ {task['name']}",
-            callback_data=f"complete_{task['row_index']}"
+            text=f"✅ {task.name}",
+            callback_data=f"complete_{task.row_index}"
         )
         keyboard.append([button])
     
     return keyboard
-
-
-def _is_task_overdue(task: dict, today: datetime) -> bool:
-    next_cleaning_str = task.get('next_cleaning', '')
-    
-    if not next_cleaning_str or next_cleaning_str == '-':
-        return False
-    
-    try:
-        next_cleaning = datetime.strptime(next_cleaning_str, "%d.%m.%Y")
-        return (today - next_cleaning).days > 0
-    except ValueError:
-        return False
\ No newline at end of file
@@ -0,0 +1,52 @@
+import threading
+from typing import Optional
+import gspread
+from google.oauth2.service_account import Credentials
+import logging
+from .async_sheets import AsyncSheetsClient
+from .storage import GspreadBackend
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+
+class SheetsConnection:
+    def __init__(self, credentials_file: str, limiter=None, max_connections: int = 10, max_concurrency: int = 8):
+        self.credentials_file = credentials_file
+        self.limiter = limiter
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.client = None
+        self.async_client: Optional[AsyncSheetsClient] = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            if self.client is not None:
+                return
+            
+            creds = Credentials.from_service_account_file(self.credentials_file, scopes=SCOPES)
+            client = gspread.authorize(creds)
+            self.async_client = AsyncSheetsClient(
+                creds,
+                max_connections=self.max_connections,
+                max_concurrency=self.max_concurrency,
+                limiter=self.limiter
+            )
+            self.client = client
+            logger.info("Successfully connected to Google Sheets")
+
+    def open(self, spreadsheet_id: str) -> GspreadBackend:
+        self.connect()
+        if self.limiter is None:
+            return GspreadBackend(self.client.open_by_key(spreadsheet_id))
+        return GspreadBackend(self.limiter.run(self.client.open_by_key, spreadsheet_id))
+
+    async def close(self):
+        if self.async_client:
+            await self.async_client.aclose()
+            self.async_client = None
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import logging
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+SHEETS_READS = REGISTRY.counter(
+    'sheets_reads_total',
+    'Google Sheets reads by how they were served',
+    ['result']
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def _consume_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memo: Dict[Hashable, Tuple[float, Any]] = {}
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            found, value = self._memo_get(key)
+            if found:
+                SHEETS_READS.inc('memo')
+                return value
+            
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            generation = self._generation
+        
+        if not leader:
+            call.done.wait()
+            SHEETS_READS.inc('shared')
+            if call.error is not None:
+                raise call.error
+            return call.value
+        
+        try:
+            call.value = func()
+            self._remember(key, call.value, generation)
+            SHEETS_READS.inc('fetched')
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            found, value = self._memo_get(key)
+            generation = self._generation
+        if found:
+            SHEETS_READS.inc('memo')
+            return value
+        
+        future = self._futures.get(key)
+        if future is not None:
+            SHEETS_READS.inc('shared')
+            return await asyncio.shield(future)
+        
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        self._futures[key] = future
+        
+        try:
+            value = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._futures.pop(key, None)
+        
+        future.set_result(value)
+        self._remember(key, value, generation)
+        SHEETS_READS.inc('fetched')
+        return value
+
+    def forget(self):
+        with self._lock:
+            self._generation += 1
+            self._memo.clear()
+
+    def _memo_get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._memo.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < time.monotonic():
+            del self._memo[key]
+            return False, None
+        return True, entry[1]
+
+    def _remember(self, key: Hashable, value: Any, generation: int):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._memo[key] = (time.monotonic() + self.ttl, value)
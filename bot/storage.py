@@ -0,0 +1,449 @@
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+import gspread
+
+logger = logging.getLogger(__name__)
+
+
+class StorageError(Exception):
+    pass
+
+
+class SheetNotFoundError(StorageError):
+    pass
+
+
+class StorageAPIError(StorageError):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+
+
+class StorageQuotaError(StorageAPIError):
+    def __init__(self, message: str = "Quota exceeded"):
+        super().__init__(429, message)
+
+
+class WorksheetBackend(ABC):
+    title: str
+    row_count: int
+
+    @abstractmethod
+    def get_all_values(self) -> List[List[str]]:
+        ...
+
+    @abstractmethod
+    def get_all_records(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def row_values(self, row: int) -> List[str]:
+        ...
+
+    @abstractmethod
+    def update(self, range_name: str, values: List[List]):
+        ...
+
+    @abstractmethod
+    def update_cell(self, row: int, col: int, value):
+        ...
+
+    @abstractmethod
+    def batch_update(self, data: List[Dict], value_input_option: str = 'RAW'):
+        ...
+
+    @abstractmethod
+    def format(self, range_name: str, cell_format: Dict):
+        ...
+
+    @abstractmethod
+    def merge_cells(self, range_name: str):
+        ...
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def worksheet(self, title: str) -> WorksheetBackend:
+        ...
+
+    @abstractmethod
+    def worksheets(self) -> List[WorksheetBackend]:
+        ...
+
+    @abstractmethod
+    def add_worksheet(self, title: str, rows: int, cols: int) -> WorksheetBackend:
+        ...
+
+    @abstractmethod
+    def values_batch_get(self, ranges: List[str]) -> Dict:
+        ...
+
+    @abstractmethod
+    def values_batch_update(self, body: Dict) -> Dict:
+        ...
+
+    @abstractmethod
+    def values_append(self, cell_range: str, values: List[List], value_input_option: str = 'RAW') -> Dict:
+        ...
+
+    @abstractmethod
+    def get_lastUpdateTime(self) -> str:
+        ...
+
+
+def _translate_errors(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except gspread.exceptions.WorksheetNotFound as e:
+            raise SheetNotFoundError(str(e)) from e
+        except gspread.exceptions.APIError as e:
+            code = getattr(e, 'code', 0) or 0
+            if code == 429:
+                raise StorageQuotaError(str(e)) from e
+            raise StorageAPIError(code, str(e)) from e
+    return wrapper
+
+
+class GspreadWorksheet(WorksheetBackend):
+    def __init__(self, worksheet: gspread.Worksheet):
+        self._worksheet = worksheet
+
+    @property
+    def title(self) -> str:
+        return self._worksheet.title
+
+    @property
+    def row_count(self) -> int:
+        return self._worksheet.row_count
+
+    @_translate_errors
+    def get_all_values(self) -> List[List[str]]:
+        return self._worksheet.get_all_values()
+
+    @_translate_errors
+    def get_all_records(self) -> List[Dict]:
+        return self._worksheet.get_all_records()
+
+    @_translate_errors
+    def row_values(self, row: int) -> List[str]:
+        return self._worksheet.row_values(row)
+
+    @_translate_errors
+    def update(self, range_name: str, values: List[List]):
+        return self._worksheet.update(values, range_name)
+
+    @_translate_errors
+    def update_cell(self, row: int, col: int, value):
+        return self._worksheet.update_cell(row, col, value)
+
+    @_translate_errors
+    def batch_update(self, data: List[Dict], value_input_option: str = 'RAW'):
+        return self._worksheet.batch_update(data, value_input_option=value_input_option)
+
+    @_translate_errors
+    def format(self, range_name: str, cell_format: Dict):
+        return self._worksheet.format(range_name, cell_format)
+
+    @_translate_errors
+    def merge_cells(self, range_name: str):
+        return self._worksheet.merge_cells(range_name)
+
+
+class GspreadBackend(StorageBackend):
+    def __init__(self, spreadsheet: gspread.Spreadsheet):
+        self._spreadsheet = spreadsheet
+
+    @_translate_errors
+    def worksheet(self, title: str) -> WorksheetBackend:
+        return GspreadWorksheet(self._spreadsheet.worksheet(title))
+
+    @_translate_errors
+    def worksheets(self) -> List[WorksheetBackend]:
+        return [GspreadWorksheet(ws) for ws in self._spreadsheet.worksheets()]
+
+    @_translate_errors
+    def add_worksheet(self, title: str, rows: int, cols: int) -> WorksheetBackend:
+        return GspreadWorksheet(self._spreadsheet.add_worksheet(title=title, rows=rows, cols=cols))
+
+    @_translate_errors
+    def values_batch_get(self, ranges: List[str]) -> Dict:
+        return self._spreadsheet.values_batch_get(ranges)
+
+    @_translate_errors
+    def values_batch_update(self, body: Dict) -> Dict:
+        return self._spreadsheet.values_batch_update(body)
+
+    @_translate_errors
+    def values_append(self, cell_range: str, values: List[List], value_input_option: str = 'RAW') -> Dict:
+        return self._spreadsheet.values_append(
+            cell_range,
+            {'valueInputOption': value_input_option, 'insertDataOption': 'INSERT_ROWS'},
+            {'values': values}
+        )
+
+    @_translate_errors
+    def get_lastUpdateTime(self) -> str:
+        return self._spreadsheet.get_lastUpdateTime()
+
+
+A1_PATTERN = re.compile(r'^([A-Za-z]*)(\d*)(?::([A-Za-z]*)(\d*))?$')
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index
+
+
+def split_a1(a1: str) -> Tuple[Optional[str], str]:
+    if '!' not in a1:
+        return None, a1
+    sheet_name, cell_range = a1.rsplit('!', 1)
+    if sheet_name.startswith("'") and sheet_name.endswith("'"):
+        sheet_name = sheet_name[1:-1].replace("''", "'")
+    return sheet_name, cell_range
+
+
+def parse_a1_range(cell_range: str) -> Tuple[int, int, Optional[int], Optional[int]]:
+    match = A1_PATTERN.match(cell_range.strip())
+    if not match:
+        raise StorageAPIError(400, f"Unable to parse range: {cell_range}")
+    
+    start_col, start_row, end_col, end_row = match.groups()
+    first_row = int(start_row) if start_row else 1
+    first_col = _column_index(start_col) if start_col else 1
+    
+    if end_col is None and end_row is None:
+        if start_row and start_col:
+            return first_row, first_col, None, None
+        last_row = int(start_row) if start_row else None
+        last_col = _column_index(start_col) if start_col else None
+        return first_row, first_col, last_row, last_col
+    
+    last_row = int(end_row) if end_row else None
+    last_col = _column_index(end_col) if end_col else None
+    return first_row, first_col, last_row, last_col
+
+
+class InMemoryWorksheet(WorksheetBackend):
+    def __init__(self, backend: 'InMemoryBackend', title: str, rows: List[List[str]], row_count: int, col_count: int):
+        self._backend = backend
+        self.title = title
+        self.rows = rows
+        self.row_count = row_count
+        self.col_count = col_count
+
+    def get_all_values(self) -> List[List[str]]:
+        self._backend._call('get_all_values')
+        return self._padded(self.rows)
+
+    def get_all_records(self) -> List[Dict]:
+        self._backend._call('get_all_records')
+        values = self._padded(self.rows)
+        if not values:
+            return []
+        headers = values[0]
+        return [dict(zip(headers, row)) for row in values[1:]]
+
+    def row_values(self, row: int) -> List[str]:
+        self._backend._call('row_values')
+        if row > len(self.rows):
+            return []
+        values = list(self.rows[row - 1])
+        while values and values[-1] == '':
+            values.pop()
+        return values
+
+    def update(self, range_name: str, values: List[List]):
+        self._backend._call('update')
+        self._write(range_name, values)
+        self._backend._commit()
+
+    def update_cell(self, row: int, col: int, value):
+        self._backend._call('update_cell')
+        self._set(row, col, value)
+        self._backend._commit()
+
+    def batch_update(self, data: List[Dict], value_input_option: str = 'RAW'):
+        self._backend._call('batch_update')
+        for entry in data:
+            self._write(entry['range'], entry['values'])
+        self._backend._commit()
+
+    def format(self, range_name: str, cell_format: Dict):
+        self._backend._call('format')
+
+    def merge_cells(self, range_name: str):
+        self._backend._call('merge_cells')
+
+    def read_range(self, cell_range: str) -> List[List[str]]:
+        first_row, first_col, last_row, last_col = parse_a1_range(cell_range)
+        if last_row is None and last_col is None:
+            last_row, last_col = first_row, first_col
+        
+        result = []
+        for row in self.rows[first_row - 1:last_row]:
+            values = [str(value) for value in row[first_col - 1:last_col]]
+            while values and values[-1] == '':
+                values.pop()
+            result.append(values)
+        
+        while result and not result[-1]:
+            result.pop()
+        return result
+
+    def _write(self, range_name: str, values: List[List]):
+        first_row, first_col, _, _ = parse_a1_range(range_name)
+        for row_offset, row_values in enumerate(values):
+            for col_offset, value in enumerate(row_values):
+                self._set(first_row + row_offset, first_col + col_offset, value)
+
+    def _set(self, row: int, col: int, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        target = self.rows[row - 1]
+        while len(target) < col:
+            target.append('')
+        target[col - 1] = '' if value is None else str(value)
+        self.row_count = max(self.row_count, row)
+        self.col_count = max(self.col_count, col)
+
+    def _padded(self, rows: List[List[str]]) -> List[List[str]]:
+        width = max((len(row) for row in rows), default=0)
+        return [list(row) + [''] * (width - len(row)) for row in rows]
+
+
+class InMemoryBackend(StorageBackend):
+    def __init__(self, sheets: Optional[Dict[str, List[List[str]]]] = None, path: Optional[str] = None,
+                 latency: float = 0.0, quota_error_rate: float = 0.0, seed: Optional[int] = None):
+        self.path = Path(path) if path else None
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.calls = Counter()
+        self._sheets: Dict[str, InMemoryWorksheet] = {}
+        self._random = random.Random(seed)
+        self._forced_errors = 0
+        self._lock = threading.RLock()
+        self._modified_at = datetime.now(timezone.utc)
+        
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                sheets = json.load(f)
+            logger.info(f"Loaded {len(sheets)} sheets from {self.path}")
+        
+        for title, rows in (sheets or {}).items():
+            self._add(title, [list(row) for row in rows])
+
+    def fail_next(self, count: int = 1):
+        self._forced_errors += count
+
+    def worksheet(self, title: str) -> WorksheetBackend:
+        self._call('worksheet')
+        try:
+            return self._sheets[title]
+        except KeyError:
+            raise SheetNotFoundError(title) from None
+
+    def worksheets(self) -> List[WorksheetBackend]:
+        self._call('worksheets')
+        return list(self._sheets.values())
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> WorksheetBackend:
+        self._call('add_worksheet')
+        if title in self._sheets:
+            raise StorageAPIError(400, f'A sheet with the name "{title}" already exists')
+        sheet = self._add(title, [], rows, cols)
+        self._commit()
+        return sheet
+
+    def values_batch_get(self, ranges: List[str]) -> Dict:
+        self._call('values_batch_get')
+        value_ranges = []
+        for a1 in ranges:
+            sheet_name, cell_range = split_a1(a1)
+            sheet = self._sheets.get(sheet_name)
+            if sheet is None:
+                raise StorageAPIError(400, f"Unable to parse range: {a1}")
+            values = sheet.read_range(cell_range)
+            value_range = {'range': a1, 'majorDimension': 'ROWS'}
+            if values:
+                value_range['values'] = values
+            value_ranges.append(value_range)
+        return {'valueRanges': value_ranges}
+
+    def values_batch_update(self, body: Dict) -> Dict:
+        self._call('values_batch_update')
+        for entry in body.get('data', []):
+            sheet_name, cell_range = split_a1(entry['range'])
+            sheet = self._sheets.get(sheet_name)
+            if sheet is None:
+                raise StorageAPIError(400, f"Unable to parse range: {entry['range']}")
+            sheet._write(cell_range, entry['values'])
+        self._commit()
+        return {'totalUpdatedRanges': len(body.get('data', []))}
+
+    def values_append(self, cell_range: str, values: List[List], value_input_option: str = 'RAW') -> Dict:
+        self._call('values_append')
+        sheet_name, _ = split_a1(cell_range)
+        sheet = self._sheets.get(sheet_name)
+        if sheet is None:
+            raise StorageAPIError(400, f"Unable to parse range: {cell_range}")
+        
+        while sheet.rows and not any(sheet.rows[-1]):
+            sheet.rows.pop()
+        first_row = len(sheet.rows) + 1
+        sheet._write(f"A{first_row}", values)
+        self._commit()
+        return {'updates': {'updatedRows': len(values)}}
+
+    def get_lastUpdateTime(self) -> str:
+        self._call('get_lastUpdateTime')
+        return self._modified_at.isoformat().replace('+00:00', 'Z')
+
+    def _add(self, title: str, rows: List[List[str]], row_count: int = 0, col_count: int = 0) -> InMemoryWorksheet:
+        width = max((len(row) for row in rows), default=0)
+        sheet = InMemoryWorksheet(self, title, rows, max(row_count, len(rows)), max(col_count, width))
+        self._sheets[title] = sheet
+        return sheet
+
+    def _call(self, method: str):
+        self.calls[method] += 1
+        
+        if self.latency:
+            time.sleep(self.latency)
+        
+        if self._forced_errors:
+            self._forced_errors -= 1
+            raise StorageQuotaError(f"Injected quota error in {method}")
+        
+        if self.quota_error_rate and self._random.random() < self.quota_error_rate:
+            raise StorageQuotaError(f"Injected quota error in {method}")
+
+    def _commit(self):
+        self._modified_at = datetime.now(timezone.utc)
+        
+        if not self.path:
+            return
+        
+        with self._lock:
+            tmp_file = self.path.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({title: sheet.rows for title, sheet in self._sheets.items()}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.path)
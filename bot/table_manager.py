@@ -1,9 +1,21 @@
-import gspread
-from google.oauth2.service_account import Credentials
+import asyncio
+import calendar
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
+import json
 import logging
 import re
+import time
+from .schedule_index import ScheduleIndex, months_in_range
+from .task_index import TaskRecord
+from .identity_index import IdentityIndex
+from .async_sheets import AsyncSheetsClient, SheetsAPIError
+from .metrics import observe_latency, SHEETS_CALL_SECONDS
+from .single_flight import SingleFlight
+from .rate_limiter import SheetsRateLimiter, RateLimitedBackend, sheets_call, INTERACTIVE, WRITE, REFRESH, ADMIN
+from .storage import StorageBackend, WorksheetBackend, SheetNotFoundError, StorageAPIError
+from .sheets_connection import SheetsConnection
+from .table_setup import TableSetup
 
 logger = logging.getLogger(__name__)
 
@@ -15,68 +27,118 @@ class TableManager:
         9: 'СЕНТЯБРЬ', 10: 'ОКТЯБРЬ', 11: 'НОЯБРЬ', 12: 'ДЕКАБРЬ'
     }
     
-    def __init__(self, credentials_file: str, spreadsheet_id: str):
+    WEEKDAYS = ['пн', 'вт', 'ср', 'чт', 'пт', 'сб', 'вс']
+    
+    MAX_BATCH_PAYLOAD_BYTES = 2 * 1024 * 1024
+    
+    EMPLOYEES_COLUMNS = 'A:C'
+    CLEANING_COLUMNS = 'A:F'
+    MONTH_COLUMNS = 'A:AG'
+    HISTORY_SHEET = 'История'
+    HISTORY_COLUMNS = 'A:F'
+    SHEET_TITLES_TTL_SECONDS = 3600
+    MISSING_SHEET_TTL_SECONDS = 300
+    READ_MEMO_SECONDS = 2.0
+    
+    def __init__(self, credentials_file: str, spreadsheet_id: str, identity: Optional[IdentityIndex] = None,
+                 backend: Optional[StorageBackend] = None, limiter: Optional[SheetsRateLimiter] = None,
+                 connection: Optional[SheetsConnection] = None):
         self.credentials_file = credentials_file
         self.spreadsheet_id = spreadsheet_id
         self.client = None
-        self.spreadsheet = None
+        self.connection = connection if connection is not None else SheetsConnection(credentials_file, limiter)
+        self._owns_connection = connection is None
+        self.spreadsheet: Optional[StorageBackend] = None
+        self.backend = backend
+        self.limiter = limiter
         self.employees_cache = {}
+        self.identity = identity if identity is not None else IdentityIndex()
+        self.schedule = ScheduleIndex()
+        self.async_client: Optional[AsyncSheetsClient] = None
+        self._sheet_titles = None
+        self._sheet_titles_loaded_at = 0.0
+        self._worksheets: Optional[Dict[str, WorksheetBackend]] = None
+        self._worksheets_loaded_at = 0.0
+        self._missing_sheets: Dict[str, float] = {}
+        self._reads = SingleFlight(self.READ_MEMO_SECONDS)
         
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
     def connect(self):
+        if self.backend is not None:
+            self.spreadsheet = self._rate_limited(self.backend)
+            logger.info(f"Using {type(self.backend).__name__} storage backend")
+            self._load_employees()
+            self._initialize_next_cleaning_dates()
+            return
+        
         try:
-            scopes = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            creds = Credentials.from_service_account_file(
-                self.credentials_file, 
-                scopes=scopes
-            )
-            self.client = gspread.authorize(creds)
-            self.spreadsheet = self.client.open_by_key(self.spreadsheet_id)
-            logger.info("Successfully connected to Google Sheets")
+            self.spreadsheet = self._rate_limited(self.connection.open(self.spreadsheet_id))
+            self.client = self.connection.client
+            self.async_client = self.connection.async_client
+            logger.info(f"Opened spreadsheet {self.spreadsheet_id}")
             self._load_employees()
             self._initialize_next_cleaning_dates()
         except Exception as e:
             logger.error(f"Failed to connect to Google Sheets: {e}")
             raise
 
+    def _rate_limited(self, backend: StorageBackend) -> StorageBackend:
+        if self.limiter is None:
+            return backend
+        return RateLimitedBackend(backend, self.limiter)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.spreadsheet is not None
+
+    def restore_snapshot(self, employees: Dict[str, Dict], schedule: ScheduleIndex):
+        self._set_employees(employees)
+        self.schedule = schedule
+
     def _load_employees(self):
         try:
-            sheet = self.spreadsheet.worksheet("Сотрудники")
-            data = sheet.get_all_records()
-            
-            for row in data:
-                name = row.get('ФИО', '').strip()
-                username = row.get('Telegram', '').strip().replace('@', '')
-                position = row.get('Должность', '').strip()
-                
-                if name and username and username.lower() != 'none':
-                    self.employees_cache[name] = {
-                        'username': username,
-                        'position': position
-                    }
-            
+            self._set_employees(self._parse_employees(self._get_sheet_values("Сотрудники")))
             logger.info(f"Loaded {len(self.employees_cache)} employees")
             
         except Exception as e:
             logger.error(f"Error loading employees: {e}")
-            self.employees_cache = {}
+            self._set_employees({})
 
-    def is_employee(self, username: str) -> bool:
-        if not username:
-            return False
-        username_lower = username.lower()
-        return any(emp['username'].lower() == username_lower for emp in self.employees_cache.values())
+    def _set_employees(self, employees: Dict[str, Dict]):
+        self.identity.update_employees(employees)
+        self.employees_cache = employees
 
-    def get_employee_by_username(self, username: str) -> Optional[Dict]:
-        if not username:
-            return None
-        username_lower = username.lower()
-        for name, info in self.employees_cache.items():
-            if info['username'].lower() == username_lower:
-                return {'name': name, **info}
-        return None
+    def _parse_employees(self, values: List[List[str]]) -> Dict[str, Dict]:
+        employees = {}
+        
+        for row in self._records_from_values(values):
+            name = row.get('ФИО', '').strip()
+            username = row.get('Telegram', '').strip().replace('@', '')
+            position = row.get('Должность', '').strip()
+            
+            if name and username and username.lower() != 'none':
+                employees[name] = {
+                    'username': username,
+                    'position': position
+                }
+        
+        return employees
+
+    def _records_from_values(self, values: List[List[str]]) -> List[Dict]:
+        if not values:
+            return []
+        
+        headers = values[0]
+        records = []
+        
+        for row in values[1:]:
+            records.append({
+                header: row[idx] if idx < len(row) else ''
+                for idx, header in enumerate(headers)
+            })
+        
+        return records
 
     def _parse_period_days(self, period_str: str) -> Optional[int]:
         try:
@@ -88,10 +150,11 @@ class TableManager:
             logger.error(f"Error parsing period '{period_str}': {e}")
             return None
 
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
     def _initialize_next_cleaning_dates(self):
         try:
-            sheet = self.spreadsheet.worksheet("График чистки")
-            all_data = sheet.get_all_values()
+            all_data = self._get_sheet_values("График чистки")
             
             if len(all_data) < 2:
                 return
@@ -136,83 +199,180 @@ class TableManager:
                 })
             
             if updates:
-                for update in updates:
-                    sheet.update(update['range'], update['values'])
+                self._write_ranges("График чистки", updates)
                 logger.info(f"Initialized {len(updates)} next cleaning dates")
             
         except Exception as e:
             logger.error(f"Error initializing next cleaning dates: {e}")
 
-    def get_shifts_for_date(self, date: datetime) -> List[Dict]:
+    def _write_ranges(self, sheet_name: str, updates: List[Dict], value_input_option: str = 'RAW') -> int:
+        bodies = self._batch_update_bodies(sheet_name, updates, value_input_option)
+        
         try:
-            month_name = self.MONTH_NAMES[date.month]
-            year_short = str(date.year)[2:]
-            sheet_name = f"{month_name} {year_short}"
+            for body in bodies:
+                self.spreadsheet.values_batch_update(body)
+        finally:
+            self._reads.forget()
+        
+        return len(bodies)
+
+    async def _write_ranges_async(self, sheet_name: str, updates: List[Dict], value_input_option: str = 'RAW') -> int:
+        bodies = self._batch_update_bodies(sheet_name, updates, value_input_option)
+        
+        try:
+            for body in bodies:
+                await self.async_client.values_batch_update(self.spreadsheet_id, body)
+        finally:
+            self._reads.forget()
+        
+        return len(bodies)
+
+    def _batch_update_bodies(self, sheet_name: str, updates: List[Dict], value_input_option: str) -> List[Dict]:
+        chunks = []
+        chunk = []
+        chunk_size = 0
+        
+        for update in updates:
+            entry = {'range': self._a1(sheet_name, update['range']), 'values': update['values']}
+            entry_size = len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
             
-            logger.info(f"Looking for sheet: {sheet_name}")
+            if chunk and chunk_size + entry_size > self.MAX_BATCH_PAYLOAD_BYTES:
+                chunks.append(chunk)
+                chunk = []
+                chunk_size = 0
             
-            try:
-                sheet = self.spreadsheet.worksheet(sheet_name)
-            except gspread.exceptions.WorksheetNotFound:
+            chunk.append(entry)
+            chunk_size += entry_size
+        
+        if chunk:
+            chunks.append(chunk)
+        
+        if len(chunks) > 1:
+            logger.info(f"Writing {len(updates)} ranges to '{sheet_name}' in {len(chunks)} requests")
+        
+        return [{'valueInputOption': value_input_option, 'data': data} for data in chunks]
+
+    def _month_sheet_name(self, year: int, month: int) -> str:
+        return f"{self.MONTH_NAMES[month]} {str(year)[2:]}"
+
+    def _ensure_months_loaded(self, start: datetime, days_ahead: int):
+        for year, month in months_in_range(start, days_ahead):
+            if not self.schedule.has_month(year, month):
+                shifts = self._reads.do(('month', year, month), lambda: self._load_month_shifts(year, month))
+                self.schedule.set_month(year, month, shifts)
+
+    async def _ensure_months_loaded_async(self, start: datetime, days_ahead: int):
+        missing = [
+            (year, month) for year, month in months_in_range(start, days_ahead)
+            if not self.schedule.has_month(year, month)
+        ]
+        
+        if not missing:
+            return
+        
+        titles = await self._get_sheet_titles_async(self._month_sheet_name(year, month) for year, month in missing)
+        ranges = {}
+        for year, month in missing:
+            sheet_name = self._month_sheet_name(year, month)
+            if sheet_name in titles:
+                ranges[(year, month)] = self._a1(sheet_name, self.MONTH_COLUMNS)
+            else:
                 logger.warning(f"Sheet '{sheet_name}' not found")
-                return []
-            
-            all_data = sheet.get_all_values()
-            
-            if len(all_data) < 4:
-                logger.warning(f"Not enough rows in sheet {sheet_name}")
-                return []
-            
-            header_row, data_start_row = self._find_period_section(all_data, date.day)
-            
-            if not header_row or data_start_row is None:
-                logger.warning(f"Could not find section for day {date.day}")
-                return []
-            
-            day_column_index = None
-            for idx, cell in enumerate(header_row):
-                if cell.strip() == str(date.day):
-                    day_column_index = idx
-                    break
-            
-            if day_column_index is None:
-                logger.warning(f"Could not find column for day {date.day}")
-                return []
-            
-            shifts = []
+        
+        values = {}
+        if ranges:
+            response = await self._batch_get_async(list(ranges.values()))
+            values = self._values_by_key(ranges, response)
+        
+        for year, month in missing:
+            self.schedule.set_month(year, month, self._parse_month_sheet(values.get((year, month), []), year, month))
+
+    def _load_month_shifts(self, year: int, month: int) -> Dict[int, List[Dict]]:
+        sheet_name = self._month_sheet_name(year, month)
+        
+        logger.info(f"Loading schedule sheet: {sheet_name}")
+        
+        try:
+            all_data = self._get_sheet_values(sheet_name)
+        except SheetNotFoundError:
+            logger.warning(f"Sheet '{sheet_name}' not found")
+            return {}
+        
+        return self._parse_month_sheet(all_data, year, month)
+
+    def _parse_month_sheet(self, all_data: List[List[str]], year: int, month: int) -> Dict[int, List[Dict]]:
+        if len(all_data) < 4:
+            logger.warning(f"Not enough rows in sheet {self._month_sheet_name(year, month)}")
+            return {}
+        
+        shifts_by_day: Dict[int, List[Dict]] = {}
+        seen_days = set()
+        missing_employees = set()
+        days_in_month = calendar.monthrange(year, month)[1]
+        
+        for header_idx, header_row in enumerate(all_data):
+            if len(header_row) < 3 or 'ФИО' not in header_row or 'Должность' not in header_row:
+                continue
             
-            for row in all_data[data_start_row:]:
-                if len(row) <= day_column_index:
+            day_columns = []
+            for col_idx, cell in enumerate(header_row[2:], start=2):
+                cell = cell.strip()
+                if not cell.isdigit() or int(cell) in seen_days:
                     continue
                 
-                name = row[0].strip() if len(row) > 0 else ''
-                shift_time = row[day_column_index].strip() if len(row) > day_column_index else ''
-                
-                if not name or not shift_time or shift_time.lower() == 'в':
+                day = int(cell)
+                if not 1 <= day <= days_in_month:
+                    logger.warning(f"Skipping day {day} in sheet {self._month_sheet_name(year, month)}, month has {days_in_month} days")
                     continue
                 
-                if name == 'ФИО' or shift_time in ['пн', 'вт', 'ср', 'чт', 'пт', 'сб', 'вс']:
-                    break
+                day_columns.append((day, col_idx))
+                seen_days.add(day)
+            
+            for row in all_data[header_idx + 1:]:
+                name = row[0].strip() if len(row) > 0 else ''
                 
-                employee_info = self.employees_cache.get(name)
+                if name == 'ФИО':
+                    break
                 
-                if not employee_info:
-                    logger.warning(f"Employee {name} not found in cache")
+                if not name:
                     continue
                 
-                start_time, end_time = self._parse_shift_time(shift_time)
-                
-                if start_time:
-                    shifts.append({
-                        'name': name,
-                        'username': employee_info['username'],
-                        'position': employee_info['position'],
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'shift_raw': shift_time,
-                        'date': date
-                    })
-            
+                for day, col_idx in day_columns:
+                    shift_time = row[col_idx].strip() if len(row) > col_idx else ''
+                    
+                    if not shift_time or shift_time.lower() == 'в' or shift_time in self.WEEKDAYS:
+                        continue
+                    
+                    employee_info = self.employees_cache.get(name)
+                    
+                    if not employee_info:
+                        missing_employees.add(name)
+                        continue
+                    
+                    start_time, end_time = self._parse_shift_time(shift_time)
+                    
+                    if start_time:
+                        shifts_by_day.setdefault(day, []).append({
+                            'name': name,
+                            'username': employee_info['username'],
+                            'position': employee_info['position'],
+                            'start_time': start_time,
+                            'end_time': end_time,
+                            'shift_raw': shift_time,
+                            'date': datetime(year, month, day)
+                        })
+        
+        for name in missing_employees:
+            logger.warning(f"Employee {name} not found in cache")
+        
+        return shifts_by_day
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(INTERACTIVE)
+    def get_shifts_for_date(self, date: datetime) -> List[Dict]:
+        try:
+            self._ensure_months_loaded(date, 0)
+            shifts = self.schedule.shifts_on(date) or []
             logger.info(f"Found {len(shifts)} shifts for {date.strftime('%d.%m.%Y')}")
             return shifts
             
@@ -220,73 +380,40 @@ class TableManager:
             logger.error(f"Error getting shifts: {e}")
             return []
 
-    def get_today_shifts(self, today: datetime) -> List[Dict]:
-        return self.get_shifts_for_date(today)
-
-    def get_user_current_shift(self, username: str, now: datetime) -> Optional[Dict]:
-        shifts = self.get_shifts_for_date(now)
-        user_shift = next((s for s in shifts if s['username'].lower() == username.lower()), None)
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(INTERACTIVE)
+    def get_user_next_shift(self, username: str, now: datetime) -> Optional[Dict]:
+        max_days_ahead = 30
         
-        if not user_shift:
+        employee = self.identity.get(username=username)
+        if not employee:
             return None
         
         try:
-            start_time = datetime.strptime(user_shift['start_time'], "%H:%M").time()
-            end_time = datetime.strptime(user_shift['end_time'], "%H:%M").time()
-            
-            current_time = now.time()
-            
-            if end_time < start_time:
-                if current_time >= start_time or current_time < end_time:
-                    return user_shift
-            else:
-                if start_time <= current_time < end_time:
-                    return user_shift
-            
-            return None
-            
+            self._ensure_months_loaded(now, max_days_ahead)
         except Exception as e:
-            logger.error(f"Error checking current shift: {e}")
-            return None
+            logger.error(f"Error loading schedule for next shift: {e}")
+        
+        return self.schedule.next_shift(employee.name, now, max_days_ahead)
 
-    def get_user_next_shift(self, username: str, now: datetime) -> Optional[Dict]:
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(INTERACTIVE)
+    async def get_user_next_shift_async(self, username: str, now: datetime) -> Optional[Dict]:
+        if not self.async_client:
+            return await asyncio.to_thread(self.get_user_next_shift, username, now)
+        
         max_days_ahead = 30
         
-        for days_ahead in range(max_days_ahead + 1):
-            check_date = now + timedelta(days=days_ahead)
-            shifts = self.get_shifts_for_date(check_date)
-            
-            user_shift = next((s for s in shifts if s['username'].lower() == username.lower()), None)
-            
-            if user_shift:
-                if days_ahead == 0:
-                    try:
-                        start_time = datetime.strptime(user_shift['start_time'], "%H:%M").time()
-                        if now.time() < start_time:
-                            return user_shift
-                    except Exception:
-                        pass
-                else:
-                    return user_shift
+        employee = self.identity.get(username=username)
+        if not employee:
+            return None
         
-        return None
-
-    def _find_period_section(self, all_data: List[List[str]], day: int) -> Tuple[Optional[List[str]], Optional[int]]:
-        for idx, row in enumerate(all_data):
-            if len(row) < 3:
-                continue
-            
-            if 'ФИО' in row and 'Должность' in row:
-                for cell in row[2:]:
-                    if cell.strip().isdigit():
-                        day_in_row = int(cell.strip())
-                        
-                        if day <= 15 and day_in_row <= 15:
-                            return row, idx + 1
-                        elif day > 15 and day_in_row > 15:
-                            return row, idx + 1
-        
-        return None, None
+        try:
+            await self._ensure_months_loaded_async(now, max_days_ahead)
+        except Exception as e:
+            logger.error(f"Error loading schedule for next shift: {e}")
+        
+        return self.schedule.next_shift(employee.name, now, max_days_ahead)
 
     def _parse_shift_time(self, shift_str: str) -> Tuple[Optional[str], Optional[str]]:
         try:
@@ -324,23 +451,14 @@ class TableManager:
             logger.error(f"Error parsing shift time '{shift_str}': {e}")
             return None, None
 
-    def get_equipment_tasks(self) -> List[Dict]:
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
+    def get_equipment_tasks(self) -> List[TaskRecord]:
         try:
-            sheet = self.spreadsheet.worksheet("График чистки")
-            data = sheet.get_all_records()
-            
-            tasks = []
-            for idx, row in enumerate(data, start=2):
-                tasks.append({
-                    'row_index': idx,
-                    'name': row.get('Название', ''),
-                    'period': row.get('Периодичность', ''),
-                    'last_cleaned': row.get('Последняя чистка', ''),
-                    'next_cleaning': row.get('Следующая чистка', ''),
-                    'completed_by': row.get('Выполнил', ''),
-                    'status': row.get('Статус', '')
-                })
-            
+            tasks = self._reads.do(
+                ('equipment_tasks',),
+                lambda: self._parse_equipment_tasks(self._get_sheet_values("График чистки"))
+            )
             logger.info(f"Loaded {len(tasks)} equipment tasks")
             return tasks
             
@@ -348,103 +466,374 @@ class TableManager:
             logger.error(f"Error getting equipment: {e}")
             return []
 
-    def get_tasks_for_today(self, today: datetime) -> List[Dict]:
-        all_tasks = self.get_equipment_tasks()
-        tasks_today = []
+    def _parse_equipment_tasks(self, values: List[List[str]]) -> List[TaskRecord]:
+        tasks = []
         
-        for task in all_tasks:
-            if self._should_clean_today(task, today):
-                tasks_today.append(task)
+        for idx, row in enumerate(self._records_from_values(values), start=2):
+            period = row.get('Периодичность', '')
+            tasks.append(TaskRecord(
+                row_index=idx,
+                name=row.get('Название', ''),
+                period=period,
+                period_days=self._parse_period_days(period),
+                last_cleaned=row.get('Последняя чистка', ''),
+                next_cleaning=row.get('Следующая чистка', ''),
+                completed_by=row.get('Выполнил', ''),
+                status=row.get('Статус', '')
+            ))
         
-        logger.info(f"Found {len(tasks_today)} tasks for today")
-        return tasks_today
+        return tasks
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
+    def fetch_snapshot(self, now: datetime, days_ahead: int = 30) -> Dict:
+        try:
+            return self._fetch_snapshot(now, days_ahead)
+        except StorageAPIError as e:
+            logger.warning(f"Batch read failed ({e}), reloading sheet list and retrying")
+            self.invalidate_worksheets()
+            return self._fetch_snapshot(now, days_ahead)
 
-    def _should_clean_today(self, task: Dict, today: datetime) -> bool:
-        next_cleaning_str = task['next_cleaning']
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
+    async def fetch_snapshot_async(self, now: datetime, days_ahead: int = 30) -> Dict:
+        if not self.async_client:
+            return await asyncio.to_thread(self.fetch_snapshot, now, days_ahead)
         
-        if not next_cleaning_str or next_cleaning_str == '-':
-            last_cleaned_str = task['last_cleaned']
-            period_str = task['period']
-            
-            if not last_cleaned_str or last_cleaned_str == '-':
-                return True
-            
-            period_days = self._parse_period_days(period_str)
-            if not period_days:
-                return False
-            
-            try:
-                last_cleaned = datetime.strptime(last_cleaned_str, "%d.%m.%Y")
-                days_passed = (today - last_cleaned).days
-                return days_passed >= period_days
-            except ValueError:
-                return True
+        try:
+            return await self._fetch_snapshot_async(now, days_ahead)
+        except SheetsAPIError as e:
+            if e.code != 400:
+                raise
+            logger.warning(f"Batch read failed ({e}), reloading sheet list and retrying")
+            self.invalidate_worksheets()
+            return await self._fetch_snapshot_async(now, days_ahead)
+
+    def _fetch_snapshot(self, now: datetime, days_ahead: int) -> Dict:
+        months = months_in_range(now, days_ahead)
+        ranges = self._snapshot_ranges(self._get_sheet_titles(self._snapshot_titles(months)), months)
+        response = self._batch_get(list(ranges.values()))
+        return self._apply_snapshot(ranges, response, months, now)
+
+    async def _fetch_snapshot_async(self, now: datetime, days_ahead: int) -> Dict:
+        months = months_in_range(now, days_ahead)
+        titles = await self._get_sheet_titles_async(self._snapshot_titles(months))
+        ranges = self._snapshot_ranges(titles, months)
+        response = await self._batch_get_async(list(ranges.values()))
+        return self._apply_snapshot(ranges, response, months, now)
+
+    def _batch_get(self, ranges: List[str]) -> Dict:
+        return self._reads.do(('batch', tuple(ranges)), lambda: self.spreadsheet.values_batch_get(ranges))
+
+    async def _batch_get_async(self, ranges: List[str]) -> Dict:
+        return await self._reads.do_async(
+            ('batch', tuple(ranges)),
+            lambda: self.async_client.values_batch_get(self.spreadsheet_id, ranges)
+        )
+
+    def _snapshot_titles(self, months: List[Tuple[int, int]]) -> List[str]:
+        return ["Сотрудники", "График чистки"] + [self._month_sheet_name(year, month) for year, month in months]
+
+    def _snapshot_ranges(self, titles: set, months: List[Tuple[int, int]]) -> Dict:
+        ranges = {}
+        if "Сотрудники" in titles:
+            ranges['employees'] = self._a1("Сотрудники", self.EMPLOYEES_COLUMNS)
+        if "График чистки" in titles:
+            ranges['tasks'] = self._a1("График чистки", self.CLEANING_COLUMNS)
+        for year, month in months:
+            sheet_name = self._month_sheet_name(year, month)
+            if sheet_name in titles:
+                ranges[(year, month)] = self._a1(sheet_name, self.MONTH_COLUMNS)
+            else:
+                logger.warning(f"Sheet '{sheet_name}' not found")
+        return ranges
+
+    def _values_by_key(self, ranges: Dict, response: Dict) -> Dict:
+        value_ranges = response.get('valueRanges', [])
+        return {
+            key: value_range.get('values', [])
+            for key, value_range in zip(ranges, value_ranges)
+        }
+
+    def _apply_snapshot(self, ranges: Dict, response: Dict, months: List[Tuple[int, int]], now: datetime) -> Dict:
+        values = self._values_by_key(ranges, response)
+        
+        if 'employees' in values:
+            self._set_employees(self._parse_employees(values['employees']))
+        
+        tasks = self._parse_equipment_tasks(values.get('tasks', []))
+        
+        schedule = ScheduleIndex()
+        for year, month in months:
+            schedule.set_month(year, month, self._parse_month_sheet(values.get((year, month), []), year, month))
+        self.schedule = schedule
+        
+        shifts_today = schedule.shifts_on(now) or []
+        
+        logger.info(
+            f"Fetched {len(ranges)} ranges in one request: {len(self.employees_cache)} employees, "
+            f"{len(tasks)} tasks, {len(shifts_today)} shifts today"
+        )
+        
+        return {
+            'employees': self.employees_cache,
+            'tasks': tasks,
+            'shifts_today': shifts_today
+        }
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
+    def get_last_update_time(self) -> Optional[str]:
+        try:
+            return self.spreadsheet.get_lastUpdateTime()
+        except Exception as e:
+            logger.warning(f"Could not read spreadsheet modification time: {e}")
+            return None
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
+    async def get_last_update_time_async(self) -> Optional[str]:
+        if not self.async_client:
+            return await asyncio.to_thread(self.get_last_update_time)
         
         try:
-            next_cleaning = datetime.strptime(next_cleaning_str, "%d.%m.%Y")
-            return next_cleaning.date() <= today.date()
-        except ValueError:
+            return await self.async_client.get_last_update_time(self.spreadsheet_id)
+        except Exception as e:
+            logger.warning(f"Could not read spreadsheet modification time: {e}")
+            return None
+
+    async def _get_sheet_titles_async(self, expected: Iterable[str] = ()) -> set:
+        expected = list(expected)
+        if self._sheet_titles is not None and self._unconfirmed_missing(self._sheet_titles, expected):
+            self.invalidate_worksheets()
+        if self._sheet_titles is None or time.monotonic() - self._sheet_titles_loaded_at > self.SHEET_TITLES_TTL_SECONDS:
+            self._sheet_titles = set(await self.async_client.get_sheet_titles(self.spreadsheet_id))
+            self._sheet_titles_loaded_at = time.monotonic()
+            self._remember_missing(self._sheet_titles, expected)
+        return self._sheet_titles
+
+    def _get_sheet_titles(self, expected: Iterable[str] = ()) -> set:
+        expected = list(expected)
+        titles = set(self.worksheet_registry())
+        if self._unconfirmed_missing(titles, expected):
+            self.invalidate_worksheets()
+            titles = set(self.worksheet_registry())
+            self._remember_missing(titles, expected)
+        return titles
+
+    def _unconfirmed_missing(self, titles, expected: List[str]) -> bool:
+        now = time.monotonic()
+        return any(
+            title not in titles and now - self._missing_sheets.get(title, float('-inf')) > self.MISSING_SHEET_TTL_SECONDS
+            for title in expected
+        )
+
+    def _remember_missing(self, titles, expected: List[str]):
+        now = time.monotonic()
+        for title in expected:
+            if title not in titles:
+                self._missing_sheets[title] = now
+
+    def worksheet_registry(self) -> Dict[str, WorksheetBackend]:
+        if self._worksheets is None or time.monotonic() - self._worksheets_loaded_at > self.SHEET_TITLES_TTL_SECONDS:
+            self._worksheets = {ws.title: ws for ws in self.spreadsheet.worksheets()}
+            self._worksheets_loaded_at = time.monotonic()
+            self._sheet_titles = set(self._worksheets)
+            self._sheet_titles_loaded_at = self._worksheets_loaded_at
+        return self._worksheets
+
+    def _worksheet(self, title: str) -> WorksheetBackend:
+        registry = self.worksheet_registry()
+        if title not in registry and self._unconfirmed_missing(registry, [title]):
+            self.invalidate_worksheets()
+            registry = self.worksheet_registry()
+            self._remember_missing(registry, [title])
+        
+        sheet = registry.get(title)
+        if sheet is None:
+            raise SheetNotFoundError(title)
+        return sheet
+
+    def _get_sheet_values(self, title: str) -> List[List[str]]:
+        sheet = self._worksheet(title)
+        try:
+            return self._reads.do(('values', title), sheet.get_all_values)
+        except SheetNotFoundError:
+            self.invalidate_worksheets()
+            raise
+        except StorageAPIError as e:
+            if e.code in (400, 404):
+                self.invalidate_worksheets()
+            raise
+
+    def invalidate_worksheets(self):
+        self._worksheets = None
+        self._sheet_titles = None
+        self._missing_sheets.clear()
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(ADMIN)
+    def setup_table(self) -> str:
+        try:
+            return TableSetup(self.spreadsheet, self.worksheet_registry()).setup()
+        finally:
+            self.invalidate_worksheets()
+            self._reads.forget()
+
+    def _a1(self, sheet_name: str, cell_range: str) -> str:
+        return "'" + sheet_name.replace("'", "''") + "'!" + cell_range
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(WRITE)
+    def mark_tasks_completed(self, completions: List[Dict]) -> bool:
+        try:
+            data = self._completion_updates(completions)
+            if data:
+                self._write_ranges("График чистки", data, value_input_option='USER_ENTERED')
+                self._log_completions(completions, data)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error marking tasks completed: {e}")
             return False
 
-    def mark_task_completed(self, row_index: int, completed_by: str, completed_at: datetime, period_str: str):
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(WRITE)
+    async def mark_tasks_completed_async(self, completions: List[Dict]) -> bool:
+        if not self.async_client:
+            return await asyncio.to_thread(self.mark_tasks_completed, completions)
+        
         try:
-            sheet = self.spreadsheet.worksheet("График чистки")
+            data = self._completion_updates(completions)
+            if data:
+                await self._write_ranges_async("График чистки", data, value_input_option='USER_ENTERED')
+                self._log_completions(completions, data)
+            return True
             
+        except Exception as e:
+            logger.error(f"Error marking tasks completed: {e}")
+            return False
+
+    def _completion_updates(self, completions: List[Dict]) -> List[Dict]:
+        data = []
+        
+        for completion in completions:
+            completed_at = completion['completed_at']
             last_cleaned_str = completed_at.strftime("%d.%m.%Y")
             
-            period_days = self._parse_period_days(period_str)
+            period_days = self._parse_period_days(completion['period'])
             if period_days:
                 next_cleaning = completed_at + timedelta(days=period_days)
                 next_cleaning_str = next_cleaning.strftime("%d.%m.%Y")
             else:
                 next_cleaning_str = "-"
             
-            sheet.update_cell(row_index, 3, last_cleaned_str)
-            sheet.update_cell(row_index, 4, next_cleaning_str)
-            sheet.update_cell(row_index, 5, completed_by)
-            sheet.update_cell(row_index, 6, "✅")
-            
-            logger.info(f"Task at row {row_index} marked as completed by {completed_by}, next cleaning: {next_cleaning_str}")
+            row_index = completion['row_index']
+            data.append({
+                'range': f'C{row_index}:F{row_index}',
+                'values': [[last_cleaned_str, next_cleaning_str, completion['completed_by'], "✅"]]
+            })
+        
+        return data
+
+    def _log_completions(self, completions: List[Dict], data: List[Dict]):
+        for completion, update in zip(completions, data):
+            logger.info(f"Task at row {completion['row_index']} marked as completed by {completion['completed_by']}, next cleaning: {update['values'][0][1]}")
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(WRITE)
+    def append_completion_log(self, entries: List[Dict]) -> bool:
+        try:
+            self.spreadsheet.values_append(
+                self._a1(self.HISTORY_SHEET, self.HISTORY_COLUMNS),
+                self._completion_log_rows(entries),
+                value_input_option='USER_ENTERED'
+            )
+            self._reads.forget()
+            logger.info(f"Appended {len(entries)} completions to '{self.HISTORY_SHEET}'")
             return True
             
         except Exception as e:
-            logger.error(f"Error marking task completed: {e}")
+            logger.error(f"Error appending to '{self.HISTORY_SHEET}': {e}")
             return False
 
-    def get_history(self, days: int = 7) -> List[Dict]:
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(WRITE)
+    async def append_completion_log_async(self, entries: List[Dict]) -> bool:
+        if not self.async_client:
+            return await asyncio.to_thread(self.append_completion_log, entries)
+        
         try:
-            sheet = self.spreadsheet.worksheet("График чистки")
-            data = sheet.get_all_records()
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            history = []
-            
-            for row in data:
-                last_cleaned = row.get('Последняя чистка', '')
-                if last_cleaned and last_cleaned != '-':
-                    try:
-                        cleaned_date = datetime.strptime(last_cleaned, "%d.%m.%Y")
-                        if cleaned_date >= cutoff_date:
-                            history.append({
-                                'name': row.get('Название', ''),
-                                'date': last_cleaned,
-                                'completed_by': row.get('Выполнил', ''),
-                                'status': row.get('Статус', ''),
-                                'next_cleaning': row.get('Следующая чистка', '')
-                            })
-                    except ValueError:
-                        continue
-            
-            history.sort(key=lambda x: datetime.strptime(x['date'], "%d.%m.%Y"), reverse=True)
-            return history
+            await self.async_client.values_append(
+                self.spreadsheet_id,
+                self._a1(self.HISTORY_SHEET, self.HISTORY_COLUMNS),
+                self._completion_log_rows(entries),
+                value_input_option='USER_ENTERED'
+            )
+            self._reads.forget()
+            logger.info(f"Appended {len(entries)} completions to '{self.HISTORY_SHEET}'")
+            return True
             
         except Exception as e:
-            logger.error(f"Error getting history: {e}")
+            logger.error(f"Error appending to '{self.HISTORY_SHEET}': {e}")
+            return False
+
+    def _completion_log_rows(self, entries: List[Dict]) -> List[List]:
+        return [
+            [
+                entry['completed_at'].strftime("%d.%m.%Y"),
+                entry['completed_at'].strftime("%H:%M"),
+                entry['name'],
+                entry['completed_by'],
+                entry['username'],
+                entry['row_index']
+            ]
+            for entry in entries
+        ]
+
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(REFRESH)
+    def get_completion_log(self) -> Optional[List[Dict]]:
+        try:
+            return self._parse_completion_log(self._get_sheet_values(self.HISTORY_SHEET))
+            
+        except SheetNotFoundError:
+            logger.info(f"No '{self.HISTORY_SHEET}' sheet, run /setup_table to create it")
             return []
+        except Exception as e:
+            logger.error(f"Error reading '{self.HISTORY_SHEET}': {e}")
+            return None
 
-    def get_employee_username(self, name: str) -> Optional[str]:
-        employee = self.employees_cache.get(name)
-        return employee['username'] if employee else None
+    def _parse_completion_log(self, values: List[List[str]]) -> List[Dict]:
+        entries = []
+        
+        for row in self._records_from_values(values):
+            try:
+                completed_at = datetime.strptime(f"{row.get('Дата', '')} {row.get('Время', '') or '00:00'}", "%d.%m.%Y %H:%M")
+                row_index = int(row.get('Строка', '') or 0)
+            except ValueError:
+                continue
+            
+            username = row.get('Telegram', '').strip().replace('@', '')
+            if not username:
+                continue
+            
+            entries.append({
+                'completed_at': completed_at,
+                'name': row.get('Название', ''),
+                'completed_by': row.get('Выполнил', ''),
+                'username': username,
+                'row_index': row_index
+            })
+        
+        return entries
 
+    @observe_latency(SHEETS_CALL_SECONDS)
+    @sheets_call(ADMIN)
     def reload_employees(self):
-        self._load_employees()
\ No newline at end of file
+        self._load_employees()
+
+    async def close(self):
+        if self._owns_connection:
+            await self.connection.close()
+        self.async_client = None
\ No newline at end of file
@@ -1,7 +1,7 @@
-import gspread
 from datetime import datetime, timedelta
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
+from .storage import StorageBackend, WorksheetBackend
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +15,7 @@ class TableSetup:
     
     EMPLOYEES_HEADERS = ['ФИО', 'Telegram', 'Должность']
     CLEANING_HEADERS = ['Название', 'Периодичность', 'Последняя чистка', 'Следующая чистка', 'Выполнил', 'Статус']
+    HISTORY_HEADERS = ['Дата', 'Время', 'Название', 'Выполнил', 'Telegram', 'Строка']
     
     SAMPLE_EMPLOYEES = [
         ['Иванова Мария', 'maria_manager', 'Управляющий'],
@@ -31,9 +32,11 @@ class TableSetup:
         ['Гриль', '7 дней', '-', '-', '-', '⏳']
     ]
     
-    def __init__(self, spreadsheet: gspread.Spreadsheet):
+    def __init__(self, spreadsheet: StorageBackend, existing_sheets: Optional[Dict[str, WorksheetBackend]] = None):
         self.spreadsheet = spreadsheet
-        self.existing_sheets = {ws.title: ws for ws in spreadsheet.worksheets()}
+        if existing_sheets is None:
+            existing_sheets = {ws.title: ws for ws in spreadsheet.worksheets()}
+        self.existing_sheets = existing_sheets
         
     def setup(self) -> str:
         report = []
@@ -46,6 +49,9 @@ class TableSetup:
         cleaning_status = self._setup_cleaning_sheet()
         report.append(cleaning_status)
         
+        history_status = self._setup_history_sheet()
+        report.append(history_status)
+        
         month_status = self._setup_month_sheets()
         report.extend(month_status)
         
@@ -105,6 +111,30 @@ class TableSetup:
             self.existing_sheets[sheet_name] = sheet
             return f"+ Создан лист '{sheet_name}' с примерным оборудованием"
     
+    def _setup_history_sheet(self) -> str:
+        sheet_name = "История"
+        
+        if sheet_name in self.existing_sheets:
+            sheet = self.existing_sheets[sheet_name]
+            headers = sheet.row_values(1) if sheet.row_count > 0 else []
+            
+            if headers == self.HISTORY_HEADERS:
+                return f"✓ Лист '{sheet_name}' существует"
+            else:
+                sheet.update('A1:F1', [self.HISTORY_HEADERS])
+                return f"↻ Лист '{sheet_name}' - обновлены заголовки"
+        else:
+            sheet = self.spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=6)
+            sheet.update('A1:F1', [self.HISTORY_HEADERS])
+            
+            sheet.format('A1:F1', {
+                'textFormat': {'bold': True},
+                'backgroundColor': {'red': 1.0, 'green': 0.9, 'blue': 0.6}
+            })
+            
+            self.existing_sheets[sheet_name] = sheet
+            return f"+ Создан лист '{sheet_name}' для журнала выполненных задач"
+    
     def _setup_month_sheets(self) -> List[str]:
         reports = []
         today = datetime.now()
@@ -124,7 +154,7 @@ class TableSetup:
         
         return reports
     
-    def _create_month_sheet(self, sheet_name: str, target_date: datetime) -> gspread.Worksheet:
+    def _create_month_sheet(self, sheet_name: str, target_date: datetime) -> WorksheetBackend:
         days_in_month = self._get_days_in_month(target_date.year, target_date.month)
         
         sheet = self.spreadsheet.add_worksheet(
@@ -150,7 +180,7 @@ class TableSetup:
         
         return sheet
     
-    def _fill_period(self, sheet: gspread.Worksheet, target_date: datetime, start_day: int, end_day: int, start_row: int):
+    def _fill_period(self, sheet: WorksheetBackend, target_date: datetime, start_day: int, end_day: int, start_row: int):
         days_range = list(range(start_day, end_day + 1))
         num_days = len(days_range)
         
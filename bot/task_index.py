@@ -0,0 +1,97 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import List, Dict, Optional
+
+
+class TaskRecord:
+    __slots__ = (
+        'row_index', 'name', 'period', 'period_days',
+        'last_cleaned', 'last_cleaned_ordinal',
+        'next_cleaning', 'next_cleaning_ordinal',
+        'completed_by', 'status', 'due_ordinal'
+    )
+
+    def __init__(self, row_index: int, name: str, period: str, period_days: Optional[int],
+                 last_cleaned: str, next_cleaning: str, completed_by: str, status: str):
+        self.row_index = row_index
+        self.name = name
+        self.period = period
+        self.period_days = period_days
+        self.last_cleaned = last_cleaned
+        self.last_cleaned_ordinal = parse_date_ordinal(last_cleaned)
+        self.next_cleaning = next_cleaning
+        self.next_cleaning_ordinal = parse_date_ordinal(next_cleaning)
+        self.completed_by = completed_by
+        self.status = status
+        self.due_ordinal = self._compute_due_ordinal()
+
+    def _compute_due_ordinal(self) -> Optional[int]:
+        if not self.next_cleaning or self.next_cleaning == '-':
+            if not self.last_cleaned or self.last_cleaned == '-':
+                return 0
+            
+            if not self.period_days:
+                return None
+            
+            if self.last_cleaned_ordinal is None:
+                return 0
+            
+            return self.last_cleaned_ordinal + self.period_days
+        
+        return self.next_cleaning_ordinal
+
+    def is_due(self, day_ordinal: int, skip_done_today: bool = True) -> bool:
+        if skip_done_today and self.status == '✅' and self.last_cleaned_ordinal == day_ordinal:
+            return False
+        return self.due_ordinal is not None and self.due_ordinal <= day_ordinal
+
+    def days_overdue(self, day_ordinal: int) -> int:
+        if self.next_cleaning_ordinal is None:
+            return 0
+        return max(0, day_ordinal - self.next_cleaning_ordinal)
+
+    def to_dict(self) -> Dict:
+        return {
+            'row_index': self.row_index,
+            'name': self.name,
+            'period': self.period,
+            'last_cleaned': self.last_cleaned,
+            'next_cleaning': self.next_cleaning,
+            'completed_by': self.completed_by,
+            'status': self.status
+        }
+
+
+class TaskIndex:
+    def __init__(self, tasks: List[TaskRecord]):
+        self.tasks = tasks
+        due = sorted(
+            (task.due_ordinal, position)
+            for position, task in enumerate(tasks)
+            if task.due_ordinal is not None
+        )
+        self._due_keys = [due_ordinal for due_ordinal, _ in due]
+        self._due_positions = [position for _, position in due]
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def due_on(self, day_ordinal: int, skip_done_today: bool = True) -> List[TaskRecord]:
+        end = bisect_right(self._due_keys, day_ordinal)
+        due = []
+        for position in sorted(self._due_positions[:end]):
+            task = self.tasks[position]
+            if skip_done_today and task.status == '✅' and task.last_cleaned_ordinal == day_ordinal:
+                continue
+            due.append(task)
+        
+        return due
+
+
+def parse_date_ordinal(date_str: str) -> Optional[int]:
+    if not date_str or date_str == '-':
+        return None
+    try:
+        return datetime.strptime(date_str, "%d.%m.%Y").toordinal()
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Hashable, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    BACKLOG_PER_WORKER = 16
+
+    def __init__(self, workers: int):
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        super().__init__(workers * self.BACKLOG_PER_WORKER)
+        self.workers = workers
+        self._worker_slots = asyncio.Semaphore(workers)
+        self._user_locks: Dict[Hashable, asyncio.Lock] = {}
+        self._waiting: Dict[Hashable, int] = {}
+
+    @staticmethod
+    def ordering_key(update: object) -> Optional[Hashable]:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return ('user', update.effective_user.id)
+        if update.effective_chat:
+            return ('chat', update.effective_chat.id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.ordering_key(update)
+        
+        if key is None:
+            async with self._worker_slots:
+                await coroutine
+            return
+        
+        lock = self._user_locks.get(key)
+        if lock is None:
+            lock = self._user_locks[key] = asyncio.Lock()
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        
+        try:
+            async with lock:
+                async with self._worker_slots:
+                    await coroutine
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+                del self._user_locks[key]
+
+    async def initialize(self) -> None:
+        logger.info(f"Processing updates with {self.workers} workers, ordered per user")
+
+    async def shutdown(self) -> None:
+        if self._user_locks:
+            logger.warning(f"Update processor stopped with {len(self._user_locks)} users still in flight")
@@ -0,0 +1,144 @@
+import asyncio
+import random
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionWriteQueue:
+    def __init__(self, table_manager, journal=None, flush_interval: float = 2.0, max_batch_size: int = 200,
+                 max_retries: int = 5, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.table_manager = table_manager
+        self.journal = journal
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._pending: Dict[int, Dict] = {}
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending) + self._in_flight
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._closing = False
+            self._closed.clear()
+            self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, row_index: int, completed_by: str, completed_at: datetime, period_str: str,
+                journal_id: Optional[str] = None):
+        previous = self._pending.pop(row_index, None)
+        journal_ids = previous['journal_ids'] if previous else []
+        if journal_id:
+            journal_ids.append(journal_id)
+        
+        self._pending[row_index] = {
+            'row_index': row_index,
+            'completed_by': completed_by,
+            'completed_at': completed_at,
+            'period': period_str,
+            'journal_ids': journal_ids
+        }
+        self._wakeup.set()
+        logger.info(f"Queued completion of row {row_index} by {completed_by} (queue depth: {self.depth})")
+
+    async def drain(self, timeout: Optional[float] = 30.0):
+        self._closing = True
+        self._closed.set()
+        self._wakeup.set()
+        
+        if self._worker is None:
+            return
+        
+        try:
+            await asyncio.wait_for(self._worker, timeout)
+        except asyncio.TimeoutError:
+            self._worker.cancel()
+            logger.error(f"Write queue drain timed out, {self.depth} completions not written")
+        except Exception as e:
+            logger.error(f"Error draining write queue: {e}")
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            
+            if not self._closing:
+                try:
+                    await asyncio.wait_for(self._closed.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            
+            while self._pending:
+                batch = self._take_batch()
+                if not await self._write_with_retry(batch):
+                    self._requeue(batch)
+                    if self._closing:
+                        return
+                    break
+            
+            if self._closing:
+                return
+            
+            if self._pending:
+                self._wakeup.set()
+
+    def _take_batch(self) -> List[Dict]:
+        rows = list(self._pending)[:self.max_batch_size]
+        batch = [self._pending.pop(row) for row in rows]
+        self._in_flight = len(batch)
+        return batch
+
+    def _requeue(self, batch: List[Dict]):
+        requeued = {}
+        for completion in batch:
+            newer = self._pending.pop(completion['row_index'], None)
+            if newer:
+                newer['journal_ids'][:0] = completion['journal_ids']
+                requeued[completion['row_index']] = newer
+            else:
+                requeued[completion['row_index']] = completion
+        requeued.update(self._pending)
+        self._pending = requeued
+        self._in_flight = 0
+
+    async def _write_with_retry(self, batch: List[Dict]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            success = await self.table_manager.mark_tasks_completed_async(batch)
+            
+            if success:
+                logger.info(f"Wrote {len(batch)} completions to Google Sheets in one batch")
+                self._in_flight = 0
+                await self._confirm(batch)
+                return True
+            
+            if attempt == self.max_retries:
+                break
+            
+            delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+            delay += random.uniform(0, delay / 2)
+            logger.warning(f"Batch write of {len(batch)} completions failed, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        
+        logger.error(f"Giving up on batch of {len(batch)} completions after {self.max_retries + 1} attempts, keeping them queued")
+        return False
+
+    async def _confirm(self, batch: List[Dict]):
+        if not self.journal:
+            return
+        
+        try:
+            await self.journal.confirm(
+                journal_id for completion in batch for journal_id in completion['journal_ids']
+            )
+        except Exception as e:
+            logger.error(f"Error confirming completions in journal: {e}")
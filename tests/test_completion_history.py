@@ -0,0 +1,29 @@
+from datetime import datetime
+from bot.completion_history import CompletionHistory
+
+
+def _entry(username, row_index, completed_at):
+    return {
+        'completed_at': completed_at,
+        'name': f"Оборудование {row_index}",
+        'completed_by': 'Анна Иванова',
+        'username': username,
+        'row_index': row_index
+    }
+
+
+def test_sheet_import_runs_once_even_after_local_completion(tmp_path):
+    history = CompletionHistory(str(tmp_path))
+    history.record('anna', 'Анна Иванова', 3, 'Оборудование 3', datetime(2026, 10, 17, 9, 30, 12))
+    
+    assert not history.is_imported()
+    
+    imported = history.import_entries([
+        _entry('Anna', 3, datetime(2026, 10, 17, 9, 30)),
+        _entry('anna', 5, datetime(2026, 10, 1, 18, 0))
+    ])
+    
+    assert imported == 1
+    assert history.is_imported()
+    assert CompletionHistory(str(tmp_path)).is_imported()
+    assert history.page_for_user('anna', datetime(2026, 9, 1).date(), 0, 10)[1] == 2
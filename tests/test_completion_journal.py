@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+from bot.completion_journal import CompletionJournal
+
+
+def _append(journal, row_index):
+    return journal.append(row_index, 'anna', 'Анна Иванова', datetime(2026, 10, 17, 9, row_index), '1 день')
+
+
+def test_unconfirmed_entries_are_replayed_after_reopen(tmp_path):
+    async def scenario():
+        journal = CompletionJournal(str(tmp_path))
+        ids = [await _append(journal, row) for row in (1, 2, 3)]
+        await journal.confirm([ids[1]])
+        return ids
+    
+    ids = asyncio.run(scenario())
+    
+    reopened = CompletionJournal(str(tmp_path))
+    assert sorted(reopened.pending) == sorted([ids[0], ids[2]])
+    assert reopened.pending[ids[0]]['completed_at'] == datetime(2026, 10, 17, 9, 1)
+    assert reopened.pending[ids[2]]['row_index'] == 3
+
+
+def test_compaction_keeps_only_unconfirmed_entries(tmp_path):
+    async def scenario():
+        journal = CompletionJournal(str(tmp_path))
+        ids = [await _append(journal, row) for row in range(1, 6)]
+        await journal.confirm(ids[:3])
+        return ids
+    
+    ids = asyncio.run(scenario())
+    
+    reopened = CompletionJournal(str(tmp_path))
+    lines = reopened.journal_file.read_text(encoding='utf-8').splitlines()
+    
+    assert len(lines) == 2
+    assert sorted(reopened.pending) == sorted(ids[3:])
+
+
+def test_torn_last_record_is_skipped(tmp_path):
+    async def scenario():
+        journal = CompletionJournal(str(tmp_path))
+        return await _append(journal, 1)
+    
+    entry_id = asyncio.run(scenario())
+    with open(tmp_path / 'completions.journal', 'a', encoding='utf-8') as f:
+        f.write('{"op": "done", "id": "torn')
+    
+    assert list(CompletionJournal(str(tmp_path)).pending) == [entry_id]
+
+
+def test_concurrent_appends_share_one_fsynced_write(tmp_path):
+    async def scenario():
+        journal = CompletionJournal(str(tmp_path))
+        writes = []
+        write_lines = journal._write_lines
+        journal._write_lines = lambda lines: writes.append(len(lines)) or write_lines(lines)
+        
+        await asyncio.gather(*(_append(journal, row) for row in range(1, 11)))
+        return writes
+    
+    assert asyncio.run(scenario()) == [10]
+    assert len(CompletionJournal(str(tmp_path)).pending) == 10
+
+
+def test_journal_is_compacted_once_everything_is_confirmed(tmp_path):
+    async def scenario():
+        journal = CompletionJournal(str(tmp_path))
+        journal.COMPACT_AFTER_RECORDS = 4
+        ids = [await _append(journal, row) for row in (1, 2)]
+        await journal.confirm(ids)
+        return journal
+    
+    journal = asyncio.run(scenario())
+    
+    assert journal.journal_file.read_text(encoding='utf-8') == ''
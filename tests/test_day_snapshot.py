@@ -0,0 +1,15 @@
+from datetime import date, datetime
+from bot.day_snapshot import DaySnapshot
+from bot.task_index import TaskIndex, TaskRecord
+
+
+def test_completion_produces_new_snapshot_and_leaves_old_one_untouched():
+    task = TaskRecord(2, 'Кофемашина', '1 день', 1, '16.10.2026', '17.10.2026', '-', '⏳')
+    snapshot = DaySnapshot(date(2026, 10, 17), TaskIndex([task]), [])
+    
+    updated = snapshot.with_completion('anna', 2, datetime(2026, 10, 17, 9, 0))
+    
+    assert snapshot.completed == {}
+    assert updated.completed == {'anna': {2: datetime(2026, 10, 17, 9, 0)}}
+    assert updated.due is snapshot.due
+    assert [t.row_index for t in updated.due] == [2]
@@ -0,0 +1,26 @@
+import asyncio
+from datetime import date
+from bot.notification_ledger import NotificationLedger
+
+
+def test_concurrent_updates_share_one_write_and_survive_reopen(tmp_path):
+    async def scenario():
+        ledger = NotificationLedger(str(tmp_path))
+        writes = []
+        write = ledger._write
+        ledger._write = lambda entries: writes.append(len(entries)) or write(entries)
+        
+        claimed = await asyncio.gather(*(ledger.claim(date(2026, 10, 17), f"user{index}") for index in range(20)))
+        
+        assert all(claimed)
+        assert writes == [20]
+        
+        await ledger.mark_sent(date(2026, 10, 17), 'user0')
+        await ledger.release(date(2026, 10, 17), 'user1')
+    
+    asyncio.run(scenario())
+    
+    reopened = NotificationLedger(str(tmp_path))
+    assert reopened.entries['2026-10-17|user0']['status'] == 'sent'
+    assert not reopened.was_sent(date(2026, 10, 17), 'user1')
+    assert reopened.was_sent(date(2026, 10, 17), 'user2')
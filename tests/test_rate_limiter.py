@@ -0,0 +1,102 @@
+import pytest
+from bot import rate_limiter
+from bot.rate_limiter import SheetsRateLimiter, sheets_call, INTERACTIVE, REFRESH, ADMIN
+from bot.storage import StorageQuotaError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class NoJitter:
+    @staticmethod
+    def uniform(low, high):
+        return 0.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    monkeypatch.setattr(rate_limiter, 'random', NoJitter)
+    return clock
+
+
+def _drain(limiter, priority):
+    admitted = 0
+    while limiter._reserve(priority) == 0.0:
+        admitted += 1
+    return admitted
+
+
+def test_low_priority_callers_leave_the_reserve_for_interactive(clock):
+    limiter = SheetsRateLimiter(requests_per_minute=60, burst=10)
+    
+    assert _drain(limiter, ADMIN) == 5
+    assert _drain(limiter, REFRESH) == 2
+    assert _drain(limiter, INTERACTIVE) == 3
+    assert limiter.available == 0.0
+
+
+def test_reserve_delay_matches_refill_rate(clock):
+    limiter = SheetsRateLimiter(requests_per_minute=60, burst=10)
+    _drain(limiter, ADMIN)
+    
+    assert limiter._reserve(ADMIN) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter._reserve(ADMIN) == 0.0
+
+
+def test_quota_error_pauses_the_bucket_for_every_priority(clock):
+    limiter = SheetsRateLimiter(requests_per_minute=60, burst=10, base_backoff=2.0)
+    
+    limiter._throttled('values_batch_get', 0, StorageQuotaError())
+    
+    assert limiter._reserve(INTERACTIVE) == pytest.approx(2.0)
+    assert limiter._reserve(ADMIN) == pytest.approx(2.0)
+    clock.now += 2.0
+    assert limiter._reserve(INTERACTIVE) == 0.0
+    assert limiter._reserve(ADMIN) > 0.0
+    assert limiter.usage['values_batch_get']['throttled'] == 1
+
+
+def test_run_backs_off_exponentially_and_retries_after_429(clock):
+    limiter = SheetsRateLimiter(requests_per_minute=600, burst=100, base_backoff=1.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise StorageQuotaError()
+        return 'ok'
+
+    @sheets_call(REFRESH)
+    def fetch():
+        return limiter.run(flaky)
+    
+    assert fetch() == 'ok'
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 1.0
+    assert attempts[2] - attempts[1] >= 2.0
+    assert limiter.usage['fetch']['tokens'] == 3
+    assert limiter.usage['fetch']['throttled'] == 2
+
+
+def test_run_gives_up_after_max_retries(clock):
+    limiter = SheetsRateLimiter(requests_per_minute=600, burst=100, max_retries=2)
+
+    def always_throttled():
+        raise StorageQuotaError()
+    
+    with pytest.raises(StorageQuotaError):
+        limiter.run(always_throttled)
+    assert limiter.usage['unattributed']['throttled'] == 2
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytz
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from bot.notification_ledger import NotificationLedger
+from bot.notifier import SENT, RETRYABLE, PERMANENT
+from bot.scheduler import NotificationPlanner, RefreshPipeline, send_shift_notification
+
+
+class FakeCache:
+    def __init__(self, shift_date, shift):
+        self.version = 1
+        self.shift_date = shift_date
+        self.shift = shift
+
+    async def refresh_from_sheets(self, force=False):
+        pass
+
+    def get_shifts_for_date(self, day):
+        return [self.shift] if day == self.shift_date else []
+
+    def get_tasks_for_date(self, day):
+        return []
+
+
+class FakeMembers:
+    def __init__(self, user_id=100):
+        self.user_id = user_id
+
+    def get_user_id(self, username):
+        return self.user_id
+
+
+class FakeDispatcher:
+    def __init__(self, results):
+        self.results = list(results)
+        self.sent = 0
+
+    async def send(self, **message):
+        self.sent += 1
+        return self.results.pop(0)
+
+
+def test_failed_notification_is_replanned_without_new_snapshot(tmp_path):
+    async def scenario():
+        start = datetime.now(pytz.UTC).replace(second=0, microsecond=0) + timedelta(hours=2)
+        shift = {'name': 'Анна Иванова', 'username': 'anna', 'start_time': start.strftime('%H:%M')}
+        cache = FakeCache(start.date(), shift)
+        scheduler = AsyncIOScheduler(timezone=pytz.UTC)
+        dispatcher = FakeDispatcher([RETRYABLE, SENT])
+        planner = NotificationPlanner(
+            scheduler, dispatcher, cache, FakeMembers(), NotificationLedger(str(tmp_path)), 'UTC', 60
+        )
+        pipeline = RefreshPipeline(cache, planner)
+        job_id = f"{planner.job_prefix}{start.date().isoformat()}_anna"
+        
+        await pipeline.refresh()
+        assert scheduler.get_job(job_id) is not None
+        
+        scheduler.remove_job(job_id)
+        await send_shift_notification(planner, start.date(), 'anna', shift['start_time'])
+        assert dispatcher.sent == 1
+        
+        await pipeline.refresh()
+        assert scheduler.get_job(job_id) is not None
+        
+        scheduler.remove_job(job_id)
+        await send_shift_notification(planner, start.date(), 'anna', shift['start_time'])
+        await pipeline.refresh()
+        assert dispatcher.sent == 2
+        assert scheduler.get_job(job_id) is None
+    
+    asyncio.run(scenario())
+
+
+def test_rejected_notification_is_not_replanned(tmp_path):
+    async def scenario():
+        start = datetime.now(pytz.UTC).replace(second=0, microsecond=0) + timedelta(hours=2)
+        shift = {'name': 'Анна Иванова', 'username': 'anna', 'start_time': start.strftime('%H:%M')}
+        cache = FakeCache(start.date(), shift)
+        scheduler = AsyncIOScheduler(timezone=pytz.UTC)
+        ledger = NotificationLedger(str(tmp_path))
+        planner = NotificationPlanner(scheduler, FakeDispatcher([PERMANENT]), cache, FakeMembers(), ledger, 'UTC', 60)
+        pipeline = RefreshPipeline(cache, planner)
+        job_id = f"{planner.job_prefix}{start.date().isoformat()}_anna"
+        
+        await pipeline.refresh()
+        scheduler.remove_job(job_id)
+        await send_shift_notification(planner, start.date(), 'anna', shift['start_time'])
+        
+        cache.version += 1
+        await pipeline.refresh()
+        
+        assert ledger.was_sent(start.date(), 'anna')
+        assert scheduler.get_job(job_id) is None
+    
+    asyncio.run(scenario())
+
+
+def test_shift_of_user_without_chat_is_not_planned(tmp_path):
+    start = datetime.now(pytz.UTC).replace(second=0, microsecond=0) + timedelta(hours=2)
+    shift = {'name': 'Анна Иванова', 'username': 'anna', 'start_time': start.strftime('%H:%M')}
+    scheduler = AsyncIOScheduler(timezone=pytz.UTC)
+    members = FakeMembers(user_id=None)
+    planner = NotificationPlanner(
+        scheduler, FakeDispatcher([]), FakeCache(start.date(), shift), members, NotificationLedger(str(tmp_path)), 'UTC', 60
+    )
+    
+    planner.reschedule(1)
+    assert scheduler.get_jobs() == []
+    
+    members.user_id = 100
+    planner.reschedule(1)
+    assert len(scheduler.get_jobs()) == 1
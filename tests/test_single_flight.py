@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from datetime import datetime
+from bot import single_flight
+from bot.single_flight import SingleFlight
+from bot.storage import InMemoryBackend
+from bot.table_manager import TableManager
+from bot.table_setup import TableSetup
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_concurrent_threads_share_one_read():
+    flight = SingleFlight(ttl=0)
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        release.wait(5)
+        return 'values'
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', read))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert calls == [1]
+    assert results == ['values'] * 8
+
+
+def test_concurrent_coroutines_share_one_read():
+    async def scenario():
+        flight = SingleFlight(ttl=0)
+        calls = []
+        
+        async def read():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'values'
+        
+        results = await asyncio.gather(*(flight.do_async('key', read) for _ in range(8)))
+        return calls, results
+    
+    calls, results = asyncio.run(scenario())
+    assert calls == [1]
+    assert results == ['values'] * 8
+
+
+def test_memo_expires_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(single_flight, 'time', clock)
+    flight = SingleFlight(ttl=2.0)
+    calls = []
+
+    def read():
+        calls.append(1)
+        return len(calls)
+    
+    assert flight.do('key', read) == 1
+    clock.now += 1.9
+    assert flight.do('key', read) == 1
+    clock.now += 0.2
+    assert flight.do('key', read) == 2
+
+
+def test_forget_drops_memo_and_in_flight_results():
+    flight = SingleFlight(ttl=60)
+
+    def read_and_forget():
+        flight.forget()
+        return 'stale'
+    
+    assert flight.do('key', read_and_forget) == 'stale'
+    assert flight.do('key', lambda: 'fresh') == 'fresh'
+    
+    flight.forget()
+    assert flight.do('key', lambda: 'newer') == 'newer'
+
+
+def test_table_writes_invalidate_memoized_reads():
+    now = datetime(2026, 10, 17, 10, 0)
+    backend = InMemoryBackend({
+        "Сотрудники": [list(TableSetup.EMPLOYEES_HEADERS), ['Анна Иванова', '@anna', 'Бариста']],
+        "График чистки": [
+            list(TableSetup.CLEANING_HEADERS),
+            ['Кофемашина', '1 день', '16.10.2026', '17.10.2026', '-', '⏳']
+        ]
+    })
+    table_manager = TableManager('', '', backend=backend)
+    table_manager.connect()
+    
+    table_manager.get_equipment_tasks()
+    reads = backend.calls['get_all_values']
+    table_manager.get_equipment_tasks()
+    assert backend.calls['get_all_values'] == reads
+    
+    table_manager.mark_tasks_completed([{
+        'row_index': 2, 'completed_by': 'Анна Иванова', 'completed_at': now, 'period': '1 день'
+    }])
+    tasks = table_manager.get_equipment_tasks()
+    
+    assert backend.calls['get_all_values'] == reads + 1
+    assert tasks[0].last_cleaned == '17.10.2026'
@@ -0,0 +1,68 @@
+from datetime import datetime
+from bot.storage import InMemoryBackend
+from bot.table_manager import TableManager
+from bot.table_setup import TableSetup
+
+
+def _month_sheet(days):
+    return [
+        ['НОЯБРЬ'],
+        ['', ''] + ['' for _ in days],
+        ['ФИО', 'Должность'] + [str(day) for day in days],
+        ['Анна Иванова', 'Бариста'] + ['08-15' for _ in days]
+    ]
+
+
+def _table_manager(sheets):
+    sheets = {
+        "Сотрудники": [list(TableSetup.EMPLOYEES_HEADERS), ['Анна Иванова', '@anna', 'Бариста']],
+        "График чистки": [list(TableSetup.CLEANING_HEADERS)],
+        **sheets
+    }
+    table_manager = TableManager('', '', backend=InMemoryBackend(sheets))
+    table_manager.connect()
+    return table_manager
+
+
+def test_month_sheet_skips_days_past_end_of_month():
+    table_manager = _table_manager({'НОЯБРЬ 26': _month_sheet(range(1, 32))})
+    
+    shifts = table_manager.get_shifts_for_date(datetime(2026, 11, 30))
+    
+    assert [shift['name'] for shift in shifts] == ['Анна Иванова']
+    assert table_manager.schedule.shifts_on(datetime(2026, 11, 1))
+
+
+def _add_sheet(backend, title, rows):
+    backend.add_worksheet(title, len(rows), max(len(row) for row in rows))
+    backend.values_batch_update({'data': [{'range': f"'{title}'!A1", 'values': rows}]})
+
+
+def test_sheet_added_after_startup_is_found():
+    table_manager = _table_manager({})
+    _add_sheet(table_manager.backend, 'НОЯБРЬ 26', _month_sheet(range(1, 31)))
+    
+    shifts = table_manager.get_shifts_for_date(datetime(2026, 11, 5))
+    
+    assert [shift['name'] for shift in shifts] == ['Анна Иванова']
+
+
+def test_missing_sheet_does_not_reload_registry_on_every_snapshot():
+    table_manager = _table_manager({})
+    table_manager.fetch_snapshot(datetime(2026, 11, 5), 0)
+    reloads = table_manager.backend.calls['worksheets']
+    
+    for _ in range(3):
+        table_manager.fetch_snapshot(datetime(2026, 11, 5), 0)
+    
+    assert table_manager.backend.calls['worksheets'] == reloads
+
+
+def test_snapshot_picks_up_sheet_added_after_startup():
+    table_manager = _table_manager({})
+    assert table_manager.fetch_snapshot(datetime(2026, 11, 5), 0)['shifts_today'] == []
+    
+    _add_sheet(table_manager.backend, 'НОЯБРЬ 26', _month_sheet(range(1, 31)))
+    table_manager.MISSING_SHEET_TTL_SECONDS = 0
+    
+    assert len(table_manager.fetch_snapshot(datetime(2026, 11, 5), 0)['shifts_today']) == 1
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime
+from telegram import Chat, Message, Update, User
+from bot.update_processor import PerUserUpdateProcessor
+
+
+def _update(update_id, user_id):
+    user = User(user_id, 'Анна', False)
+    chat = Chat(user_id, Chat.PRIVATE)
+    return Update(update_id, message=Message(update_id, datetime(2026, 10, 17, 9, 0), chat, from_user=user, text='/tasks'))
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.peak = 0
+
+    async def handle(self, name):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.events.append(('start', name))
+        await asyncio.sleep(0.01)
+        self.events.append(('end', name))
+        self.running -= 1
+
+
+def test_updates_from_one_user_run_one_after_the_other():
+    async def scenario():
+        processor = PerUserUpdateProcessor(4)
+        recorder = Recorder()
+        
+        await asyncio.gather(
+            processor.do_process_update(_update(1, 100), recorder.handle('first')),
+            processor.do_process_update(_update(2, 100), recorder.handle('second')),
+        )
+        
+        assert recorder.events == [('start', 'first'), ('end', 'first'), ('start', 'second'), ('end', 'second')]
+        assert recorder.peak == 1
+        assert not processor._user_locks
+    
+    asyncio.run(scenario())
+
+
+def test_updates_from_different_users_run_in_parallel():
+    async def scenario():
+        processor = PerUserUpdateProcessor(4)
+        recorder = Recorder()
+        
+        await asyncio.gather(
+            processor.do_process_update(_update(1, 100), recorder.handle('anna')),
+            processor.do_process_update(_update(2, 200), recorder.handle('boris')),
+        )
+        
+        assert recorder.events[:2] == [('start', 'anna'), ('start', 'boris')]
+        assert recorder.peak == 2
+    
+    asyncio.run(scenario())
+
+
+def test_workers_cap_parallelism_across_users():
+    async def scenario():
+        processor = PerUserUpdateProcessor(2)
+        recorder = Recorder()
+        
+        await asyncio.gather(*(
+            processor.do_process_update(_update(user_id, user_id), recorder.handle(user_id))
+            for user_id in range(1, 6)
+        ))
+        
+        assert recorder.peak == 2
+        assert len(recorder.events) == 10
+    
+    asyncio.run(scenario())
+
+
+def test_updates_without_a_user_are_not_ordered():
+    assert PerUserUpdateProcessor.ordering_key(object()) is None
+    assert PerUserUpdateProcessor.ordering_key(_update(1, 100)) == ('user', 100)
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+from bot.write_queue import CompletionWriteQueue
+
+
+class FakeTableManager:
+    def __init__(self, results, on_write=None):
+        self.results = list(results)
+        self.on_write = on_write
+        self.batches = []
+
+    async def mark_tasks_completed_async(self, batch):
+        self.batches.append([completion['row_index'] for completion in batch])
+        if self.on_write:
+            self.on_write(len(self.batches))
+        return self.results.pop(0) if self.results else True
+
+
+class FakeJournal:
+    def __init__(self):
+        self.confirmed = []
+
+    async def confirm(self, entry_ids):
+        self.confirmed.extend(entry_ids)
+
+
+def _enqueue(queue, *rows):
+    for row in rows:
+        queue.enqueue(row, 'Анна Иванова', datetime(2026, 10, 17, 9, row), '1 день', f"j{row}")
+
+
+def test_failed_batch_is_requeued_in_order_ahead_of_newer_completions():
+    async def scenario():
+        queue = None
+        
+        def on_write(call):
+            if call == 1:
+                _enqueue(queue, 4, 2)
+        
+        table_manager = FakeTableManager([False, True], on_write)
+        journal = FakeJournal()
+        queue = CompletionWriteQueue(table_manager, journal, flush_interval=0, max_retries=0, base_backoff=0)
+        _enqueue(queue, 1, 2, 3)
+        queue.start()
+        
+        while len(table_manager.batches) < 2:
+            await asyncio.sleep(0)
+        await queue.drain()
+        
+        assert table_manager.batches == [[1, 2, 3], [1, 2, 3, 4]]
+        assert sorted(journal.confirmed) == ['j1', 'j2', 'j2', 'j3', 'j4']
+        assert queue.depth == 0
+    
+    asyncio.run(scenario())
+
+
+def test_batch_is_retried_with_backoff_until_it_succeeds():
+    async def scenario():
+        table_manager = FakeTableManager([False, False, True])
+        journal = FakeJournal()
+        queue = CompletionWriteQueue(table_manager, journal, flush_interval=0, max_retries=2, base_backoff=0)
+        _enqueue(queue, 5, 6)
+        queue.start()
+        
+        await queue.drain()
+        
+        assert table_manager.batches == [[5, 6]] * 3
+        assert journal.confirmed == ['j5', 'j6']
+    
+    asyncio.run(scenario())
+
+
+def test_shutdown_drains_pending_writes_without_waiting_for_flush_interval():
+    async def scenario():
+        table_manager = FakeTableManager([])
+        queue = CompletionWriteQueue(table_manager, flush_interval=60)
+        queue.start()
+        _enqueue(queue, 7, 8)
+        
+        await asyncio.wait_for(queue.drain(), timeout=5)
+        
+        assert table_manager.batches == [[7, 8]]
+        assert queue.depth == 0
+    
+    asyncio.run(scenario())
+
+
+def test_shutdown_keeps_completions_queued_when_writes_keep_failing():
+    async def scenario():
+        table_manager = FakeTableManager([False] * 10)
+        journal = FakeJournal()
+        queue = CompletionWriteQueue(table_manager, journal, flush_interval=60, max_retries=1, base_backoff=0)
+        queue.start()
+        _enqueue(queue, 9)
+        
+        await queue.drain()
+        
+        assert len(table_manager.batches) == 2
+        assert queue.depth == 1
+        assert journal.confirmed == []
+    
+    asyncio.run(scenario())